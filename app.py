@@ -1,2 +1,6 @@
+import multiprocessing
 from src import main
-main.run()
\ No newline at end of file
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # worker processes in the PyInstaller build
+    main.run()
\ No newline at end of file
@@ -0,0 +1,4 @@
+from src import benchmark
+
+if __name__ == '__main__':
+    benchmark.main()
@@ -0,0 +1,4 @@
+from src import ensemble
+
+if __name__ == '__main__':
+    ensemble.main()
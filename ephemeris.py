@@ -0,0 +1,4 @@
+from src import ephemeris
+
+if __name__ == '__main__':
+    ephemeris.main()
@@ -0,0 +1,4 @@
+from src import simulate
+
+if __name__ == '__main__':
+    simulate.main()
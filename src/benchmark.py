@@ -0,0 +1,260 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from .classes import CelestialBody
+from .create_celestial_bodies import G
+from .lib_calculation import compute_force_matrix, compute_accelerations, compute_timestep
+from .lib_plotting import orthogonal_projection, apply_scaling, generate_perpendicular_vectors, projection_matrix, \
+    view_transform, project_to_view
+from .simulation import Simulation
+
+DEFAULT_SIZES = [6, 100, 1000, 10000]  # numbers of bodies
+DEFAULT_STEPS = [1, 100, 10000, 100000]  # numbers of steps of a date jump
+MAX_MATRIX_BYTES = 2 ** 30  # compute_force_matrix is skipped for sizes whose (3, N, N) matrices exceed this
+
+
+def measure(function, setup=None, min_time=0.2, max_repeats=1000):
+    """
+    Times a function repeatedly until min_time has passed, at least once.
+
+    Parameters:
+    function (callable): The function to be timed. It is called with the values returned by setup.
+    setup (callable, optional): Called before every repetition, outside the timing. Returns a tuple. Default: None.
+    min_time (float, optional): The minimum total time in seconds. Default: 0.2.
+    max_repeats (int, optional): The maximum number of repetitions. Default: 1000.
+
+    Returns:
+    dict: The number of repetitions and the best, median and mean time of one call in seconds.
+    """
+    times = []
+    while not times or (sum(times) < min_time and len(times) < max_repeats):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return {'repeats': len(times), 'best': min(times), 'median': float(np.median(times)), 'mean': float(np.mean(times))}
+
+
+def random_system(num_bodies, seed=0):
+    """
+    Returns:
+    tuple: Positions in A.U. and masses in sun masses of a random system with a central mass of 1.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-30, 30, size=(num_bodies, 3))
+    masses = rng.uniform(1e-10, 1e-3, size=num_bodies)
+    positions[0], masses[0] = 0, 1
+    return positions, masses
+
+
+def random_bodies(num_bodies, seed=0):
+    positions, masses = random_system(num_bodies, seed)
+    return [CelestialBody(m, p, np.zeros(3)) for m, p in zip(masses, positions)]
+
+
+def bench_force_matrix(num_bodies, min_time):
+    if 4 * 3 * num_bodies ** 2 * 8 > MAX_MATRIX_BYTES:  # the result plus temporaries
+        return None
+    bodies = random_bodies(num_bodies)
+    return measure(lambda: compute_force_matrix(bodies, G), min_time=min_time)
+
+
+def bench_accelerations(num_bodies, min_time):
+    positions, masses = random_system(num_bodies)
+    return measure(lambda: compute_accelerations(positions, masses, G), min_time=min_time)
+
+
+def bench_compute_timestep(num_bodies, min_time):
+    bodies = random_bodies(num_bodies)
+    return measure(lambda: compute_timestep(bodies, G, datetime.date(2024, 1, 1)), min_time=min_time)
+
+
+def bench_projection_loop(num_bodies, min_time):
+    # One projection and scaling per body, as done per body and step before the histories were batched
+    positions, _ = random_system(num_bodies)
+    v1, v2 = generate_perpendicular_vectors(np.array((0, 1, 2 / 3)))
+    window = argparse.Namespace(width=1000, height=600)
+
+    def project():
+        for position in positions:
+            apply_scaling(*orthogonal_projection(position, v1, v2), window, 100, 12)
+
+    return measure(project, min_time=min_time)
+
+
+def bench_projection_batch(num_bodies, min_time):
+    positions, _ = random_system(num_bodies)
+    projection = projection_matrix(*generate_perpendicular_vectors(np.array((0, 1, 2 / 3))))
+    scale, offset = view_transform(argparse.Namespace(width=1000, height=600), 100, 12)
+    return measure(lambda: project_to_view(positions, projection, scale, offset), min_time=min_time)
+
+
+def bench_jump(num_steps, min_time):
+    # A date jump of the animated system, from a fresh simulation each time (no checkpoints to start from)
+    def setup():
+        simulation = Simulation('inner')
+        return simulation, simulation.current_date + datetime.timedelta(days=num_steps)
+
+    return measure(lambda simulation, target_date: simulation.jump_to(target_date), setup=setup, min_time=min_time)
+
+
+def bench_kepler_jump(num_steps, min_time):
+    # The same date jump on two-body orbits, whose cost does not depend on the number of days
+    def setup():
+        simulation = Simulation('inner')
+        return simulation, simulation.current_date + datetime.timedelta(days=num_steps)
+
+    return measure(lambda simulation, target_date: simulation.kepler_jump_to(target_date), setup=setup,
+                   min_time=min_time)
+
+
+# A cold start without window: a new interpreter imports the application and creates its simulation
+STARTUP_SCRIPT = "import src.main; src.main.get_simulation()"
+
+
+def bench_startup(value, min_time):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return measure(lambda: subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=root, check=True,
+                                          stdout=subprocess.DEVNULL), min_time=min_time)
+
+
+BENCHMARKS = {
+    'force_matrix': ('num_bodies', bench_force_matrix),
+    'accelerations': ('num_bodies', bench_accelerations),
+    'compute_timestep': ('num_bodies', bench_compute_timestep),
+    'projection_loop': ('num_bodies', bench_projection_loop),
+    'projection_batch': ('num_bodies', bench_projection_batch),
+    'jump': ('num_steps', bench_jump),
+    'kepler_jump': ('num_steps', bench_kepler_jump),
+    'startup': (None, bench_startup),
+}
+
+
+def environment():
+    """
+    Returns:
+    dict: Information to tell benchmark results apart: commit, versions and machine.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmarks(names=None, sizes=DEFAULT_SIZES, steps=DEFAULT_STEPS, min_time=0.2, progress=None):
+    """
+    Runs the benchmarks for all sizes (number of bodies) or step counts. Benchmarks without parameter run once.
+
+    Parameters:
+    names (list, optional): The benchmarks to run, see BENCHMARKS. Default: None (all).
+    sizes (list, optional): The numbers of bodies. Default: DEFAULT_SIZES.
+    steps (list, optional): The numbers of steps of the date jumps. Default: DEFAULT_STEPS.
+    min_time (float, optional): The minimum time spent per case in seconds. Default: 0.2.
+    progress (callable, optional): Called with each result as soon as it is available. Default: None.
+
+    Returns:
+    dict: The environment and a list of results, each with the benchmark name, its parameters and timings.
+          Skipped cases have no timings.
+    """
+    results = []
+    for name in names or BENCHMARKS:
+        parameter, function = BENCHMARKS[name]
+        values = {'num_steps': steps, 'num_bodies': sizes}.get(parameter, [None])
+        for value in values:
+            timing = function(value, min_time)
+            params = {parameter: value} if parameter is not None else {}
+            result = {'benchmark': name, 'params': params, **(timing or {'skipped': True})}
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current):
+    """
+    Compares the median times of two benchmark runs.
+
+    Parameters:
+    baseline (dict): A result of run_benchmarks, e.g. of an earlier commit.
+    current (dict): A result of run_benchmarks.
+
+    Returns:
+    list: Tuples (benchmark, params, baseline median, current median, ratio) for the cases present in both.
+    """
+    def key(result):
+        return result['benchmark'], json.dumps(result['params'], sort_keys=True)
+
+    baseline_medians = {key(result): result['median'] for result in baseline['results'] if 'median' in result}
+    rows = []
+    for result in current['results']:
+        if 'median' in result and key(result) in baseline_medians:
+            old = baseline_medians[key(result)]
+            rows.append((result['benchmark'], result['params'], old, result['median'], result['median'] / old))
+    return rows
+
+
+def format_result(result):
+    params = ', '.join(f"{name}={value}" for name, value in result['params'].items())
+    if result.get('skipped'):
+        return f"{result['benchmark']:18s} {params:18s} skipped"
+    return f"{result['benchmark']:18s} {params:18s} {result['median'] * 1e3:12.4f} ms  ({result['repeats']} runs)"
+
+
+def parse_list(text):
+    try:
+        return [int(float(value)) for value in text.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid list '{text}'. Expected comma separated numbers, e.g. 6,100,1e4.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the speed of the physics and projection hot paths "
+                                                 "and write the results as JSON.")
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=None,
+                        help="benchmarks to run (default: all)")
+    parser.add_argument('--sizes', type=parse_list, default=DEFAULT_SIZES,
+                        help="numbers of bodies (default: 6,100,1000,10000)")
+    parser.add_argument('--steps', type=parse_list, default=DEFAULT_STEPS,
+                        help="numbers of steps of the date jumps (default: 1,100,10000,100000)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum time per case in seconds (default: 0.2)")
+    parser.add_argument('--output', default=None, help="JSON output file (default: standard output)")
+    parser.add_argument('--compare', default=None, help="JSON file of an earlier run to compare with")
+    parser.add_argument('--quiet', action='store_true', help="do not report progress")
+    args = parser.parse_args(argv)
+
+    report = None if args.quiet else lambda result: print(format_result(result), file=sys.stderr, flush=True)
+    results = run_benchmarks(args.benchmarks, args.sizes, args.steps, args.min_time, progress=report)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline['environment'].get('commit')} (ratio > 1: slower now)", file=sys.stderr)
+        for name, params, old, new, ratio in compare(baseline, results):
+            params = ', '.join(f"{key}={value}" for key, value in params.items())
+            print(f"{name:18s} {params:18s} {old * 1e3:12.4f} ms -> {new * 1e3:12.4f} ms  x{ratio:.2f}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import collections
+import datetime
+import os
+import threading
+import numpy as np
+
+Checkpoint = collections.namedtuple('Checkpoint', ['date', 'positions', 'velocities'])
+
+
+class CheckpointStore:
+    def __init__(self, interval=365, capacity=256, directory=None):
+        """
+        A time-indexed store of full system snapshots.
+
+        Snapshots are kept in memory up to the given capacity; the least recently used ones are evicted first.
+        If a directory is given, every snapshot is also written to disk and can be reloaded after eviction
+        or in a later session. A store may be shared by simulations in several threads, e.g. a date jump in the
+        background (see Simulation.copy); its methods are guarded by a lock.
+
+        Parameters:
+        interval (int, optional): The spacing of checkpoints in days. Checkpoints are taken on dates whose
+                                  ordinal is a multiple of the interval. Default: 365.
+        capacity (int, optional): The maximum number of snapshots held in memory. Default: 256.
+        directory (str, optional): A directory for persistent snapshots. Snapshots from different simulation
+                                   settings must not share a directory. Default: None (memory only).
+        """
+        if interval < 1:
+            raise ValueError("The checkpoint interval must be at least one day.")
+        self.interval = int(interval)
+        self.capacity = capacity
+        self.directory = directory
+        self._memory = collections.OrderedDict()  # date -> Checkpoint, least recently used first
+        self._on_disk = set()
+        self._lock = threading.RLock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for filename in os.listdir(directory):
+                name, extension = os.path.splitext(filename)
+                if extension == '.npz':
+                    try:
+                        self._on_disk.add(datetime.date.fromisoformat(name))
+                    except ValueError:
+                        pass
+
+    def __getstate__(self):
+        # Locks cannot be pickled, e.g. when a simulation is sent to another process
+        state = self.__dict__.copy()
+        del state['_lock']
+        with self._lock:
+            state['_memory'], state['_on_disk'] = self._memory.copy(), self._on_disk.copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.dates())
+
+    def __contains__(self, date):
+        with self._lock:
+            return date in self._memory or date in self._on_disk
+
+    def dates(self):
+        """
+        Returns:
+        list: All dates for which a snapshot is available, sorted.
+        """
+        with self._lock:
+            return sorted(set(self._memory) | self._on_disk)
+
+    def is_checkpoint_date(self, date):
+        """
+        Returns:
+        bool: Whether a checkpoint is due at the given date.
+        """
+        return date.toordinal() % self.interval == 0
+
+    def checkpoint_dates_between(self, start_date, end_date):
+        """
+        Lists the dates at which checkpoints are due strictly between two dates, in the order of travel.
+
+        Parameters:
+        start_date (datetime.date): The start date (excluded).
+        end_date (datetime.date): The end date (excluded).
+
+        Returns:
+        list: The dates, ascending if end_date > start_date, otherwise descending.
+        """
+        lower, upper = sorted((start_date.toordinal(), end_date.toordinal()))
+        first = (lower // self.interval + 1) * self.interval
+        ordinals = range(first, upper, self.interval)
+        dates = [datetime.date.fromordinal(ordinal) for ordinal in ordinals]
+        return dates if end_date >= start_date else dates[::-1]
+
+    def add(self, date, positions, velocities):
+        """
+        Stores a snapshot of the system.
+
+        Parameters:
+        date (datetime.date): The date of the snapshot.
+        positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+        velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+
+        Returns:
+        None.
+        """
+        checkpoint = Checkpoint(date, np.array(positions, dtype=float), np.array(velocities, dtype=float))
+        with self._lock:
+            self._memory[date] = checkpoint
+            self._memory.move_to_end(date)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+            if self.directory is not None and date not in self._on_disk:
+                np.savez(self._path(date), positions=checkpoint.positions, velocities=checkpoint.velocities)
+                self._on_disk.add(date)
+
+    def get(self, date):
+        """
+        Returns:
+        Checkpoint: The snapshot at the given date, or None if there is none.
+        """
+        with self._lock:
+            if date in self._memory:
+                self._memory.move_to_end(date)
+                return self._memory[date]
+            if date in self._on_disk:
+                with np.load(self._path(date)) as data:
+                    checkpoint = Checkpoint(date, data['positions'], data['velocities'])
+                self._memory[date] = checkpoint
+                while len(self._memory) > self.capacity:
+                    self._memory.popitem(last=False)
+                return checkpoint
+            return None
+
+    def nearest(self, date):
+        """
+        Finds the snapshot closest in time to the given date.
+
+        Parameters:
+        date (datetime.date): The date of interest.
+
+        Returns:
+        Checkpoint: The closest snapshot, or None if the store is empty.
+        """
+        with self._lock:
+            dates = self.dates()
+            if not dates:
+                return None
+            return self.get(min(dates, key=lambda d: abs((d - date).days)))
+
+    def clear(self):
+        """
+        Removes all snapshots from memory. Snapshots on disk are kept.
+        """
+        with self._lock:
+            self._memory.clear()
+
+    def _path(self, date):
+        return os.path.join(self.directory, date.isoformat() + '.npz')
@@ -43,4 +43,25 @@ class CelestialBody:
         Returns:
         None. The function updates the 'velocity' attribute of the celestial body instance.
         """
-        self.velocity += a * time
\ No newline at end of file
+        self.velocity += a * time
+
+
+class MasslessParticles:
+    def __init__(self, positions, velocities, color=(120, 120, 120)):
+        """
+        A population of massless test particles (e.g. asteroids), stored as packed arrays.
+        The particles are accelerated by the massive bodies only.
+
+        Parameters:
+        positions (list or numpy.ndarray): The initial positions of the particles, shape (num_particles, 3).
+        velocities (list or numpy.ndarray): The initial velocities of the particles, shape (num_particles, 3).
+        color (tuple, optional): The color of the particles. Default: (120, 120, 120).
+        """
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        self.velocities = np.array(velocities, dtype=float).reshape(-1, 3)
+        if self.positions.shape != self.velocities.shape:
+            raise ValueError("Positions and velocities of the particles must have the same shape.")
+        self.color = color # for plotting purposes
+
+    def __len__(self):
+        return len(self.positions)
@@ -1,12 +1,53 @@
 import numpy as np
-from .utils.parse_data import parse_data
-from .classes import CelestialBody
+from .utils.catalog import load_catalog
+from .classes import CelestialBody, MasslessParticles
 from .utils.read_config import read_config
 from .utils.resource_path import resource_path
 
-config = read_config()
+# Gravitational constant in the units of the simulation (1 sun mass, 1 A.U., 1 day) [AU^3 sunmass^-1 day^-2]
+G = 2.95912208286e-4
 
-def create_celestial_bodies(which='inner'):
+# Styling of the bundled bodies: radius in pixels, color and orbital period in days
+BODY_STYLES = {
+    'Sun': (15, (255, 223, 0), 1),  # Bright yellow
+    'Mercury': (3, (169, 169, 169), 87.97),  # Dark gray
+    'Venus': (3, (255, 204, 153), 224.70),  # Pale yellowish-brown
+    'Earth': (5, (0, 102, 204), 365.25),  # Blue (ocean) with hints of green (land)
+    'Mars': (4, (210, 105, 30), 686.98),  # Reddish-brown
+    'Jupiter': (12, (255, 165, 0), 4332.82),  # Orange with bands
+    'Saturn': (10, (194, 178, 128), 10755.70),  # Pale gold with bands
+    'Uranus': (9, (173, 216, 230), 30687.15),  # Light blue
+    'Neptune': (7, (0, 0, 139), 60190.03),  # Deep blue
+    'Pluto': (2, (169, 169, 169), 90560),  # Light brown or gray
+}
+DEFAULT_RADIUS_PX = 2  # radius of bodies not listed in BODY_STYLES
+DEFAULT_COLOR = (150, 150, 150)  # color of bodies not listed in BODY_STYLES
+
+def kepler_periods(positions, velocities, central_position, central_velocity, central_mass, G):
+    """
+    Estimate the orbital periods around a central body from the current state (vis-viva equation and
+    Kepler's third law), neglecting the other bodies.
+
+    Parameters:
+    positions (np.ndarray): The positions of the bodies in A.U., shape (num_bodies, 3).
+    velocities (np.ndarray): The velocities of the bodies in A.U./day, shape (num_bodies, 3).
+    central_position (np.ndarray): The position of the central body.
+    central_velocity (np.ndarray): The velocity of the central body.
+    central_mass (float): The mass of the central body in sun masses.
+    G (float): The gravitational constant.
+
+    Returns:
+    np.ndarray: The periods in days; -1 for unbound orbits (and the central body itself).
+    """
+    r = np.linalg.norm(positions - central_position, axis=1)
+    v_squared = np.sum((velocities - central_velocity)**2, axis=1)
+    mu = G * central_mass
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse_semi_major_axis = 2 / r - v_squared / mu
+        periods = 2 * np.pi * np.sqrt(1 / inverse_semi_major_axis**3 / mu)
+    return np.where((r > 0) & (inverse_semi_major_axis > 0), periods, -1)
+
+def create_celestial_bodies(which='inner', filename=None):
     """
     This function creates a list of celestial bodies based on the provided data.
     The celestial bodies are represented by the CelestialBody class.
@@ -15,6 +56,9 @@ def create_celestial_bodies(which='inner'):
     which (str): 'all', 'inner' or 'outer' (Default: 'inner').
                  A string indicating whether to create celestial bodies
                  for the 'inner' or 'outer' solar system.
+    filename (str, optional): The input data file. Default: the file configured under 'input-data'.
+                 Bodies not listed in BODY_STYLES get a default radius and color, and their period
+                 is estimated by Kepler's third law with respect to the first body.
                  
     Returns:
     list: A list of CelestialBody objects representing the celestial bodies.
@@ -30,42 +74,20 @@ def create_celestial_bodies(which='inner'):
     day_SI = 3600 * 24  # One day [s]
     
     # Load data
-    path = resource_path(config['input-data'])
-    current_datetime, input_bodies = parse_data(path)
+    path = filename if filename is not None else resource_path(read_config()['input-data'])
+    current_datetime, catalog = load_catalog(path)
     current_date = current_datetime.date()
-    radii_px = [15, 3, 3, 5, 4, 12, 10, 9, 7, 2]  # radii in pixels
-    colors = (
-            (255, 223, 0),  # Sun: Bright yellow
-            (169, 169, 169),  # Mercury: Dark gray
-            (255, 204, 153),  # Venus: Pale yellowish-brown
-            (0, 102, 204),  # Earth: Blue (ocean) with hints of green (land)
-            (210, 105, 30),  # Mars: Reddish-brown
-            (255, 165, 0),  # Jupiter: Orange with bands
-            (194, 178, 128),  # Saturn: Pale gold with bands
-            (173, 216, 230),  # Uranus: Light blue
-            (0, 0, 139),  # Neptune: Deep blue
-            (169, 169, 169)  # Pluto: Light brown or gray
-    )
-    periods = ( 1,
-                87.97,
-                224.70,
-                365.25,
-                686.98,
-                4332.82,
-                10755.70,
-                30687.15,
-                60190.03,
-                90560
-                )
+
+    masses = catalog['mass'] / m0_SI
+    positions = catalog['position'] * 1e3 / AU_SI
+    velocities = catalog['velocity'] * 1e3 / AU_SI * day_SI
+    periods = kepler_periods(positions, velocities, positions[0], velocities[0], masses[0], G)
     
     celestial_bodies = []
-    for i, input_body in enumerate(input_bodies):
-        m = input_body['mass'] / m0_SI
-        position = np.array(input_body['position']) * 1e3 / AU_SI
-        velocity = np.array(input_body['velocity']) * 1e3 / AU_SI * day_SI
-        name = input_body['name']
-        celestial_bodies.append(CelestialBody(m, position, velocity,
-                                              name=name, radius_px=radii_px[i], color=colors[i], period=periods[i]))
+    for i, name in enumerate(catalog['name']):
+        radius_px, color, period = BODY_STYLES.get(name, (DEFAULT_RADIUS_PX, DEFAULT_COLOR, periods[i]))
+        celestial_bodies.append(CelestialBody(masses[i], positions[i], velocities[i],
+                                              name=str(name), radius_px=radius_px, color=color, period=period))
     
     if which == 'inner':
         celestial_bodies = [*celestial_bodies[:6]]  # until Jupiter, even though Jupiter is no inner planet
@@ -73,3 +95,43 @@ def create_celestial_bodies(which='inner'):
         celestial_bodies = [celestial_bodies[0], *celestial_bodies[5:]]  # from Jupiter outwards
     
     return celestial_bodies, current_date
+
+
+def create_asteroid_belt(num_particles, central_body, G, inner_radius=2.1, outer_radius=3.3,
+                         max_inclination=np.radians(10), seed=None):
+    """
+    This function creates a belt of massless particles on circular orbits around a central body.
+
+    Parameters:
+    num_particles (int): The number of particles.
+    central_body (CelestialBody): The body the particles orbit, e.g. the Sun.
+    G (float): The gravitational constant in the units of the simulation.
+    inner_radius (float, optional): The inner radius of the belt in A.U. (Default: 2.1).
+    outer_radius (float, optional): The outer radius of the belt in A.U. (Default: 3.3).
+    max_inclination (float, optional): The maximum orbital inclination in radians (Default: 10 degrees).
+    seed (int, optional): The seed of the random number generator (Default: None).
+
+    Returns:
+    MasslessParticles: The particles of the belt.
+    """
+    rng = np.random.default_rng(seed)
+    radius = rng.uniform(inner_radius, outer_radius, num_particles)
+    phase = rng.uniform(0, 2 * np.pi, num_particles)
+    inclination = rng.uniform(-max_inclination, max_inclination, num_particles)
+    node = rng.uniform(0, 2 * np.pi, num_particles)
+
+    # Circular orbits in the reference plane, then rotated by the inclination about the line of nodes
+    position_in_plane = np.stack((np.cos(phase), np.sin(phase), np.zeros(num_particles)), axis=1)
+    direction_in_plane = np.stack((-np.sin(phase), np.cos(phase), np.zeros(num_particles)), axis=1)
+    line_of_nodes = np.stack((np.cos(node), np.sin(node), np.zeros(num_particles)), axis=1)
+
+    def rotate(v):
+        # Rodrigues' rotation formula
+        cos_i, sin_i = np.cos(inclination)[:, np.newaxis], np.sin(inclination)[:, np.newaxis]
+        dot = np.sum(line_of_nodes * v, axis=1, keepdims=True)
+        return v * cos_i + np.cross(line_of_nodes, v) * sin_i + line_of_nodes * dot * (1 - cos_i)
+
+    speed = np.sqrt(G * central_body.mass / radius)[:, np.newaxis]
+    positions = central_body.position + rotate(position_in_plane) * radius[:, np.newaxis]
+    velocities = central_body.velocity + rotate(direction_in_plane) * speed
+    return MasslessParticles(positions, velocities)
@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .create_celestial_bodies import create_celestial_bodies, G
+from .lib_calculation import get_state, compute_ensemble_accelerations
+from .lib_integration import INTEGRATORS, get_integrator
+
+# An ensemble holds many copies (members) of the same system with different initial conditions.
+# Its state is an array of shape (num_members, num_bodies, 3) for the positions and the velocities each;
+# all members are advanced in lock-step with the same time step.
+
+
+def sample_initial_conditions(positions, velocities, num_members, position_sigma, velocity_sigma, seed=None,
+                              include_nominal=True):
+    """
+    Draws perturbed copies of the initial conditions, with independent normally distributed errors
+    of all coordinates.
+
+    Parameters:
+    positions (np.ndarray): The nominal positions in A.U., shape (num_bodies, 3).
+    velocities (np.ndarray): The nominal velocities in A.U./day, shape (num_bodies, 3).
+    num_members (int): The number of members.
+    position_sigma (float or np.ndarray): The standard deviation of the positions in A.U., a number or one per
+                                          body, shape (num_bodies,), or one per coordinate, shape (num_bodies, 3).
+    velocity_sigma (float or np.ndarray): The standard deviation of the velocities in A.U./day, likewise.
+    seed (int, optional): The seed of the random numbers. Default: None (not reproducible).
+    include_nominal (bool, optional): Whether the first member is the unperturbed system. Default: True.
+
+    Returns:
+    tuple: The positions and velocities of the members, of shape (num_members, num_bodies, 3) each.
+    """
+    positions, velocities = np.asarray(positions, dtype=float), np.asarray(velocities, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    def sigma(value):
+        value = np.asarray(value, dtype=float)
+        return value[:, np.newaxis] if value.ndim == 1 else value
+
+    member_positions = positions + rng.normal(size=(num_members, *positions.shape)) * sigma(position_sigma)
+    member_velocities = velocities + rng.normal(size=(num_members, *velocities.shape)) * sigma(velocity_sigma)
+    if include_nominal and num_members > 0:
+        member_positions[0], member_velocities[0] = positions, velocities
+    return member_positions, member_velocities
+
+
+def spread_statistics(positions, center=0):
+    """
+    Measures how far the members of an ensemble are apart, per body, as the distances of the positions
+    relative to the center body from their ensemble mean.
+
+    Parameters:
+    positions (np.ndarray): The positions of the members, shape (num_members, num_bodies, 3).
+    center (int, optional): The index of the body the positions are taken relative to. Default: 0 (the Sun).
+
+    Returns:
+    dict: The root mean square ('rms'), 95th percentile ('p95') and maximum ('max') distance in A.U.,
+          arrays of shape (num_bodies,).
+    """
+    relative_positions = positions - positions[:, center:center + 1]
+    distances = np.linalg.norm(relative_positions - relative_positions.mean(axis=0), axis=2)
+    return {
+        'rms': np.sqrt(np.mean(distances**2, axis=0)),
+        'p95': np.percentile(distances, 95, axis=0),
+        'max': distances.max(axis=0),
+    }
+
+
+def advance_ensemble(positions, velocities, masses, t_step, num_steps, integrator='leapfrog'):
+    """
+    Advances all members of an ensemble by a number of time steps with one batched kernel.
+
+    Parameters:
+    positions (np.ndarray): The positions of the members, shape (num_members, num_bodies, 3).
+    velocities (np.ndarray): The velocities of the members, shape (num_members, num_bodies, 3).
+    masses (np.ndarray): The masses of the bodies, shape (num_bodies,).
+    t_step (float): The time step in days.
+    num_steps (int): The number of steps.
+    integrator (str, optional): The time integrator, see lib_integration.INTEGRATORS. Default: 'leapfrog'.
+
+    Returns:
+    tuple: The positions and velocities after the steps.
+    """
+    integrate = get_integrator(integrator)
+    for _ in range(num_steps):
+        positions, velocities = integrate(positions, velocities, t_step,
+                                          lambda x: compute_ensemble_accelerations(x, masses, G))
+    return positions, velocities
+
+
+def run_ensemble(num_members, days, which='all', filename=None, t_step=1, integrator='leapfrog',
+                 position_sigma=1e-8, velocity_sigma=1e-10, seed=0, report_every=365, num_workers=1, progress=None):
+    """
+    Simulates an ensemble of perturbed initial conditions of the input data, see sample_initial_conditions,
+    and measures the spread of the members at regular intervals. The members are split across worker
+    processes, which advance their share in lock-step from one report to the next.
+
+    Parameters:
+    num_members (int): The number of members, including the unperturbed system.
+    days (float): The simulated time span in days; negative values integrate backwards.
+    which (str, optional): 'all', 'inner' or 'outer', see create_celestial_bodies. Default: 'all'.
+    filename (str, optional): The input data file. Default: the configured input data.
+    t_step (float, optional): The maximum time step in days. Default: 1.
+    integrator (str, optional): The time integrator. Default: 'leapfrog'.
+    position_sigma (float or np.ndarray, optional): The uncertainty of the positions in A.U. Default: 1e-8.
+    velocity_sigma (float or np.ndarray, optional): The uncertainty of the velocities in A.U./day. Default: 1e-10.
+    seed (int, optional): The seed of the perturbations. Default: 0.
+    report_every (float, optional): The time between two measurements of the spread in days. Default: 365.
+    num_workers (int, optional): The number of worker processes; 1 runs in the calling process, None uses
+                                 all CPUs. Default: 1.
+    progress (callable, optional): Called after every measurement with the simulated days and the statistics,
+                                   see spread_statistics. Default: None.
+
+    Returns:
+    dict: The 'names' of the bodies, the start 'date', the 'days' of the measurements (starting with 0), the
+          statistics 'rms', 'p95' and 'max' of shape (num_measurements, num_bodies), and the final 'positions'
+          and 'velocities' of the members.
+    """
+    bodies, date = create_celestial_bodies(which, filename=filename)
+    positions, velocities, masses = get_state(bodies)
+    positions, velocities = sample_initial_conditions(positions, velocities, num_members, position_sigma,
+                                                      velocity_sigma, seed=seed)
+    num_steps = int(np.ceil(abs(days) / t_step))
+    step = days / num_steps if num_steps > 0 else 0
+    steps_per_report = max(1, int(round(report_every / abs(step)))) if num_steps > 0 else 1
+    num_workers = min(num_workers or os.cpu_count() or 1, num_members)
+
+    results = {'names': [body.name for body in bodies], 'date': date.isoformat(), 'days': [],
+               'rms': [], 'p95': [], 'max': []}
+
+    def measure(days_done):
+        statistics = spread_statistics(positions)
+        results['days'].append(days_done)
+        for name, values in statistics.items():
+            results[name].append(values)
+        if progress is not None:
+            progress(days_done, statistics)
+
+    executor = ProcessPoolExecutor(num_workers) if num_workers > 1 else None
+    try:
+        measure(0)
+        for first_step in range(0, num_steps, steps_per_report):
+            batch = min(steps_per_report, num_steps - first_step)
+            if executor is None:
+                positions, velocities = advance_ensemble(positions, velocities, masses, step, batch, integrator)
+            else:
+                shares = zip(np.array_split(positions, num_workers), np.array_split(velocities, num_workers))
+                futures = [executor.submit(advance_ensemble, share_positions, share_velocities, masses, step, batch,
+                                           integrator) for share_positions, share_velocities in shares]
+                shares = [future.result() for future in futures]
+                positions = np.concatenate([share[0] for share in shares])
+                velocities = np.concatenate([share[1] for share in shares])
+            measure((first_step + batch) * step)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for name in ('rms', 'p95', 'max'):
+        results[name] = np.array(results[name])
+    results['positions'], results['velocities'] = positions, velocities
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate an ensemble of perturbed initial conditions and report "
+                                                 "how far the members spread over time.")
+    parser.add_argument('--data', default=None, help="input data file (default: the configured planet data)")
+    parser.add_argument('--bodies', default='all', choices=['inner', 'outer', 'all'], help="subset of bodies")
+    parser.add_argument('--members', type=int, default=1000, help="number of members (default: 1000)")
+    parser.add_argument('--years', type=float, required=True, help="simulated time span in years")
+    parser.add_argument('--step', type=float, default=1, help="maximum time step in days (default: 1)")
+    parser.add_argument('--integrator', default='leapfrog', choices=list(INTEGRATORS),
+                        help="time integrator (default: leapfrog)")
+    parser.add_argument('--position-sigma', type=float, default=1e-8,
+                        help="uncertainty of the positions in A.U. (default: 1e-8)")
+    parser.add_argument('--velocity-sigma', type=float, default=1e-10,
+                        help="uncertainty of the velocities in A.U./day (default: 1e-10)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the perturbations (default: 0)")
+    parser.add_argument('--report-every', type=float, default=365, help="days between reports (default: 365)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument('--output', default=None, help="JSON file for the statistics (default: none)")
+    parser.add_argument('--quiet', action='store_true', help="do not report the spread while running")
+    args = parser.parse_args(argv)
+    if args.members < 1 or args.step <= 0 or args.report_every <= 0:
+        parser.error("--members must be at least 1, --step and --report-every positive")
+
+    names = [body.name for body in create_celestial_bodies(args.bodies, filename=args.data)[0]]
+
+    def report(days, statistics):
+        print(f"{days:10.0f}  " + '  '.join(f"{value:9.2e}" for value in statistics['rms'][1:]), file=sys.stderr,
+              flush=True)
+
+    if not args.quiet:
+        print(f"{'days':>10s}  " + '  '.join(f"{name[:9]:>9s}" for name in names[1:]) + "   (rms spread in A.U.)",
+              file=sys.stderr)
+    results = run_ensemble(args.members, args.years * 365.25, which=args.bodies, filename=args.data,
+                           t_step=args.step, integrator=args.integrator, position_sigma=args.position_sigma,
+                           velocity_sigma=args.velocity_sigma, seed=args.seed, report_every=args.report_every,
+                           num_workers=args.workers, progress=None if args.quiet else report)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({key: results[key].tolist() if isinstance(results[key], np.ndarray) else results[key]
+                       for key in ('names', 'date', 'days', 'rms', 'p95', 'max')}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
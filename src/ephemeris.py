@@ -0,0 +1,244 @@
+import argparse
+import sys
+import numpy as np
+from .create_celestial_bodies import G
+from .lib_backend import get_backend
+from .lib_integration import INTEGRATORS
+from .simulation import Simulation
+from .trajectory import Trajectory, hermite_interpolate
+
+# Apparent directions of all bodies as seen from one of them (the observer), for many times at once.
+# The input data (NASA Horizons vectors) are given in the ecliptic frame of J2000; right ascension and
+# declination refer to the equator of J2000, which is tilted against the ecliptic by the obliquity.
+# Angles are in degrees, distances in A.U.
+
+SPEED_OF_LIGHT = 173.1446326846693  # A.U./day
+OBLIQUITY = 23.439291111  # obliquity of the ecliptic at J2000 in degrees
+
+COLUMNS = ('ra', 'dec', 'distance', 'elongation')
+
+
+def ecliptic_to_equatorial(vectors, obliquity=OBLIQUITY):
+    """
+    Rotates vectors from the ecliptic to the equatorial frame, about their common x axis (the equinox).
+
+    Parameters:
+    vectors (np.ndarray): The vectors in the ecliptic frame, shape (..., 3).
+    obliquity (float, optional): The tilt of the equator against the ecliptic in degrees. Default: OBLIQUITY.
+
+    Returns:
+    np.ndarray: The vectors in the equatorial frame.
+    """
+    cos_e, sin_e = np.cos(np.radians(obliquity)), np.sin(np.radians(obliquity))
+    x, y, z = vectors[..., 0], vectors[..., 1], vectors[..., 2]
+    return np.stack((x, cos_e * y - sin_e * z, sin_e * y + cos_e * z), axis=-1)
+
+
+def sky_coordinates(positions, velocities, observer, center=0, light_time=True, obliquity=OBLIQUITY):
+    """
+    Computes the apparent directions and distances of all bodies as seen from the observer body.
+
+    With light_time, each body is seen where it was when the light left it, i.e. the light travel time
+    earlier. The positions back then are extrapolated linearly with the velocities, which is accurate
+    to well below a kilometer for the light travel times within the solar system.
+
+    Parameters:
+    positions (np.ndarray): The positions of the bodies in A.U., shape (num_times, num_bodies, 3).
+    velocities (np.ndarray): The velocities of the bodies in A.U./day, of the same shape.
+    observer (int): The index of the observer body.
+    center (int, optional): The index of the body the elongation is measured from. Default: 0 (the Sun).
+    light_time (bool, optional): Whether to correct for the light travel time. Default: True.
+    obliquity (float, optional): See ecliptic_to_equatorial. Default: OBLIQUITY.
+
+    Returns:
+    dict: Arrays of shape (num_times, num_bodies): the right ascension 'ra' in [0, 360), the declination 'dec',
+          the 'distance' and the 'elongation' (angle between the body and the center body). All are NaN for the
+          observer itself, and the elongation is NaN for the center body.
+    """
+    positions, velocities = np.asarray(positions, dtype=float), np.asarray(velocities, dtype=float)
+    relative = positions - positions[:, observer:observer + 1]
+    distance = np.sqrt(np.einsum('tnk,tnk->tn', relative, relative))
+    if light_time:
+        # Two iterations of the light travel time, the second one from the corrected position
+        for _ in range(2):
+            relative = positions - (distance / SPEED_OF_LIGHT)[..., np.newaxis] * velocities \
+                - positions[:, observer:observer + 1]
+            distance = np.sqrt(np.einsum('tnk,tnk->tn', relative, relative))
+    distance[:, observer] = np.nan
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        directions = relative / distance[..., np.newaxis]
+        equatorial = ecliptic_to_equatorial(directions, obliquity)
+        ra = np.degrees(np.arctan2(equatorial[..., 1], equatorial[..., 0])) % 360
+        dec = np.degrees(np.arcsin(np.clip(equatorial[..., 2], -1, 1)))
+        cos_elongation = np.einsum('tnk,tk->tn', directions, directions[:, center])
+        elongation = np.degrees(np.arccos(np.clip(cos_elongation, -1, 1)))
+    elongation[:, center] = np.nan
+    return {'ra': ra, 'dec': dec, 'distance': distance, 'elongation': elongation}
+
+
+def body_index(names, name):
+    """
+    Returns:
+    int: The index of the body with the given name (case-insensitive).
+
+    Raises:
+    ValueError: If there is no such body.
+    """
+    lower = [candidate.lower() for candidate in names]
+    if name.lower() not in lower:
+        raise ValueError(f"Unknown body '{name}'. Expected one of {list(names)}.")
+    return lower.index(name.lower())
+
+
+def iter_trajectory_ephemeris(trajectory, observer='Earth', step=None, start=None, stop=None, chunk_size=4096,
+                              light_time=True):
+    """
+    Generates the sky coordinates of all bodies of a precomputed trajectory, chunk by chunk, see sky_coordinates.
+
+    Parameters:
+    trajectory (Trajectory): The trajectory.
+    observer (str, optional): The name of the observer body. Default: 'Earth'.
+    step (float, optional): The spacing of the times in days, which are interpolated between the samples of the
+                            trajectory, see Trajectory.interpolate. Default: None (the samples of the trajectory).
+    start (float, optional): The first time in days since the start date. Default: the first sample.
+    stop (float, optional): The last time in days since the start date. Default: the last sample.
+    chunk_size (int, optional): The number of times per chunk. Default: 4096.
+    light_time (bool, optional): Whether to correct for the light travel time. Default: True.
+
+    Yields:
+    dict: The times 'days' since the start date of the trajectory, shape (chunk,), and the sky coordinates.
+    """
+    observer = body_index(trajectory.names, observer)
+    if step is None:
+        first = 0 if start is None else int(np.searchsorted(trajectory.times, start))
+        last = len(trajectory) if stop is None else int(np.searchsorted(trajectory.times, stop, side='right'))
+        for chunk_start in range(first, last, chunk_size):
+            chunk = slice(chunk_start, min(chunk_start + chunk_size, last))
+            yield {'days': np.array(trajectory.times[chunk]),
+                   **sky_coordinates(trajectory.positions[chunk], trajectory.velocities[chunk], observer,
+                                     light_time=light_time)}
+        return
+
+    start = float(trajectory.times[0]) if start is None else start
+    stop = float(trajectory.times[-1]) if stop is None else stop
+    step = np.copysign(step, stop - start)
+    num_times = int(np.floor((stop - start) / step + 1e-9)) + 1
+    for chunk_start in range(0, num_times, chunk_size):
+        days = start + np.arange(chunk_start, min(chunk_start + chunk_size, num_times)) * step
+        yield {'days': days, **sky_coordinates(*trajectory.interpolate(days), observer, light_time=light_time)}
+
+
+def iter_simulation_ephemeris(simulation, days, observer='Earth', step=1 / 24, chunk_size=4096, light_time=True):
+    """
+    Generates the sky coordinates of the celestial bodies of a simulation, chunk by chunk, see sky_coordinates.
+    The system is integrated from the current state with the settings of the simulation (time step, integrator,
+    solver, backend), and the times in between the integration steps are interpolated, see hermite_interpolate.
+    The simulation itself is not advanced.
+
+    Parameters:
+    simulation (Simulation): The simulation.
+    days (float): The time span in days; negative values go backwards.
+    observer (str, optional): The name of the observer body. Default: 'Earth'.
+    step (float, optional): The spacing of the times in days. Default: 1/24 (hourly).
+    chunk_size (int, optional): The number of times per chunk. Default: 4096.
+    light_time (bool, optional): Whether to correct for the light travel time. Default: True.
+
+    Yields:
+    dict: The times 'days' since the current date of the simulation, shape (chunk,), and the sky coordinates.
+    """
+    observer = body_index([body.name for body in simulation.bodies], observer)
+    positions, velocities, masses = simulation.massive_state()
+    advance = get_backend(simulation.backend, simulation.integrator, simulation.solver)
+    num_substeps = int(np.ceil(simulation.t_step / simulation.max_step)) if simulation.max_step else 1
+    node_step = np.copysign(simulation.t_step, days)
+    step = np.copysign(step, days)
+    num_times = int(np.floor(days / step + 1e-9)) + 1
+
+    # The integration steps (nodes) the chunk is interpolated between, starting with the current state
+    node_days, node_positions, node_velocities = [0.0], [positions], [velocities]
+    for chunk_start in range(0, num_times, chunk_size):
+        sample_days = np.arange(chunk_start, min(chunk_start + chunk_size, num_times)) * step
+        while abs(node_days[-1]) < abs(sample_days[-1]):
+            positions, velocities = advance(positions, velocities, masses, G, node_step / num_substeps, num_substeps,
+                                            simulation.integrator, simulation.solver)
+            node_days.append(node_days[-1] + node_step)
+            node_positions.append(positions)
+            node_velocities.append(velocities)
+        yield {'days': sample_days,
+               **sky_coordinates(*hermite_interpolate(np.array(node_days), np.array(node_positions),
+                                                      np.array(node_velocities), sample_days),
+                                 observer, light_time=light_time)}
+        # Only the last node before the next chunk is needed from here on
+        del node_days[:-1], node_positions[:-1], node_velocities[:-1]
+
+
+def write_ephemeris(f, chunks, names, start_date, observer):
+    """
+    Writes chunks of sky coordinates as they are generated to a text file, one line per time: the days since
+    the start date, then right ascension, declination, distance and elongation of each body.
+
+    Parameters:
+    f (file): The open output file.
+    chunks (iterable): The chunks, see iter_trajectory_ephemeris or iter_simulation_ephemeris.
+    names (list): The names of the bodies.
+    start_date (datetime.date): The date at time 0.
+    observer (str): The name of the observer body, for the header.
+
+    Returns:
+    int: The number of lines (times) written.
+    """
+    columns = ['days'] + [f"{name}_{column}" for name in names for column in COLUMNS]
+    f.write(f"# Seen from {observer} since {start_date.isoformat()}; degrees (J2000 equator) and A.U.\n")
+    f.write(','.join(columns) + '\n')
+    num_lines = 0
+    for chunk in chunks:
+        table = np.column_stack([chunk['days']] + [np.stack([chunk[column] for column in COLUMNS], axis=-1)
+                                                   .reshape(len(chunk['days']), -1)])
+        np.savetxt(f, table, fmt='%.10g', delimiter=',')
+        num_lines += len(table)
+    return num_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute right ascension, declination, distance and elongation of "
+                                                 "all bodies as seen from one of them, from a simulation or a "
+                                                 "trajectory written by simulate.py.")
+    parser.add_argument('--trajectory', default=None, help="trajectory directory (default: simulate instead)")
+    parser.add_argument('--data', default=None, help="input data file (default: the configured planet data)")
+    parser.add_argument('--bodies', default='all', choices=['inner', 'outer', 'all'], help="subset of bodies")
+    parser.add_argument('--years', type=float, default=1, help="simulated time span in years (default: 1)")
+    parser.add_argument('--step', type=float, default=1 / 4, help="integration time step in days (default: 0.25)")
+    parser.add_argument('--integrator', default='yoshida4', choices=list(INTEGRATORS),
+                        help="time integrator (default: yoshida4)")
+    parser.add_argument('--observer', default='Earth', help="the observing body (default: Earth)")
+    parser.add_argument('--every', type=float, default=1,
+                        help="hours between two lines (default: 1); with --trajectory, 0 uses its samples")
+    parser.add_argument('--no-light-time', action='store_true', help="do not correct for the light travel time")
+    parser.add_argument('--output', required=True, help="output CSV file, '-' for the standard output")
+    args = parser.parse_args(argv)
+    if args.step <= 0 or args.every < 0:
+        parser.error("--step must be positive and --every not negative")
+
+    options = {'observer': args.observer, 'light_time': not args.no_light_time}
+    if args.trajectory is not None:
+        trajectory = Trajectory(args.trajectory)
+        names, start_date = trajectory.names, trajectory.start_date
+        chunks = iter_trajectory_ephemeris(trajectory, step=args.every / 24 if args.every else None, **options)
+    else:
+        simulation = Simulation(args.bodies, filename=args.data, t_step=args.step, integrator=args.integrator)
+        names, start_date = [body.name for body in simulation.bodies], simulation.current_date
+        chunks = iter_simulation_ephemeris(simulation, args.years * 365.25, step=(args.every or 1) / 24, **options)
+    body_index(names, args.observer)  # fails early for unknown observers
+
+    f = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        num_lines = write_ephemeris(f, chunks, names, start_date, args.observer)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    print(f"{num_lines} times of {len(names)} bodies written.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import datetime
+import os
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .create_celestial_bodies import BODY_STYLES, DEFAULT_COLOR, DEFAULT_RADIUS_PX, kepler_periods, G
+from .lib_plotting import generate_perpendicular_vectors, projection_matrix, view_transform, project_to_view, \
+    decimation_stride
+from .lib_raster import new_image, draw_disk, draw_polyline, draw_text, encode_png
+from .playback import TrajectoryPlayer
+from .trajectory import Trajectory
+
+# Renders the scene of the application (bodies, names, tails and date, see main.refresh_plot) from a trajectory
+# into images, without display or GPU, and exports them as a PNG sequence or a stream of raw RGB frames
+# (e.g. for ffmpeg). The defaults are those of the application.
+
+
+class SceneRenderer:
+    def __init__(self, trajectory, width=1920, height=1080, field_of_view=12, normal_vector=(0, 1, 2 / 3),
+                 rel_tail_length=2 / 3, tail_tolerance=0.5, spacing=1, background=(0, 0, 0), text_scale=2):
+        """
+        Draws the bodies of a trajectory at any time, each frame independently of the others.
+
+        Parameters:
+        trajectory (Trajectory or str): The trajectory or its directory, see simulate.py.
+        width, height (int, optional): The size of the images in pixels. Default: 1920 x 1080.
+        field_of_view (float, optional): The size of the field of view in A.U. Default: 12.
+        normal_vector (tuple, optional): The normal vector of the projection plane. Default: (0, 1, 2/3).
+        rel_tail_length (float, optional): The length of the tails in orbital periods. Default: 2/3.
+        tail_tolerance (float, optional): The admissible deviation of the tails from the paths in pixels. Default: 0.5.
+        spacing (float, optional): The spacing of the samples of the tails in days. Default: 1.
+        background (tuple, optional): The RGB background color. Default: black.
+        text_scale (int, optional): The size of a font pixel in pixels, see lib_raster.draw_text. Default: 2.
+        """
+        self.player = TrajectoryPlayer(trajectory, spacing=spacing)
+        trajectory = self.player.trajectory
+        self.width, self.height = width, height
+        self.background = background
+        self.text_scale = text_scale
+        self.projection = projection_matrix(*generate_perpendicular_vectors(np.asarray(normal_vector, dtype=float)))
+        self.scale, self.offset = view_transform(types.SimpleNamespace(width=width, height=height), 0, field_of_view)
+
+        # The styles of create_celestial_bodies, with the periods of unknown bodies from their first state
+        periods = kepler_periods(trajectory.positions[0], trajectory.velocities[0], trajectory.positions[0, 0],
+                                 trajectory.velocities[0, 0], trajectory.masses[0], G)
+        self.styles = [BODY_STYLES.get(name, (DEFAULT_RADIUS_PX, DEFAULT_COLOR, periods[i]))
+                       for i, name in enumerate(trajectory.names)]
+        self.tail_lengths = [max(int(np.ceil(rel_tail_length * period / spacing)), 1) for _, _, period in self.styles]
+
+        # The tails are decimated with one stride per body for all frames, chosen from the paths along the first
+        # tails, so that the frames do not depend on each other and the tails do not flicker
+        player = self.player
+        num_samples = min(max(self.tail_lengths), int(np.floor((player.last - player.first) / spacing + 1e-9)) + 1)
+        first_tails = player.history(player.first + np.arange(num_samples) * spacing)
+        view = (self.projection, self.scale, self.offset)
+        self.strides = [decimation_stride(project_to_view(first_tails[:length, i], *view), tail_tolerance,
+                                          max_stride=length) for i, length in enumerate(self.tail_lengths)]
+
+    def render(self, days):
+        """
+        Draws the scene at a time.
+
+        Parameters:
+        days (float): The time in days since the start date of the trajectory.
+
+        Returns:
+        np.ndarray: The image, shape (height, width, 3), dtype uint8.
+        """
+        player = self.player
+        player.seek(days)
+        view = (self.projection, self.scale, self.offset)
+        positions = player.state()[0]
+        body_points = project_to_view(positions - positions[player.center], *view)
+        # The newest sample of the tails on the grid of TrajectoryPlayer.history_times
+        newest = int(np.floor((player.days - player.first) / player.spacing + 1e-9))
+
+        image = new_image(self.width, self.height, self.background)
+        for i, (_, color, _) in enumerate(self.styles):
+            # Only the selected samples are interpolated: every stride-th on the grid, and the newest
+            stride = self.strides[i]
+            oldest = max(newest - self.tail_lengths[i] + 1, 0)
+            numbers = np.append(np.arange(-(-oldest // stride) * stride, newest, stride), newest)
+            if len(numbers) < 2:
+                continue
+            samples = player.history(player.first + numbers * player.spacing)[:, i]
+            draw_polyline(image, project_to_view(samples, *view), color, thickness=2)
+        for (radius_px, color, _), name, (x, y) in zip(self.styles, player.trajectory.names, body_points):
+            draw_disk(image, x, y, radius_px, color)
+            draw_text(image, name, x, y + radius_px + 2, scale=self.text_scale, anchor_x='center')
+        draw_text(image, "Date: " + player.date.strftime("%d %B, %Y"), 10, self.height - 20, scale=self.text_scale,
+                  anchor_y='top')
+        return image
+
+
+def frame_times(trajectory, days_per_frame=1, start=None, stop=None):
+    """
+    Returns:
+    np.ndarray: The times of the frames in days since the start date of the trajectory, from start (default: the
+                first sample) to stop (default: the last sample) by days_per_frame (negative: backwards).
+    """
+    first, last = sorted((float(trajectory.times[0]), float(trajectory.times[-1])))
+    start = (first if days_per_frame > 0 else last) if start is None else start
+    stop = (last if days_per_frame > 0 else first) if stop is None else stop
+    num_frames = max(int(np.floor((stop - start) / days_per_frame + 1e-9)) + 1, 0)
+    return start + np.arange(num_frames) * days_per_frame
+
+
+# The renderer of each worker process, see _start_worker
+_renderer = None
+
+
+def _start_worker(trajectory_directory, options):
+    global _renderer
+    _renderer = SceneRenderer(trajectory_directory, **options)
+
+
+def _render_chunk(first_frame, times, directory, compression):
+    # Renders frames with the renderer of the worker: to PNG files in the directory, or else returned as raw bytes
+    if directory is None:
+        return b''.join(_renderer.render(days).tobytes() for days in times)
+    for frame, days in enumerate(times, start=first_frame):
+        with open(os.path.join(directory, f"frame_{frame:06d}.png"), 'wb') as f:
+            f.write(encode_png(_renderer.render(days), compression))
+    return len(times)
+
+
+def export_frames(trajectory_directory, output, times, num_workers=None, chunk_size=8, compression=1, progress=None,
+                  **options):
+    """
+    Renders frames in parallel and writes them in order, while only a few chunks of frames are in memory.
+
+    Parameters:
+    trajectory_directory (str): The trajectory directory. Each worker process opens it (memory-mapped).
+    output (str or file): A directory for a PNG sequence (frame_000000.png, ...), created if necessary, or a
+                          binary file to which the frames are written as raw RGB (rgb24), row by row from the top.
+    times (np.ndarray): The times of the frames in days since the start date, see frame_times.
+    num_workers (int, optional): The number of worker processes; 1 renders in the calling process, None uses
+                                 all CPUs. Default: None.
+    chunk_size (int, optional): The number of frames per task of a worker. Default: 8.
+    compression (int, optional): The zlib compression level of the PNG files. Default: 1.
+    progress (callable, optional): Called with the number of frames written so far. Default: None.
+    options: The options of SceneRenderer.
+
+    Returns:
+    int: The number of frames written.
+    """
+    directory = output if isinstance(output, str) else None
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    chunks = [(first, times[first:first + chunk_size], directory, compression)
+              for first in range(0, len(times), chunk_size)]
+    num_workers = max(min(num_workers or os.cpu_count() or 1, len(chunks)), 1)
+
+    def write(result, num_written):
+        if directory is None:
+            output.write(result)
+        if progress is not None:
+            progress(num_written)
+
+    num_written = 0
+    if num_workers == 1:
+        _start_worker(trajectory_directory, options)
+        for chunk in chunks:
+            result = _render_chunk(*chunk)
+            num_written += len(chunk[1])
+            write(result, num_written)
+        return num_written
+
+    with ProcessPoolExecutor(num_workers, initializer=_start_worker,
+                             initargs=(trajectory_directory, options)) as executor:
+        # At most two chunks per worker are in flight, and the results are taken in order
+        pending = []
+        for chunk in chunks:
+            pending.append((len(chunk[1]), executor.submit(_render_chunk, *chunk)))
+            if len(pending) >= 2 * num_workers:
+                num_frames, future = pending.pop(0)
+                num_written += num_frames
+                write(future.result(), num_written)
+        for num_frames, future in pending:
+            num_written += num_frames
+            write(future.result(), num_written)
+    return num_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the animation of a trajectory written by simulate.py "
+                                                 "into frames, without display, in parallel.")
+    parser.add_argument('--trajectory', required=True, help="trajectory directory")
+    parser.add_argument('--output', required=True,
+                        help="directory for a PNG sequence, or '-' for raw RGB frames on the standard output")
+    parser.add_argument('--width', type=int, default=1920, help="frame width in pixels (default: 1920)")
+    parser.add_argument('--height', type=int, default=1080, help="frame height in pixels (default: 1080)")
+    parser.add_argument('--fov', type=float, default=12, help="field of view in A.U. (default: 12)")
+    parser.add_argument('--days-per-frame', type=float, default=1,
+                        help="simulated days per frame, negative: backwards (default: 1)")
+    parser.add_argument('--start', type=datetime.date.fromisoformat, default=None,
+                        help="date of the first frame, YYYY-MM-DD (default: start of the trajectory)")
+    parser.add_argument('--end', type=datetime.date.fromisoformat, default=None,
+                        help="date of the last frame, YYYY-MM-DD (default: end of the trajectory)")
+    parser.add_argument('--fps', type=float, default=60, help="frame rate, for the ffmpeg command shown (default: 60)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument('--quiet', action='store_true', help="do not report the progress")
+    args = parser.parse_args(argv)
+    if args.width <= 0 or args.height <= 0 or args.fov <= 0 or args.days_per_frame == 0:
+        parser.error("--width, --height and --fov must be positive, --days-per-frame not zero")
+
+    renderer_options = {'width': args.width, 'height': args.height, 'field_of_view': args.fov}
+    trajectory = Trajectory(args.trajectory)
+    start, end = ((date - trajectory.start_date).days if date is not None else None for date in (args.start, args.end))
+    times = frame_times(trajectory, args.days_per_frame, start, end)
+
+    def report(num_written):
+        print(f"\r{num_written}/{len(times)} frames", end='', file=sys.stderr, flush=True)
+
+    output = sys.stdout.buffer if args.output == '-' else args.output
+    num_written = export_frames(args.trajectory, output, times, num_workers=args.workers,
+                                progress=None if args.quiet else report, **renderer_options)
+    if not args.quiet:
+        size = f"{args.width}x{args.height}"
+        source = f"-f rawvideo -pix_fmt rgb24 -s {size} -r {args.fps:g} -i -" if args.output == '-' \
+            else f"-r {args.fps:g} -i {os.path.join(args.output, 'frame_%06d.png')}"
+        print(f"\n{num_written} frames written. Encode them e.g. with: ffmpeg {source} -pix_fmt yuv420p video.mp4",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
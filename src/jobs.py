@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+
+class JumpJob:
+    def __init__(self, target_date):
+        """
+        A date jump running in the background, as returned by JumpScheduler.submit.
+
+        Parameters:
+        target_date (datetime.date): The date to which the computation is performed.
+        """
+        self.target_date = target_date
+        self.progress = 0  # fraction of completed days, updated while running
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Cancels the job. A running computation stops at its next time step.
+        """
+        self._cancel_event.set()
+        self.future.cancel()
+
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """
+        Waits for the job.
+
+        Parameters:
+        timeout (float, optional): The maximum time to wait in seconds. Default: None (no limit).
+
+        Returns:
+        Simulation: The private copy of the simulation, advanced to the target date.
+
+        Raises:
+        concurrent.futures.CancelledError: If the job was cancelled.
+        """
+        if self.cancelled():
+            raise CancelledError()
+        return self.future.result(timeout)
+
+
+class JumpScheduler:
+    def __init__(self, progress_interval=0.05):
+        """
+        Runs date jumps one at a time in a background thread. Each job integrates a private copy of the
+        simulation, so that the caller can keep using (and drawing) the original until it swaps in the
+        result. Submitting a new jump cancels the current one.
+
+        Parameters:
+        progress_interval (float, optional): The minimum time between two progress reports in seconds.
+                                             Default: 0.05.
+        """
+        self.progress_interval = progress_interval
+        self.current = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jump')
+
+    def submit(self, simulation, target_date, integrator=None, t_step=None, progress=None, tolerance=None):
+        """
+        Starts a jump of a copy of the simulation to the target date, superseding the current job.
+
+        Parameters:
+        simulation (Simulation): The simulation. It is copied right away and not changed by the job.
+        target_date (datetime.date): The date to which the computation is performed.
+        integrator (str, optional): The time integration scheme. Default: the integrator of the simulation.
+        t_step (float, optional): The maximum time step in days. Default: the time step of the simulation.
+        progress (callable, optional): Called from the background thread with the fraction of completed days,
+                                       at most once per progress_interval, and with 1 on completion. Default: None.
+        tolerance (float, optional): The admissible relative energy drift, see Simulation.jump_to. Default: None.
+
+        Returns:
+        JumpJob: The job.
+        """
+        self.cancel()
+        job = JumpJob(target_date)
+        private_simulation = simulation.copy()
+        job.future = self._executor.submit(self._run, job, private_simulation, integrator, t_step, progress, tolerance)
+        self.current = job
+        return job
+
+    def _run(self, job, simulation, integrator, t_step, progress, tolerance):
+        last_report = time.perf_counter()
+
+        def report(fraction):
+            nonlocal last_report
+            if job.cancelled():
+                raise CancelledError()
+            job.progress = fraction
+            if progress is not None and time.perf_counter() - last_report >= self.progress_interval:
+                last_report = time.perf_counter()
+                progress(fraction)
+
+        simulation.jump_to(job.target_date, integrator=integrator, t_step=t_step, progress=report, tolerance=tolerance)
+        job.progress = 1
+        if progress is not None:
+            progress(1)
+        return simulation
+
+    def cancel(self):
+        """
+        Cancels the current job, if any.
+        """
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def shutdown(self):
+        """
+        Cancels the current job and waits for the background thread to finish.
+        """
+        self.cancel()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,154 @@
+import numpy as np
+from .lib_calculation import get_solver, compute_particle_accelerations
+from .lib_integration import get_integrator, _YOSHIDA_W0, _YOSHIDA_W1
+
+try:
+    import numba  # optional: compiles the loop of the 'numba' backend
+except ImportError:
+    numba = None
+
+# All backends share the signature
+#     advance(positions, velocities, masses, G, t_step, num_steps, integrator, solver) -> (positions, velocities)
+# where the first len(masses) rows of positions and velocities are the massive bodies, and the remaining rows
+# massless particles, which only feel the massive bodies. The arrays passed in are never modified.
+
+# Compiled integrators as drift-kick sequences: drift by drifts[0] * t_step, kick by kicks[0] * t_step,
+# drift by drifts[1] * t_step, ..., ending with a drift. The same schemes as in lib_integration.
+COMPILED_INTEGRATORS = {
+    'euler': ((0, 1), (1,)),
+    'leapfrog': ((1 / 2, 1 / 2), (1,)),
+    'yoshida4': ((_YOSHIDA_W1 / 2, (_YOSHIDA_W1 + _YOSHIDA_W0) / 2, (_YOSHIDA_W0 + _YOSHIDA_W1) / 2, _YOSHIDA_W1 / 2),
+                 (_YOSHIDA_W1, _YOSHIDA_W0, _YOSHIDA_W1)),
+}
+
+
+def advance_numpy(positions, velocities, masses, G, t_step, num_steps, integrator='euler', solver='exact'):
+    """
+    Advance bodies and particles by a number of time steps with the integrators and solvers of lib_integration
+    and lib_calculation. Works on arrays throughout, without CelestialBody objects between the steps.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies + num_particles, 3), the massive bodies first.
+    velocities (np.ndarray): An array of the same shape with the velocities.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the massive bodies.
+    G (float): The gravitational constant.
+    t_step (float): The time step.
+    num_steps (int): The number of steps.
+    integrator (str or callable, optional): The time integrator, see lib_integration.get_integrator. Default: 'euler'.
+    solver (str or callable, optional): The acceleration solver, see lib_calculation.get_solver. Default: 'exact'.
+
+    Returns:
+    tuple: The positions and velocities after the steps.
+    """
+    solve, integrate = get_solver(solver), get_integrator(integrator)
+    masses = np.asarray(masses, dtype=float)
+    num_bodies = len(masses)
+    if len(positions) == num_bodies:
+        def acceleration(x):
+            return solve(x, masses, G)
+    else:
+        def acceleration(x):
+            return np.concatenate((solve(x[:num_bodies], masses, G),
+                                   compute_particle_accelerations(x[num_bodies:], x[:num_bodies], masses, G)))
+    for _ in range(num_steps):
+        positions, velocities = integrate(positions, velocities, t_step, acceleration)
+    return positions, velocities
+
+
+def _accelerations(positions, masses, G, accelerations):
+    # Pairwise accelerations, each pair of massive bodies visited once; particles only feel the massive bodies
+    num_bodies, num_total = masses.shape[0], positions.shape[0]
+    accelerations[:] = 0.0
+    for i in range(num_bodies):
+        for j in range(i + 1, num_total):
+            dx = positions[j, 0] - positions[i, 0]
+            dy = positions[j, 1] - positions[i, 1]
+            dz = positions[j, 2] - positions[i, 2]
+            r_squared = dx * dx + dy * dy + dz * dz
+            inv_r_cubed = 1.0 / (r_squared * np.sqrt(r_squared))
+            if j < num_bodies:
+                factor = G * masses[j] * inv_r_cubed
+                accelerations[i, 0] += factor * dx
+                accelerations[i, 1] += factor * dy
+                accelerations[i, 2] += factor * dz
+            factor = G * masses[i] * inv_r_cubed
+            accelerations[j, 0] -= factor * dx
+            accelerations[j, 1] -= factor * dy
+            accelerations[j, 2] -= factor * dz
+
+
+def _advance(positions, velocities, masses, G, t_step, num_steps, drifts, kicks):
+    # Integrates in place with a drift-kick sequence, see COMPILED_INTEGRATORS
+    accelerations = np.empty_like(positions)
+    num_total = positions.shape[0]
+    for _ in range(num_steps):
+        for stage in range(drifts.shape[0]):
+            if drifts[stage] != 0.0:
+                dt = drifts[stage] * t_step
+                for i in range(num_total):
+                    for k in range(3):
+                        positions[i, k] += velocities[i, k] * dt
+            if stage < kicks.shape[0]:
+                _accelerations(positions, masses, G, accelerations)
+                dt = kicks[stage] * t_step
+                for i in range(num_total):
+                    for k in range(3):
+                        velocities[i, k] += accelerations[i, k] * dt
+
+
+if numba is not None:
+    _accelerations = numba.njit(cache=True)(_accelerations)
+    _advance = numba.njit(cache=True)(_advance)
+
+
+def advance_numba(positions, velocities, masses, G, t_step, num_steps, integrator='euler', solver='exact'):
+    """
+    Advance bodies and particles by a number of time steps in a single compiled loop (computation of the
+    accelerations and integration), which avoids the overhead of the NumPy calls per step. Only the exact
+    solver and the integrators of COMPILED_INTEGRATORS are supported. See advance_numpy for the parameters.
+
+    Returns:
+    tuple: The positions and velocities after the steps.
+
+    Raises:
+    ValueError: If numba is not installed, or for other integrators or solvers.
+    """
+    if numba is None:
+        raise ValueError("The backend 'numba' requires the numba package.")
+    if integrator not in COMPILED_INTEGRATORS or solver != 'exact':
+        raise ValueError(f"The backend 'numba' supports the solver 'exact' with the integrators "
+                         f"{list(COMPILED_INTEGRATORS)} only.")
+    drifts, kicks = (np.array(coefficients, dtype=float) for coefficients in COMPILED_INTEGRATORS[integrator])
+    positions = np.array(positions, dtype=float)
+    velocities = np.array(velocities, dtype=float)
+    _advance(positions, velocities, np.asarray(masses, dtype=float), float(G), float(t_step), int(num_steps),
+             drifts, kicks)
+    return positions, velocities
+
+
+# Backends selectable by name
+BACKENDS = {
+    'numpy': advance_numpy,
+    'numba': advance_numba,
+}
+
+
+def get_backend(backend='auto', integrator='euler', solver='exact'):
+    """
+    Look up a backend for advancing a system by many steps at once.
+
+    Parameters:
+    backend (str, optional): 'numpy', 'numba', or 'auto' for 'numba' if it is installed and supports the
+                             integrator and solver, else 'numpy'. Default: 'auto'.
+    integrator (str or callable, optional): The time integrator the backend is used with. Default: 'euler'.
+    solver (str or callable, optional): The acceleration solver the backend is used with. Default: 'exact'.
+
+    Returns:
+    callable: The backend, see advance_numpy for its signature.
+    """
+    if backend == 'auto':
+        compiled = numba is not None and solver == 'exact' and integrator in COMPILED_INTEGRATORS
+        backend = 'numba' if compiled else 'numpy'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected 'auto' or one of {list(BACKENDS)}.")
+    return BACKENDS[backend]
@@ -0,0 +1,189 @@
+import numpy as np
+
+# Offsets of the eight octant centers in units of the parent's half width.
+# The octant index is built from the bits (x > center, y > center, z > center).
+OCTANT_OFFSETS = np.array([[(k >> 0) & 1, (k >> 1) & 1, (k >> 2) & 1] for k in range(8)]) * 2 - 1
+
+
+class Octree:
+    def __init__(self, positions, masses, leaf_size=8, max_depth=32):
+        """
+        Builds an octree over the given bodies. Nodes are stored as flat arrays, children are always
+        stored after their parents.
+
+        Parameters:
+        positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+        masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+        leaf_size (int, optional): The maximum number of bodies in a leaf node. Default: 8.
+        max_depth (int, optional): The maximum depth of the tree. Nodes at this depth are leaves
+                                   regardless of their number of bodies. Default: 32.
+        """
+        positions = np.asarray(positions, dtype=float)
+        masses = np.asarray(masses, dtype=float)
+        num_bodies = len(masses)
+
+        lower, upper = positions.min(axis=0), positions.max(axis=0)
+        centers = [((lower + upper) / 2)[np.newaxis, :]]
+        half_widths = [np.array([max(np.max(upper - lower) / 2, 1e-12) * (1 + 1e-9)])]
+        parents = [np.array([-1])]
+        depths = [np.array([0])]
+        num_nodes = 1
+        children = []  # list of (parent, octant, child) arrays
+
+        body_node = np.zeros(num_bodies, dtype=int)
+        active = np.arange(num_bodies)
+        node_center = centers[0]
+        node_half_width = half_widths[0]
+        for depth in range(max_depth):
+            # Only nodes holding more than leaf_size bodies are split further
+            counts = np.bincount(body_node[active], minlength=num_nodes)
+            active = active[counts[body_node[active]] > leaf_size]
+            if len(active) == 0:
+                break
+            nodes = body_node[active]
+            octants = (positions[active] > node_center[nodes]) @ np.array([1, 2, 4])
+            keys, inverse = np.unique(nodes * 8 + octants, return_inverse=True)
+            new_parents, new_octants = keys // 8, keys % 8
+            new_ids = num_nodes + np.arange(len(keys))
+            new_half_width = node_half_width[new_parents] / 2
+            new_center = node_center[new_parents] + OCTANT_OFFSETS[new_octants] * new_half_width[:, np.newaxis]
+
+            centers.append(new_center)
+            half_widths.append(new_half_width)
+            parents.append(new_parents)
+            depths.append(np.full(len(keys), depth + 1))
+            children.append((new_parents, new_octants, new_ids))
+            num_nodes += len(keys)
+            node_center = np.concatenate(centers)
+            node_half_width = np.concatenate(half_widths)
+            body_node[active] = new_ids[inverse.ravel()]
+
+        self.center = node_center
+        self.half_width = node_half_width
+        self.parent = np.concatenate(parents)
+        self.depth = np.concatenate(depths)
+        self.children = np.full((num_nodes, 8), -1)
+        for new_parents, new_octants, new_ids in children:
+            self.children[new_parents, new_octants] = new_ids
+        self.is_leaf = np.all(self.children < 0, axis=1)
+
+        # Bodies sorted by their leaf, so that each leaf owns a contiguous slice
+        self.body_order = np.argsort(body_node, kind='stable')
+        leaf_counts = np.bincount(body_node, minlength=num_nodes)
+        self.leaf_start = np.concatenate(([0], np.cumsum(leaf_counts)[:-1]))
+        self.leaf_count = leaf_counts
+        self.body_node = body_node
+
+        self.positions = positions
+        self.masses = masses
+        self.refit()
+
+    def refit(self, positions=None):
+        """
+        Recomputes masses and centers of mass of all nodes, keeping the tree topology.
+        This is cheaper than a rebuild but degrades the tree quality if the bodies moved far.
+
+        Parameters:
+        positions (np.ndarray, optional): New positions of the bodies. Default: the positions of the last build/refit.
+
+        Returns:
+        None.
+        """
+        if positions is not None:
+            self.positions = np.asarray(positions, dtype=float)
+        num_nodes = len(self.parent)
+        mass = np.bincount(self.body_node, weights=self.masses, minlength=num_nodes)
+        weighted = np.stack([np.bincount(self.body_node, weights=self.masses * self.positions[:, k], minlength=num_nodes)
+                             for k in range(3)], axis=1)
+        # Accumulate bottom-up, level by level
+        for depth in range(self.depth.max(), 0, -1):
+            nodes = np.flatnonzero(self.depth == depth)
+            np.add.at(mass, self.parent[nodes], mass[nodes])
+            np.add.at(weighted, self.parent[nodes], weighted[nodes])
+        self.mass = mass
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.center_of_mass = np.where(mass[:, np.newaxis] > 0, weighted / mass[:, np.newaxis], self.center)
+
+    def accelerations(self, G, theta=0.5, positions=None):
+        """
+        Computes the accelerations of all bodies with the Barnes-Hut approximation.
+
+        A node is approximated by its center of mass if its width divided by the distance to the body is
+        smaller than theta and the body does not lie inside the node. Otherwise, the node is opened.
+        All bodies are traversed simultaneously, one tree level per iteration.
+
+        Parameters:
+        G (float): The gravitational constant.
+        theta (float, optional): The opening angle. Smaller values are more accurate and slower;
+                                 theta = 0 yields the exact result. Default: 0.5.
+        positions (np.ndarray, optional): The positions at which the accelerations are evaluated.
+                                          Default: the positions of the bodies in the tree.
+
+        Returns:
+        np.ndarray: An array of shape (num_bodies, 3) with the acceleration vector of each body.
+        """
+        tree_positions = self.positions
+        positions = tree_positions if positions is None else np.asarray(positions, dtype=float)
+        num_targets = len(positions)
+        accelerations = np.zeros((num_targets, 3))
+        # Pairs of (target, node) which still have to be processed.
+        # Targets in tree order keep memory accesses local.
+        targets = self.body_order if num_targets == len(self.masses) else np.arange(num_targets)
+        nodes = np.zeros(num_targets, dtype=int)
+        while len(targets) > 0:
+            delta = self.center_of_mass[nodes] - positions[targets]
+            r = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+            inside = np.all(np.abs(positions[targets] - self.center[nodes]) <= self.half_width[nodes, np.newaxis], axis=1)
+            leaf = self.is_leaf[nodes]
+            with np.errstate(divide='ignore'):
+                accept = ~leaf & ~inside & (2 * self.half_width[nodes] < theta * r)
+
+            # Far away nodes: monopole approximation
+            if np.any(accept):
+                factor = G * self.mass[nodes[accept]] / r[accept]**3
+                self._accumulate(accelerations, targets[accept], factor[:, np.newaxis] * delta[accept])
+
+            # Leaves: direct summation over the bodies in the leaf
+            if np.any(leaf):
+                leaf_targets, leaf_nodes = targets[leaf], nodes[leaf]
+                counts = self.leaf_count[leaf_nodes]
+                pair_targets = np.repeat(leaf_targets, counts)
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                sources = self.body_order[np.repeat(self.leaf_start[leaf_nodes], counts) + offsets]
+                delta_pairs = tree_positions[sources] - positions[pair_targets]
+                r_squared = np.einsum('ij,ij->i', delta_pairs, delta_pairs)
+                valid = r_squared > 0  # excludes self-interaction
+                factor = G * self.masses[sources[valid]] * r_squared[valid]**-1.5
+                self._accumulate(accelerations, pair_targets[valid], factor[:, np.newaxis] * delta_pairs[valid])
+
+            # Remaining nodes are opened
+            opened = ~accept & ~leaf
+            child_nodes = self.children[nodes[opened]]
+            child_targets = np.repeat(targets[opened], 8)
+            child_nodes = child_nodes.ravel()
+            exists = child_nodes >= 0
+            targets, nodes = child_targets[exists], child_nodes[exists]
+        return accelerations
+
+    @staticmethod
+    def _accumulate(accelerations, targets, values):
+        for k in range(3):
+            accelerations[:, k] += np.bincount(targets, weights=values[:, k], minlength=len(accelerations))
+
+
+def compute_accelerations_barnes_hut(positions, masses, G, theta=0.5, leaf_size=8):
+    """
+    Compute the gravitational accelerations of all bodies with the Barnes-Hut approximation.
+    The octree is rebuilt on every call.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    theta (float, optional): The opening angle. Default: 0.5.
+    leaf_size (int, optional): The maximum number of bodies in a leaf node. Default: 8.
+
+    Returns:
+    np.ndarray: An array of shape (num_bodies, 3) with the acceleration vector of each body.
+    """
+    return Octree(positions, masses, leaf_size=leaf_size).accelerations(G, theta=theta)
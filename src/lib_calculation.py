@@ -1,5 +1,8 @@
 import numpy as np
 import datetime
+import functools
+from .lib_barnes_hut import compute_accelerations_barnes_hut
+from .lib_integration import get_integrator
 
 def compute_force(body1, body2, G):
     """
@@ -30,14 +33,13 @@ def compute_force_matrix(bodies, G):
     Returns:
     np.ndarray: A 3-dimensional numpy array with shape (3, num_bodies, num_bodies). Each element represents the gravitational force vector acting on the corresponding body due to all other bodies. The forces are vectorial and follow Newton's law of universal gravitation. The first dimension represents the coordinate (x, y, z), the second dimension represents the row (body), and the third dimension represents the column (other bodies).
     """
-    num_bodies = len(bodies)
-    forces = np.zeros((3, num_bodies, num_bodies))
-    for i in range(num_bodies):
-        for j in range(i + 1, num_bodies):
-            Fij = compute_force(bodies[i], bodies[j], G)
-            forces[:, i, j] = Fij
-            forces[:, j, i] = -Fij
-    return forces
+    positions = np.array([body.position for body in bodies], dtype=float)
+    masses = np.array([body.mass for body in bodies], dtype=float)
+    # delta[:, i, j] points from body i to body j
+    delta = positions.T[:, np.newaxis, :] - positions.T[:, :, np.newaxis]
+    r_squared = np.sum(delta**2, axis=0)
+    np.fill_diagonal(r_squared, np.inf)  # no self-interaction
+    return G * np.outer(masses, masses) * r_squared**-1.5 * delta
 
 def total_force(forces, row):
     """
@@ -53,10 +55,256 @@ def total_force(forces, row):
     np.ndarray: A numpy array representing the total gravitational force acting on the given body/row.
                 The array has three elements corresponding to the x, y, and z components of the force.
     """
-    force = [sum(forces[coordinate, row, :]) for coordinate in [0, 1, 2]]
-    return np.array(force)
+    return np.sum(forces[:, row, :], axis=1)
 
-def compute_timestep(bodies, G, current_datetime, t_step = 1):
+def compute_accelerations(positions, masses, G, tile_size=256):
+    """
+    Compute the gravitational acceleration of every body due to all other bodies.
+
+    The pairwise interactions are evaluated block by block (tiles of tile_size x tile_size pairs), so that
+    memory usage stays at O(N * tile_size) instead of O(N^2). Each pair of tiles is visited once and its
+    contribution is applied to both tiles (Newton's third law).
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    tile_size (int, optional): The number of bodies per tile. Default is 256.
+
+    Returns:
+    np.ndarray: An array of shape (num_bodies, 3) with the acceleration vector of each body.
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    num_bodies = len(masses)
+    accelerations = np.zeros((num_bodies, 3))
+    for i0 in range(0, num_bodies, tile_size):
+        i1 = min(i0 + tile_size, num_bodies)
+        for j0 in range(i0, num_bodies, tile_size):
+            j1 = min(j0 + tile_size, num_bodies)
+            # delta[i, j] points from body i to body j
+            delta = positions[np.newaxis, j0:j1, :] - positions[i0:i1, np.newaxis, :]
+            r_squared = np.einsum('ijk,ijk->ij', delta, delta)
+            if i0 == j0:
+                np.fill_diagonal(r_squared, np.inf)  # no self-interaction
+            inv_r_cubed = r_squared ** -1.5
+            accelerations[i0:i1] += G * np.einsum('ij,ijk->ik', inv_r_cubed * masses[np.newaxis, j0:j1], delta)
+            if i0 != j0:
+                # Counter-acting accelerations on the bodies of the second tile
+                accelerations[j0:j1] -= G * np.einsum('ij,ijk->jk', inv_r_cubed * masses[i0:i1, np.newaxis], delta)
+    return accelerations
+
+def compute_accelerations_rows(positions, masses, G, start, stop, tile_size=256):
+    """
+    Compute the gravitational acceleration of the bodies start:stop due to all other bodies.
+    Unlike compute_accelerations, the rows are independent of each other, so that disjoint ranges
+    of bodies can be computed in parallel.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of all bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of all bodies.
+    G (float): The gravitational constant.
+    start (int): The index of the first body to compute.
+    stop (int): The index after the last body to compute.
+    tile_size (int, optional): The number of bodies per tile. Default is 256.
+
+    Returns:
+    np.ndarray: An array of shape (stop - start, 3) with the acceleration vectors of the bodies start:stop.
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    num_bodies = len(masses)
+    accelerations = np.zeros((stop - start, 3))
+    for i0 in range(start, stop, tile_size):
+        i1 = min(i0 + tile_size, stop)
+        for j0 in range(0, num_bodies, tile_size):
+            j1 = min(j0 + tile_size, num_bodies)
+            delta = positions[np.newaxis, j0:j1, :] - positions[i0:i1, np.newaxis, :]
+            r_squared = np.einsum('ijk,ijk->ij', delta, delta)
+            # no self-interaction
+            overlap = np.arange(max(i0, j0), min(i1, j1))
+            r_squared[overlap - i0, overlap - j0] = np.inf
+            inv_r_cubed = r_squared ** -1.5
+            accelerations[i0 - start:i1 - start] += G * np.einsum('ij,ijk->ik', inv_r_cubed * masses[np.newaxis, j0:j1], delta)
+    return accelerations
+
+def compute_particle_accelerations(particle_positions, positions, masses, G, chunk_size=4096):
+    """
+    Compute the gravitational acceleration of massless test particles due to the massive bodies.
+    The particles do not act on the massive bodies nor on each other, so the cost is O(num_particles * num_bodies).
+
+    Parameters:
+    particle_positions (np.ndarray): An array of shape (num_particles, 3) with the positions of the particles.
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the massive bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the massive bodies.
+    G (float): The gravitational constant.
+    chunk_size (int, optional): The number of particles processed at once. Default is 4096.
+
+    Returns:
+    np.ndarray: An array of shape (num_particles, 3) with the acceleration vector of each particle.
+    """
+    particle_positions = np.asarray(particle_positions, dtype=float)
+    accelerations = np.empty_like(particle_positions)
+    for start in range(0, len(particle_positions), chunk_size):
+        stop = start + chunk_size
+        # delta[p, j] points from particle p to body j
+        delta = positions[np.newaxis, :, :] - particle_positions[start:stop, np.newaxis, :]
+        r_squared = np.einsum('ijk,ijk->ij', delta, delta)
+        accelerations[start:stop] = G * np.einsum('ij,ijk->ik', masses * r_squared**-1.5, delta)
+    return accelerations
+
+def compute_ensemble_accelerations(positions, masses, G, chunk_size=4096):
+    """
+    Compute the gravitational accelerations in many copies (members) of the same system at once, e.g. with
+    perturbed initial conditions. Each pair of bodies is evaluated once per member, and the accelerations are
+    gathered by a product with the (num_bodies, num_pairs) matrix of the pairs, which suits small systems.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_members, num_bodies, 3) with the positions of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies, the same in all members.
+    G (float): The gravitational constant.
+    chunk_size (int, optional): The number of members processed at once. Default is 4096.
+
+    Returns:
+    np.ndarray: An array of shape (num_members, num_bodies, 3) with the acceleration vector of each body.
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    num_bodies = len(masses)
+    # Pair p connects body first[p] to body second[p], with first[p] < second[p]
+    first, second = np.triu_indices(num_bodies, 1)
+    pairs = np.arange(len(first))
+    gather = np.zeros((num_bodies, len(first)))
+    gather[first, pairs] = G * masses[second]
+    gather[second, pairs] = -G * masses[first]
+    accelerations = np.empty_like(positions)
+    for start in range(0, len(positions), chunk_size):
+        # Bodies along the first axis, so that the pairs are gathered by a single matrix product, and members
+        # along the last, so that the element-wise operations run over long contiguous rows
+        chunk = np.ascontiguousarray(positions[start:start + chunk_size].transpose(1, 2, 0))
+        delta = np.empty((len(first), *chunk.shape[1:]))
+        for i in range(num_bodies - 1):
+            # The pairs of body i with the bodies after it are consecutive
+            pair = len(first) - (num_bodies - i) * (num_bodies - i - 1) // 2
+            np.subtract(chunk[i + 1:], chunk[i], out=delta[pair:pair + num_bodies - i - 1])
+        r_squared = delta[:, 0]**2 + delta[:, 1]**2 + delta[:, 2]**2
+        delta *= (1 / (r_squared * np.sqrt(r_squared)))[:, np.newaxis]
+        accelerations[start:start + chunk_size] = \
+            (gather @ delta.reshape(len(first), -1)).reshape(chunk.shape).transpose(2, 0, 1)
+    return accelerations
+
+def compute_accelerations_parallel(positions, masses, G, **options):
+    """
+    Compute the accelerations of all bodies in worker processes, see lib_parallel.ParallelSolver.
+    The workers are started on the first call and shared by all calls with the same options.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    **options: Keyword arguments of ParallelSolver, e.g. num_workers or min_bodies.
+
+    Returns:
+    np.ndarray: An array of shape (num_bodies, 3) with the acceleration vector of each body.
+    """
+    from .lib_parallel import shared_solver  # lib_parallel itself imports this module
+    return shared_solver(**options)(positions, masses, G)
+
+# Acceleration solvers selectable by name. Each solver is called as solver(positions, masses, G).
+SOLVERS = {
+    'exact': compute_accelerations,
+    'barnes-hut': compute_accelerations_barnes_hut,
+    'parallel': compute_accelerations_parallel,
+}
+
+def get_solver(solver='exact', **options):
+    """
+    Look up an acceleration solver.
+
+    Parameters:
+    solver (str or callable, optional): The name of a solver in SOLVERS or a callable with the signature
+                                        solver(positions, masses, G). Default: 'exact'.
+    **options: Keyword arguments bound to the solver, e.g. theta for 'barnes-hut'.
+
+    Returns:
+    callable: The solver with the signature solver(positions, masses, G).
+    """
+    if not callable(solver):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}'. Expected one of {list(SOLVERS)}.")
+        solver = SOLVERS[solver]
+    return functools.partial(solver, **options) if options else solver
+
+def acceleration_error(positions, masses, G, solver, num_samples=None, seed=0):
+    """
+    Compare the accelerations of an approximate solver with the exact kernel.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    solver (str or callable): The solver to be checked, see get_solver.
+    num_samples (int, optional): If given, the exact accelerations are only computed for a random subset
+                                 of this many bodies, which keeps the check cheap for large systems. Default: None.
+    seed (int, optional): The seed for drawing the subset. Default: 0.
+
+    Returns:
+    dict: The median, 99th percentile and maximum of the relative error |a_approx - a_exact| / |a_exact|.
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    approx = get_solver(solver)(positions, masses, G)
+    num_bodies = len(masses)
+    if num_samples is None or num_samples >= num_bodies:
+        samples = np.arange(num_bodies)
+        exact = compute_accelerations(positions, masses, G)
+    else:
+        samples = np.random.default_rng(seed).choice(num_bodies, num_samples, replace=False)
+        exact = np.zeros((num_samples, 3))
+        for k, i in enumerate(samples):
+            delta = positions - positions[i]
+            r_squared = np.einsum('ij,ij->i', delta, delta)
+            r_squared[i] = np.inf
+            exact[k] = G * (masses * r_squared**-1.5) @ delta
+    relative_error = np.linalg.norm(approx[samples] - exact, axis=1) / np.linalg.norm(exact, axis=1)
+    return {
+        'median': float(np.median(relative_error)),
+        'p99': float(np.percentile(relative_error, 99)),
+        'max': float(np.max(relative_error)),
+    }
+
+def get_state(bodies):
+    """
+    Collect the state of the given bodies into arrays.
+
+    Parameters:
+    bodies (list): A list of Body objects, each with attributes: position (np.ndarray), velocity (np.ndarray), mass (float).
+
+    Returns:
+    tuple: The positions (num_bodies, 3), velocities (num_bodies, 3) and masses (num_bodies,) as numpy arrays.
+    """
+    positions = np.array([body.position for body in bodies], dtype=float)
+    velocities = np.array([body.velocity for body in bodies], dtype=float)
+    masses = np.array([body.mass for body in bodies], dtype=float)
+    return positions, velocities, masses
+
+def set_state(bodies, positions, velocities):
+    """
+    Write positions and velocities back to the given bodies.
+
+    Parameters:
+    bodies (list): A list of Body objects with a reposition(np.ndarray) method and a velocity attribute.
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the new positions.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the new velocities.
+
+    Returns:
+    None.
+    """
+    for body, position, velocity in zip(bodies, positions, velocities):
+        body.reposition(position)
+        body.velocity = np.array(velocity)
+
+def compute_timestep(bodies, G, current_datetime, t_step = 1, solver='exact', integrator='euler', particles=None):
     """
     Update positions and velocities of planets in a gravitational simulation.
 
@@ -67,22 +315,35 @@ def compute_timestep(bodies, G, current_datetime, t_step = 1):
     bodies (list): A list of Body objects, each with attributes: position (np.ndarray), velocity (np.ndarray), mass (float), and accelerate(np.ndarray, float) and reposition(np.ndarray) methods.
     G (float): The gravitational constant.
     current_datetime (datetime.datetime): The current date and time of the simulation.
-    t_step (float, optional): The time of a simulation step in days. It should be lower than or equal to 1. Default is 1.
+    t_step (float, optional): The time of a simulation step in days. With the default integrator, it should be lower than
+                              or equal to 1; higher order integrators allow larger steps. Default is 1.
+    solver (str or callable, optional): The acceleration solver, see get_solver. Default is 'exact'.
+    integrator (str or callable, optional): The time integrator, see lib_integration.get_integrator. Default is 'euler'.
+    particles (MasslessParticles, optional): Massless test particles, which are advanced together with the bodies
+                                             but only feel the gravity of the bodies. Default is None.
 
     Returns:
     datetime.datetime: The updated date and time of the simulation after the timestep.
     """
-    forces = compute_force_matrix(bodies, G)
-    for i, body in enumerate(bodies):
-        # Acceleration
-        a = total_force(forces, i) / body.mass
-        ## Simple method for time integration
-        # Save velocity before acceleration
-        v_before = body.velocity
-        body.accelerate(a, t_step)
-        # Position after the timestep
-        x_afterwards = body.position + (body.velocity + v_before)/2 * t_step
-        body.reposition(x_afterwards)
-        
+    positions, velocities, masses = get_state(bodies)
+    solve = get_solver(solver)
+    integrate = get_integrator(integrator)
+    if particles is None or len(particles) == 0:
+        positions, velocities = integrate(positions, velocities, t_step, lambda x: solve(x, masses, G))
+    else:
+        # Bodies and particles are integrated as one system, so that every integrator can be used
+        num_bodies = len(bodies)
+
+        def acceleration(x):
+            return np.concatenate((solve(x[:num_bodies], masses, G),
+                                   compute_particle_accelerations(x[num_bodies:], x[:num_bodies], masses, G)))
+
+        positions, velocities = integrate(np.concatenate((positions, particles.positions)),
+                                          np.concatenate((velocities, particles.velocities)),
+                                          t_step, acceleration)
+        particles.positions, particles.velocities = positions[num_bodies:], velocities[num_bodies:]
+        positions, velocities = positions[:num_bodies], velocities[:num_bodies]
+    set_state(bodies, positions, velocities)
+
     return current_datetime + datetime.timedelta(days=t_step)
 
@@ -0,0 +1,207 @@
+import numpy as np
+from .lib_calculation import get_solver
+from .lib_integration import get_integrator
+
+# Integrators considered by tune_integration and their acceleration evaluations per step
+TUNABLE_INTEGRATORS = {
+    'euler': 1,
+    'leapfrog': 1,
+    'yoshida4': 3,
+}
+
+def kinetic_energy(velocities, masses):
+    """
+    Compute the total kinetic energy.
+
+    Parameters:
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+
+    Returns:
+    float: The kinetic energy in sun masses * A.U.^2 / day^2.
+    """
+    return 0.5 * np.sum(masses * np.einsum('ij,ij->i', velocities, velocities))
+
+def potential_energy(positions, masses, G, tile_size=256):
+    """
+    Compute the total gravitational potential energy, summing each pair once. The pairs are evaluated
+    in tiles of tile_size rows, so that memory usage stays at O(N * tile_size).
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    tile_size (int, optional): The number of bodies per tile. Default is 256.
+
+    Returns:
+    float: The potential energy in sun masses * A.U.^2 / day^2.
+    """
+    num_bodies = len(masses)
+    energy = 0.0
+    for i0 in range(0, num_bodies, tile_size):
+        i1 = min(i0 + tile_size, num_bodies)
+        # Pairs (i, j) with j > i only
+        delta = positions[np.newaxis, i0 + 1:, :] - positions[i0:i1, np.newaxis, :]
+        r = np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+        upper = np.arange(i0 + 1, num_bodies)[np.newaxis, :] > np.arange(i0, i1)[:, np.newaxis]
+        mass_products = masses[i0:i1, np.newaxis] * masses[np.newaxis, i0 + 1:]
+        energy -= G * np.sum(np.divide(mass_products, r, out=np.zeros_like(r), where=upper))
+    return energy
+
+def total_energy(positions, velocities, masses, G):
+    """
+    Returns:
+    float: The sum of kinetic and potential energy, see kinetic_energy and potential_energy.
+    """
+    return kinetic_energy(velocities, masses) + potential_energy(positions, masses, G)
+
+def angular_momentum(positions, velocities, masses):
+    """
+    Compute the total angular momentum with respect to the origin.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+
+    Returns:
+    np.ndarray: The angular momentum vector.
+    """
+    return np.sum(masses[:, np.newaxis] * np.cross(positions, velocities), axis=0)
+
+
+class ConservationMonitor:
+    def __init__(self, positions, velocities, masses, G, every=10):
+        """
+        Tracks the relative drift of the total energy and the angular momentum, which are conserved
+        by the exact dynamics, as a measure of the integration error. Evaluating the energy costs about
+        as much as one acceleration evaluation, so it is only done every few steps (see due()).
+
+        Parameters:
+        positions (np.ndarray): The positions of the massive bodies at the reference time.
+        velocities (np.ndarray): The velocities of the massive bodies at the reference time.
+        masses (np.ndarray): The masses of the bodies.
+        G (float): The gravitational constant.
+        every (int, optional): The number of steps between two evaluations. Default: 10.
+        """
+        self.masses = np.asarray(masses, dtype=float)
+        self.G = G
+        self.every = every
+        self._count = 0
+        self.reset(positions, velocities)
+
+    def reset(self, positions, velocities):
+        """
+        Makes the given state the reference and clears the drift.
+        """
+        self.initial_energy = total_energy(positions, velocities, self.masses, self.G)
+        self.initial_angular_momentum = angular_momentum(positions, velocities, self.masses)
+        self.energy_drift = 0.0
+        self.angular_momentum_drift = 0.0
+        self.max_energy_drift = 0.0
+
+    def due(self):
+        """
+        Counts a step.
+
+        Returns:
+        bool: Whether the state should be passed to update() after this step.
+        """
+        self._count += 1
+        return self._count % self.every == 0
+
+    def update(self, positions, velocities):
+        """
+        Evaluates the drift of the given state with respect to the reference state.
+
+        Returns:
+        float: The relative energy drift.
+        """
+        energy = total_energy(positions, velocities, self.masses, self.G)
+        self.energy_drift = float(abs((energy - self.initial_energy) / self.initial_energy))
+        self.max_energy_drift = max(self.max_energy_drift, self.energy_drift)
+        norm = np.linalg.norm(self.initial_angular_momentum)
+        if norm > 0:
+            difference = angular_momentum(positions, velocities, self.masses) - self.initial_angular_momentum
+            self.angular_momentum_drift = float(np.linalg.norm(difference) / norm)
+        return self.energy_drift
+
+
+def energy_drift(positions, velocities, masses, G, days, t_step, integrator='euler', solver='exact',
+                 tolerance=np.inf, num_samples=20):
+    """
+    Integrates a system and measures the largest relative energy drift along the way.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    days (float): The time span in days.
+    t_step (float): The time step in days.
+    integrator (str, optional): The time integrator. Default: 'euler'.
+    solver (str, optional): The acceleration solver. Default: 'exact'.
+    tolerance (float, optional): The integration stops as soon as the drift exceeds this. Default: no limit.
+    num_samples (int, optional): The number of times the energy is evaluated. Default: 20.
+
+    Returns:
+    float: The largest relative energy drift among the samples.
+    """
+    solve, integrate = get_solver(solver), get_integrator(integrator)
+    monitor = ConservationMonitor(positions, velocities, masses, G)
+    num_steps = int(np.ceil(days / t_step))
+    sample_steps = set(np.linspace(0, num_steps, num_samples + 1).astype(int)[1:])
+    for k in range(1, num_steps + 1):
+        positions, velocities = integrate(positions, velocities, t_step, lambda x: solve(x, masses, G))
+        if k in sample_steps and monitor.update(positions, velocities) > tolerance:
+            break
+    return monitor.max_energy_drift
+
+def tune_integration(positions, velocities, masses, G, tolerance, horizon, integrators=tuple(TUNABLE_INTEGRATORS),
+                     max_step=1, min_step=1/64, max_probe_days=365, solver='exact'):
+    """
+    Find the cheapest integrator and time step that keep the relative energy drift within a budget.
+
+    For each integrator, the time step is halved, starting from max_step, until the drift over the horizon
+    stays below the tolerance. Among the integrators reaching the tolerance, the one with the fewest
+    acceleration evaluations per simulated day is chosen. Long horizons are probed over max_probe_days
+    only: the integrators considered are symplectic, so that their energy error does not grow secularly.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    G (float): The gravitational constant.
+    tolerance (float): The admissible relative energy drift.
+    horizon (float): The time span in days the configuration is needed for.
+    integrators (tuple, optional): The candidate integrators, see TUNABLE_INTEGRATORS. Default: all of them.
+    max_step (float, optional): The largest time step considered in days. Default: 1.
+    min_step (float, optional): The smallest time step considered in days. Default: 1/64.
+    max_probe_days (float, optional): The longest time span integrated per candidate in days. Default: 365.
+    solver (str, optional): The acceleration solver. Default: 'exact'.
+
+    Returns:
+    dict: The 'integrator', its 't_step', the measured 'energy_drift' and the 'cost' in acceleration
+          evaluations per day.
+
+    Raises:
+    ValueError: If no candidate reaches the tolerance.
+    """
+    probe_days = min(horizon, max_probe_days)
+    best = None
+    for integrator in integrators:
+        t_step = max_step
+        while t_step >= min_step:
+            cost = TUNABLE_INTEGRATORS[integrator] / t_step
+            if best is not None and cost >= best['cost']:
+                break  # cannot become the cheapest anymore
+            drift = energy_drift(positions, velocities, masses, G, probe_days, t_step, integrator, solver,
+                                 tolerance=tolerance)
+            if drift <= tolerance:
+                best = {'integrator': integrator, 't_step': t_step, 'energy_drift': drift, 'cost': cost}
+                break
+            t_step /= 2
+    if best is None:
+        raise ValueError(f"No integrator among {list(integrators)} keeps the energy drift below {tolerance} "
+                         f"with time steps of at least {min_step} days.")
+    return best
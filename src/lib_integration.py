@@ -0,0 +1,184 @@
+import numpy as np
+
+# All integrators share the signature
+#     integrator(positions, velocities, t_step, acceleration) -> (positions, velocities)
+# where acceleration(positions) returns the accelerations of all bodies as an array of shape (num_bodies, 3).
+# Positions and velocities passed in are never modified in place.
+
+def euler_step(positions, velocities, t_step, acceleration):
+    """
+    Semi-implicit (symplectic) Euler step: the velocity is updated first and the new velocity
+    is used for the position update. First order; this is the scheme the animation has always used.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    t_step (float): The time step.
+    acceleration (callable): Function returning the accelerations for given positions.
+
+    Returns:
+    tuple: The positions and velocities after the step.
+    """
+    velocities = velocities + acceleration(positions) * t_step
+    positions = positions + velocities * t_step
+    return positions, velocities
+
+def leapfrog_step(positions, velocities, t_step, acceleration):
+    """
+    Leapfrog (Stoermer-Verlet) step in drift-kick-drift form. Second order and symplectic,
+    one acceleration evaluation per step.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    t_step (float): The time step.
+    acceleration (callable): Function returning the accelerations for given positions.
+
+    Returns:
+    tuple: The positions and velocities after the step.
+    """
+    positions = positions + velocities * (t_step / 2)
+    velocities = velocities + acceleration(positions) * t_step
+    positions = positions + velocities * (t_step / 2)
+    return positions, velocities
+
+# Coefficients of the fourth order composition by Yoshida (1990)
+_YOSHIDA_W1 = 1 / (2 - 2**(1 / 3))
+_YOSHIDA_W0 = -2**(1 / 3) * _YOSHIDA_W1
+
+def yoshida4_step(positions, velocities, t_step, acceleration):
+    """
+    Fourth order symplectic step by Yoshida, composed of three leapfrog steps.
+    Three acceleration evaluations per step.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    t_step (float): The time step.
+    acceleration (callable): Function returning the accelerations for given positions.
+
+    Returns:
+    tuple: The positions and velocities after the step.
+    """
+    for weight in (_YOSHIDA_W1, _YOSHIDA_W0, _YOSHIDA_W1):
+        positions, velocities = leapfrog_step(positions, velocities, weight * t_step, acceleration)
+    return positions, velocities
+
+# Butcher tableau of the Dormand-Prince 5(4) method
+_DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+_DP_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+_DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+_DP_E = _DP_B - np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+def rk45_step(positions, velocities, t_step, acceleration, rtol=1e-9, atol=1e-12, max_substeps=10000):
+    """
+    Adaptive Dormand-Prince 5(4) step. The interval t_step is covered by as many substeps as needed
+    to keep the estimated local error below atol + rtol * |state|.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    t_step (float): The time step.
+    acceleration (callable): Function returning the accelerations for given positions.
+    rtol (float, optional): The relative tolerance. Default: 1e-9.
+    atol (float, optional): The absolute tolerance. Default: 1e-12.
+    max_substeps (int, optional): The maximum number of attempted substeps. Default: 10000.
+
+    Returns:
+    tuple: The positions and velocities after the step.
+    """
+    def derivative(state):
+        return np.stack((state[1], acceleration(state[0])))
+
+    state = np.stack((positions, velocities)).astype(float)
+    direction = np.sign(t_step)
+    remaining = abs(t_step)
+    h = remaining
+    k_first = derivative(state)
+    for _ in range(max_substeps):
+        if remaining <= 0:
+            return state[0], state[1]
+        h = min(h, remaining)
+        k = [k_first]
+        for stage in range(1, 7):
+            increment = sum(a * k_j for a, k_j in zip(_DP_A[stage], k) if a != 0)
+            k.append(derivative(state + direction * h * increment))
+        new_state = state + direction * h * sum(b * k_j for b, k_j in zip(_DP_B, k) if b != 0)
+        error = h * sum(e * k_j for e, k_j in zip(_DP_E, k) if e != 0)
+        scale = atol + rtol * np.maximum(np.abs(state), np.abs(new_state))
+        error_norm = np.sqrt(np.mean((error / scale)**2))
+        if error_norm <= 1:
+            state = new_state
+            remaining -= h
+            k_first = k[6]  # first same as last
+        h *= min(5, max(0.2, 0.9 * error_norm**-0.2)) if error_norm > 0 else 5
+    raise RuntimeError(f"rk45 did not converge within {max_substeps} substeps.")
+
+def dop853_step(positions, velocities, t_step, acceleration, rtol=1e-10, atol=1e-13):
+    """
+    Adaptive Dormand-Prince 8(5,3) step, delegated to scipy.integrate.solve_ivp.
+    Requires scipy to be installed.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    t_step (float): The time step.
+    acceleration (callable): Function returning the accelerations for given positions.
+    rtol (float, optional): The relative tolerance. Default: 1e-10.
+    atol (float, optional): The absolute tolerance. Default: 1e-13.
+
+    Returns:
+    tuple: The positions and velocities after the step.
+    """
+    try:
+        from scipy.integrate import solve_ivp
+    except ImportError as e:
+        raise ImportError("The integrator 'dop853' requires scipy. Install it with 'pip install scipy'.") from e
+
+    shape = np.shape(positions)
+
+    def derivative(t, y):
+        state = y.reshape(2, *shape)
+        return np.concatenate((state[1].ravel(), acceleration(state[0]).ravel()))
+
+    y0 = np.concatenate((np.ravel(positions), np.ravel(velocities))).astype(float)
+    solution = solve_ivp(derivative, (0, t_step), y0, method='DOP853', rtol=rtol, atol=atol)
+    if not solution.success:
+        raise RuntimeError(f"dop853 failed: {solution.message}")
+    state = solution.y[:, -1].reshape(2, *shape)
+    return state[0], state[1]
+
+# Integrators selectable by name
+INTEGRATORS = {
+    'euler': euler_step,
+    'leapfrog': leapfrog_step,
+    'yoshida4': yoshida4_step,
+    'rk45': rk45_step,
+    'dop853': dop853_step,
+}
+
+def get_integrator(integrator='euler'):
+    """
+    Look up a time integrator.
+
+    Parameters:
+    integrator (str or callable, optional): The name of an integrator in INTEGRATORS or a callable with the
+                                            signature integrator(positions, velocities, t_step, acceleration).
+                                            Default: 'euler'.
+
+    Returns:
+    callable: The integrator.
+    """
+    if callable(integrator):
+        return integrator
+    if integrator not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator '{integrator}'. Expected one of {list(INTEGRATORS)}.")
+    return INTEGRATORS[integrator]
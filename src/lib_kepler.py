@@ -0,0 +1,170 @@
+import numpy as np
+
+# Two-body (Kepler) orbits, for many bodies at once. Orbits are given relative to the central body, with
+# mu = G * (central mass + mass of the body). Elliptic orbits have a > 0, hyperbolic orbits a < 0.
+# Radial orbits (zero angular momentum) are not supported.
+#
+# The elements are a dict of arrays of shape (num_bodies,):
+#     a                semi-major axis [A.U.]
+#     e                eccentricity
+#     inclination      [rad], with respect to the x-y plane
+#     node             longitude of the ascending node [rad]; 0 for orbits in the x-y plane
+#     periapsis        argument of periapsis [rad]; 0 for circular orbits
+#     mean_anomaly     mean anomaly at the epoch [rad]
+
+
+def solve_kepler(mean_anomaly, eccentricity, tolerance=1e-12, max_iterations=50):
+    """
+    Solve Kepler's equation M = E - e sin(E) for the eccentric anomaly E (elliptic orbits, e < 1),
+    or M = e sinh(H) - H for the hyperbolic anomaly H (e > 1), by Newton's method on all bodies at once.
+
+    Parameters:
+    mean_anomaly (np.ndarray): The mean anomalies in radians.
+    eccentricity (np.ndarray): The eccentricities, of the same shape or broadcastable to it.
+
+    Returns:
+    np.ndarray: The eccentric (or hyperbolic) anomalies. Elliptic ones are in [-pi, pi).
+    """
+    mean_anomaly, eccentricity = np.broadcast_arrays(np.asarray(mean_anomaly, dtype=float),
+                                                     np.asarray(eccentricity, dtype=float))
+    hyperbolic = eccentricity > 1
+    # Elliptic orbits are periodic: reduce to [-pi, pi), where the equation is well-behaved
+    mean_anomaly = np.where(hyperbolic, mean_anomaly, np.mod(mean_anomaly + np.pi, 2 * np.pi) - np.pi)
+    # Starting values for which Newton's method converges for all eccentricities
+    anomaly = np.where(hyperbolic, np.arcsinh(mean_anomaly / np.maximum(eccentricity, 1)),
+                       np.where(eccentricity < 0.8, mean_anomaly, np.pi * np.sign(mean_anomaly)))
+    for _ in range(max_iterations):
+        residual = np.where(hyperbolic, eccentricity * np.sinh(anomaly) - anomaly,
+                            anomaly - eccentricity * np.sin(anomaly)) - mean_anomaly
+        derivative = np.where(hyperbolic, eccentricity * np.cosh(anomaly) - 1, 1 - eccentricity * np.cos(anomaly))
+        correction = residual / derivative
+        anomaly = anomaly - correction
+        if np.all(np.abs(correction) <= tolerance * np.maximum(1, np.abs(anomaly))):
+            break
+    return anomaly
+
+
+def _orbit_basis(elements):
+    # Unit vectors towards the ascending node and perpendicular to it in the orbital plane,
+    # rotated by the argument of periapsis: towards the periapsis (P) and 90 degrees ahead (Q)
+    inclination, node, periapsis = elements['inclination'], elements['node'], elements['periapsis']
+    to_node = np.stack((np.cos(node), np.sin(node), np.zeros_like(node)), axis=-1)
+    in_plane = np.stack((-np.cos(inclination) * np.sin(node), np.cos(inclination) * np.cos(node),
+                         np.sin(inclination)), axis=-1)
+    cos_w, sin_w = np.cos(periapsis)[:, np.newaxis], np.sin(periapsis)[:, np.newaxis]
+    return cos_w * to_node + sin_w * in_plane, -sin_w * to_node + cos_w * in_plane
+
+
+def state_to_elements(positions, velocities, mu, tolerance=1e-12):
+    """
+    Convert state vectors relative to the central body into orbital elements.
+
+    Parameters:
+    positions (np.ndarray): The positions relative to the central body in A.U., shape (num_bodies, 3).
+    velocities (np.ndarray): The velocities relative to the central body in A.U./day, shape (num_bodies, 3).
+    mu (float or np.ndarray): G times the sum of the masses of the central body and each body.
+    tolerance (float, optional): Eccentricities and inclinations below this count as zero, which fixes the
+                                 otherwise undefined angles. Default: 1e-12.
+
+    Returns:
+    dict: The orbital elements, see the top of this module.
+    """
+    positions, velocities = np.atleast_2d(positions).astype(float), np.atleast_2d(velocities).astype(float)
+    mu = np.broadcast_to(np.asarray(mu, dtype=float), positions.shape[:1])
+    r = np.linalg.norm(positions, axis=1)
+    v_squared = np.einsum('ij,ij->i', velocities, velocities)
+    radial_velocity = np.einsum('ij,ij->i', positions, velocities)
+
+    h = np.cross(positions, velocities)
+    h_norm = np.linalg.norm(h, axis=1)
+    e_vector = ((v_squared - mu / r)[:, np.newaxis] * positions - radial_velocity[:, np.newaxis] * velocities) \
+        / mu[:, np.newaxis]
+    e = np.linalg.norm(e_vector, axis=1)
+    a = 1 / (2 / r - v_squared / mu)
+
+    inclination = np.arccos(np.clip(h[:, 2] / h_norm, -1, 1))
+    node_vector = np.stack((-h[:, 1], h[:, 0], np.zeros_like(r)), axis=-1)  # z x h
+    node_norm = np.linalg.norm(node_vector, axis=1)
+    equatorial = node_norm <= tolerance * h_norm
+    node = np.where(equatorial, 0, np.arctan2(node_vector[:, 1], node_vector[:, 0]))
+
+    # Angles within the orbital plane, measured from the ascending node (the x axis for equatorial orbits)
+    elements = {'inclination': inclination, 'node': node, 'periapsis': np.zeros_like(r)}
+    to_node, in_plane = _orbit_basis(elements)
+    periapsis = np.where(e <= tolerance, 0, np.arctan2(np.einsum('ij,ij->i', e_vector, in_plane),
+                                                        np.einsum('ij,ij->i', e_vector, to_node)))
+    elements['periapsis'] = periapsis
+    to_periapsis, ahead = _orbit_basis(elements)
+    true_anomaly = np.arctan2(np.einsum('ij,ij->i', positions, ahead), np.einsum('ij,ij->i', positions, to_periapsis))
+
+    with np.errstate(invalid='ignore'):
+        eccentric_anomaly = np.arctan2(np.sqrt(1 - e**2) * np.sin(true_anomaly), e + np.cos(true_anomaly))
+        hyperbolic_anomaly = 2 * np.arctanh(np.sqrt((e - 1) / (e + 1)) * np.tan(true_anomaly / 2))
+    mean_anomaly = np.where(e < 1, eccentric_anomaly - e * np.sin(eccentric_anomaly),
+                            e * np.sinh(hyperbolic_anomaly) - hyperbolic_anomaly)
+    elements.update(a=a, e=e, mean_anomaly=mean_anomaly)
+    return elements
+
+
+def mean_motion(elements, mu):
+    """
+    Returns:
+    np.ndarray: The mean motion (2 pi / orbital period for elliptic orbits) in radians per day.
+    """
+    return np.sqrt(mu / np.abs(elements['a'])**3)
+
+
+def elements_to_state(elements, mu, days=0):
+    """
+    Compute the state vectors on the orbits at a time after the epoch of the elements.
+
+    Parameters:
+    elements (dict): The orbital elements, see state_to_elements.
+    mu (float or np.ndarray): G times the sum of the masses of the central body and each body.
+    days (float or np.ndarray, optional): The time since the epoch in days, or an array of shape (num_times,)
+                                          for several times at once. Default: 0.
+
+    Returns:
+    tuple: The positions and velocities relative to the central body, of shape (num_bodies, 3), or
+           (num_times, num_bodies, 3) for several times.
+    """
+    a, e = elements['a'], elements['e']
+    mu = np.broadcast_to(np.asarray(mu, dtype=float), a.shape)
+    days = np.asarray(days, dtype=float)[..., np.newaxis]  # times along the first axis, bodies along the last
+    mean_anomaly = elements['mean_anomaly'] + mean_motion(elements, mu) * days
+    anomaly = solve_kepler(mean_anomaly, e)
+
+    hyperbolic = e > 1
+    semi_axis = np.abs(a)
+    with np.errstate(invalid='ignore'):
+        root = np.sqrt(np.abs(1 - e**2))
+    cos_anomaly = np.where(hyperbolic, np.cosh(anomaly), np.cos(anomaly))
+    sin_anomaly = np.where(hyperbolic, np.sinh(anomaly), np.sin(anomaly))
+    # Coordinates in the orbital plane: towards the periapsis (x) and 90 degrees ahead (y)
+    x = np.where(hyperbolic, semi_axis * (e - cos_anomaly), semi_axis * (cos_anomaly - e))
+    y = semi_axis * root * sin_anomaly
+    r = np.where(hyperbolic, semi_axis * (e * cos_anomaly - 1), semi_axis * (1 - e * cos_anomaly))
+    speed = np.sqrt(mu * semi_axis) / r
+    vx = -speed * sin_anomaly
+    vy = speed * root * cos_anomaly
+
+    to_periapsis, ahead = _orbit_basis(elements)
+    positions = x[..., np.newaxis] * to_periapsis + y[..., np.newaxis] * ahead
+    velocities = vx[..., np.newaxis] * to_periapsis + vy[..., np.newaxis] * ahead
+    return positions, velocities
+
+
+def propagate(positions, velocities, mu, days):
+    """
+    Advance bodies on their two-body orbits around a central body. The cost does not depend on the time span.
+
+    Parameters:
+    positions (np.ndarray): The positions relative to the central body in A.U., shape (num_bodies, 3).
+    velocities (np.ndarray): The velocities relative to the central body in A.U./day, shape (num_bodies, 3).
+    mu (float or np.ndarray): G times the sum of the masses of the central body and each body.
+    days (float or np.ndarray): The time span in days (negative: backwards), or an array of time spans.
+
+    Returns:
+    tuple: The positions and velocities relative to the central body after the time span, see elements_to_state.
+    """
+    return elements_to_state(state_to_elements(positions, velocities, mu), mu, days)
@@ -0,0 +1,173 @@
+import atexit
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+import numpy as np
+from .lib_calculation import compute_accelerations_rows
+
+
+def _worker(names, num_bodies, start, stop, tile_size, connection):
+    """
+    Worker process of ParallelSolver. Computes the accelerations of the bodies start:stop whenever
+    it receives a gravitational constant, and answers once the result is in shared memory.
+    """
+    buffers = [shared_memory.SharedMemory(name=name) for name in names]
+    positions, masses, accelerations = _as_arrays(buffers, num_bodies)
+    try:
+        while True:
+            G = connection.recv()
+            if G is None:
+                break
+            accelerations[start:stop] = compute_accelerations_rows(positions, masses, G, start, stop, tile_size)
+            connection.send(True)
+    finally:
+        del positions, masses, accelerations
+        for buffer in buffers:
+            buffer.close()
+
+
+def _as_arrays(buffers, num_bodies):
+    positions = np.ndarray((num_bodies, 3), dtype=float, buffer=buffers[0].buf)
+    masses = np.ndarray((num_bodies,), dtype=float, buffer=buffers[1].buf)
+    accelerations = np.ndarray((num_bodies, 3), dtype=float, buffer=buffers[2].buf)
+    return positions, masses, accelerations
+
+
+class ParallelSolver:
+    def __init__(self, num_workers=None, tile_size=256, min_bodies=1000, poll_interval=0.1):
+        """
+        Acceleration solver which splits the bodies across worker processes.
+
+        Positions, masses and accelerations live in shared memory, so that per step only the gravitational
+        constant and a completion flag travel through the pipes. The workers are started on the first call
+        and restarted if the number of bodies changes. Instances can be passed as solver to compute_timestep.
+
+        Parameters:
+        num_workers (int, optional): The number of worker processes. Default: the number of CPUs.
+        tile_size (int, optional): The tile size of the kernel used by the workers. Default: 256.
+        min_bodies (int, optional): Below this number of bodies, the accelerations are computed in the calling
+                                    process, since the synchronization would cost more than it saves. Default: 1000.
+        poll_interval (float, optional): The time in seconds between checks whether the workers are alive while
+                                         waiting for them. Default: 0.1.
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.tile_size = tile_size
+        self.min_bodies = min_bodies
+        self.poll_interval = poll_interval
+        self.num_bodies = 0
+        self._buffers = []
+        self._workers = []
+        self._connections = []
+
+    def __call__(self, positions, masses, G):
+        """
+        Computes the accelerations of all bodies.
+
+        Parameters:
+        positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+        masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+        G (float): The gravitational constant.
+
+        Returns:
+        np.ndarray: An array of shape (num_bodies, 3) with the acceleration vector of each body.
+
+        Raises:
+        RuntimeError: If a worker process has died. The remaining workers are stopped; the next call starts new ones.
+        """
+        num_bodies = len(masses)
+        if num_bodies < self.min_bodies:
+            return compute_accelerations_rows(positions, masses, G, 0, num_bodies, self.tile_size)
+        if num_bodies != self.num_bodies:
+            self._start(num_bodies)
+        self._positions[:] = positions
+        self._masses[:] = masses
+        try:
+            for connection in self._connections:
+                connection.send(G)
+            for worker, connection in zip(self._workers, self._connections):
+                # A worker which died would never answer
+                while not connection.poll(self.poll_interval):
+                    if not worker.is_alive():
+                        raise EOFError
+                connection.recv()
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            exit_codes = [worker.exitcode for worker in self._workers if not worker.is_alive()]
+            self.close()
+            raise RuntimeError(f"A worker process of the parallel solver died (exit code {exit_codes}).") from None
+        return self._accelerations.copy()
+
+    def _start(self, num_bodies):
+        self.close()
+        self.num_bodies = num_bodies
+        sizes = [num_bodies * 3 * 8, num_bodies * 8, num_bodies * 3 * 8]
+        self._buffers = [shared_memory.SharedMemory(create=True, size=size) for size in sizes]
+        self._positions, self._masses, self._accelerations = _as_arrays(self._buffers, num_bodies)
+        names = [buffer.name for buffer in self._buffers]
+        bounds = np.linspace(0, num_bodies, min(self.num_workers, num_bodies) + 1).astype(int)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_worker, daemon=True,
+                                             args=(names, num_bodies, start, stop, self.tile_size, child_connection))
+            worker.start()
+            self._workers.append(worker)
+            self._connections.append(parent_connection)
+
+    def close(self):
+        """
+        Stops the workers and releases the shared memory.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._workers, self._connections = [], []
+        if self._buffers:
+            del self._positions, self._masses, self._accelerations
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self._buffers = []
+        self.num_bodies = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# The solvers of compute_accelerations_parallel by their options, see shared_solver
+_shared_solvers = {}
+
+
+def shared_solver(**options):
+    """
+    Returns the ParallelSolver of this process with the given options, created on first use, so that its workers
+    are started once and used by every simulation of the process. The workers are stopped at exit.
+
+    Parameters:
+    **options: Keyword arguments of ParallelSolver, e.g. num_workers.
+
+    Returns:
+    ParallelSolver: The solver.
+    """
+    key = tuple(sorted(options.items()))
+    if key not in _shared_solvers:
+        if not _shared_solvers:
+            atexit.register(close_shared_solvers)
+        _shared_solvers[key] = ParallelSolver(**options)
+    return _shared_solvers[key]
+
+
+def close_shared_solvers():
+    """
+    Stops the workers of all solvers returned by shared_solver.
+    """
+    for solver in _shared_solvers.values():
+        solver.close()
+    _shared_solvers.clear()
@@ -14,11 +14,55 @@ def apply_scaling(x, y, window, navigation_width, field_of_view_AU):
     Returns:
     tuple: A tuple containing the scaled and translated x-coordinate and y-coordinate.
     """
+    scale, (offset_x, offset_y) = view_transform(window, navigation_width, field_of_view_AU)
+    return x*scale + offset_x, y*scale + offset_y
+
+def view_transform(window, navigation_width, field_of_view_AU):
+    """
+    Compute the scaling and translation from A.U. in the view plane to window coordinates.
+
+    Parameters:
+    window (object): An object representing the window with attributes 'width' and 'height'.
+    navigation_width (float): The width of the navigation area in pixels.
+    field_of_view_AU (float): The number of Astronomical Units (A.U.) that fit within the window.
+
+    Returns:
+    tuple: The scale in pixels per A.U. and the offset as a numpy array (offset_x, offset_y).
+    """
     # scale = min(window.width - navigation_width, window.height)/field_of_view_AU # pixels per A.U.
     scale = (window.width - navigation_width)/field_of_view_AU # pixels per A.U.
     offset_x = (window.width - navigation_width)//2 + navigation_width
     offset_y = window.height//2
-    return x*scale + offset_x, y*scale + offset_y
+    return scale, np.array((offset_x, offset_y))
+
+def projection_matrix(v1, v2):
+    """
+    Stack the two vectors spanning the view plane into a projection matrix.
+    IMPORTANT: v1 and v2 must have a norm of 1, see orthogonal_projection.
+
+    Parameters:
+    v1 (numpy array): The first vector defining the plane.
+    v2 (numpy array): The second vector defining the plane.
+
+    Returns:
+    numpy array: A (3, 2) matrix P, such that positions @ P are the coordinates in the plane.
+    """
+    return np.column_stack((v1, v2))
+
+def project_to_view(positions, projection, scale, offset):
+    """
+    Project any number of 3D points to window coordinates with one matrix multiplication.
+
+    Parameters:
+    positions (numpy array): The points in A.U., shape (..., 3), e.g. (samples, bodies, 3).
+    projection (numpy array): The (3, 2) projection matrix, see projection_matrix.
+    scale (float): The scale in pixels per A.U., see view_transform.
+    offset (numpy array): The offset (offset_x, offset_y) in pixels, see view_transform.
+
+    Returns:
+    numpy array: The window coordinates, shape (..., 2).
+    """
+    return positions @ projection * scale + offset
 
 def orthogonal_projection(pos_3d, v1, v2):
     """
@@ -74,4 +118,45 @@ def generate_perpendicular_vectors(v):
     # Normalize the second perpendicular vector
     perp2 = perp2 / np.linalg.norm(perp2)
     
-    return perp1, perp2
\ No newline at end of file
+    return perp1, perp2
+
+def segment_quads(starts, ends, thickness):
+    """
+    Compute the triangles of thick line segments, two triangles (six vertices) per segment.
+    Segments of zero length yield degenerate, invisible triangles.
+
+    Parameters:
+    starts (numpy array): The start points of the segments, shape (n, 2).
+    ends (numpy array): The end points of the segments, shape (n, 2).
+    thickness (float): The width of the segments.
+
+    Returns:
+    numpy array: The vertices of the triangles, shape (n, 6, 2).
+    """
+    direction = ends - starts
+    length = np.linalg.norm(direction, axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        normal = np.where(length > 0, direction[:, ::-1] * np.array([-1, 1]) / length, 0) * (thickness / 2)
+    return np.stack((starts + normal, ends + normal, starts - normal,
+                     ends + normal, ends - normal, starts - normal), axis=1)
+
+def decimation_stride(points, tolerance, spacing=1, max_stride=None):
+    """
+    Estimate the largest stride such that a polyline through every stride-th sample deviates from the
+    polyline through all samples by at most tolerance. The deviation of a chord over s samples is about
+    s^2 / 8 times the second difference of the points per sample, which is estimated from the given points.
+
+    Parameters:
+    points (numpy array): Points of the path in window coordinates, spaced by spacing samples, shape (n, 2).
+    tolerance (float): The admissible deviation in pixels.
+    spacing (int, optional): The number of samples between two of the given points. Default: 1.
+    max_stride (int, optional): The largest stride returned. Default: None (the number of samples spanned).
+
+    Returns:
+    int: The stride, at least spacing.
+    """
+    max_stride = max_stride if max_stride is not None else max(spacing * (len(points) - 1), 1)
+    second_differences = np.diff(points, 2, axis=0)
+    curvature = np.max(np.linalg.norm(second_differences, axis=1)) / spacing**2 if len(second_differences) else 0
+    stride = int(np.sqrt(8 * tolerance / curvature)) if curvature > 0 else max_stride
+    return int(max(min(stride, max_stride), spacing))
@@ -0,0 +1,177 @@
+import struct
+import zlib
+import numpy as np
+
+# A minimal CPU rasterizer for RGB images (np.ndarray of shape (height, width, 3), dtype uint8), so that
+# frames can be rendered without a display or GPU. Coordinates are window coordinates as in pyglet:
+# x to the right and y upwards from the bottom left corner, pixel (column, row from the bottom) covering
+# [column, column + 1) x [row, row + 1). Shapes are anti-aliased by their coverage of the pixel centers.
+
+# 5x7 bitmap font of the printable ASCII characters: five columns per character, bit 0 is the top row
+_FONT_COLUMNS = (
+    '0000000000 00005f0000 0007000700 147f147f14 242a7f2a12 2313086462 3649552250 0005030000 001c224100 '
+    '0041221c00 082a1c2a08 08083e0808 0050300000 0808080808 0060600000 2010080402 3e5149453e 00427f4000 '
+    '4261514946 2141454b31 1814127f10 2745454539 3c4a494930 0171090503 3649494936 064949291e 0036360000 '
+    '0056360000 0814224100 1414141414 0041221408 0201510906 324979413e 7e1111117e 7f49494936 3e41414122 '
+    '7f4141221c 7f49494941 7f09090101 3e41415132 7f0808087f 00417f4100 2040413f01 7f08142241 7f40404040 '
+    '7f0204027f 7f0408107f 3e4141413e 7f09090906 3e4151215e 7f09192946 4649494931 01017f0101 3f4040403f '
+    '1f2040201f 7f2018207f 6314081463 0304780403 6151494543 007f414100 0204081020 0041417f00 0402010204 '
+    '4040404040 0001020400 2054545478 7f48444438 3844444420 384444487f 3854545418 087e090102 0c5252523e '
+    '7f08040478 00447d4000 2040443d00 007f102844 00417f4000 7c04180478 7c08040478 3844444438 7c14141408 '
+    '081414187c 7c08040408 4854545420 043f444020 3c4040207c 1c2040201c 3c4030403c 4428102844 0c5050503c '
+    '4464544c44 0008364100 00007f0000 0041360800 1008081008'
+).split()
+FONT_WIDTH, FONT_HEIGHT = 5, 7
+_GLYPHS = np.array([[[(int(columns[2 * k:2 * k + 2], 16) >> row) & 1 for k in range(FONT_WIDTH)]
+                     for row in range(FONT_HEIGHT)] for columns in _FONT_COLUMNS], dtype=bool)
+
+
+def new_image(width, height, color=(0, 0, 0)):
+    """
+    Returns:
+    np.ndarray: An image of the given size filled with the color, shape (height, width, 3), dtype uint8.
+    """
+    if not any(color):
+        return np.zeros((height, width, 3), dtype=np.uint8)
+    # Filled row by row, which is much faster than broadcasting the color to every pixel
+    row = np.empty((width, 3), dtype=np.uint8)
+    row[:] = color
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = row
+    return image
+
+
+def _pixel_box(image, x_min, x_max, y_min, y_max):
+    # The columns and rows (from the bottom) of the pixels whose centers may lie within the bounds
+    height, width = image.shape[:2]
+    columns = np.arange(max(int(np.floor(x_min)), 0), min(int(np.ceil(x_max)) + 1, width))
+    rows = np.arange(max(int(np.floor(y_min)), 0), min(int(np.ceil(y_max)) + 1, height))
+    return columns, rows
+
+
+def _blend(image, columns, rows, coverage, color):
+    # Blends the color into the pixels (columns and rows from the bottom, broadcast against each other)
+    # with the given coverage in [0, 1]
+    pixels = image[image.shape[0] - 1 - rows, columns]
+    blended = pixels + coverage[..., np.newaxis] * (np.asarray(color, dtype=float) - pixels)
+    image[image.shape[0] - 1 - rows, columns] = np.rint(blended).astype(np.uint8)
+
+
+def draw_disk(image, x, y, radius, color):
+    """
+    Draws a filled circle.
+
+    Parameters:
+    image (np.ndarray): The image, modified in place.
+    x, y (float): The center in window coordinates.
+    radius (float): The radius in pixels.
+    color (tuple): The RGB color.
+
+    Returns:
+    None.
+    """
+    columns, rows = _pixel_box(image, x - radius - 1, x + radius + 1, y - radius - 1, y + radius + 1)
+    if len(columns) == 0 or len(rows) == 0:
+        return
+    distance = np.hypot(columns[np.newaxis] + 0.5 - x, rows[:, np.newaxis] + 0.5 - y)
+    coverage = np.clip(radius + 0.5 - distance, 0, 1)
+    _blend(image, columns[np.newaxis], rows[:, np.newaxis], coverage, color)
+
+
+def draw_polyline(image, points, color, thickness=2):
+    """
+    Draws connected line segments of constant width. Pixels shared by several segments are drawn once.
+
+    Parameters:
+    image (np.ndarray): The image, modified in place.
+    points (np.ndarray): The vertices in window coordinates, shape (num_points, 2).
+    color (tuple): The RGB color.
+    thickness (float, optional): The width of the line in pixels. Default: 2.
+
+    Returns:
+    None.
+    """
+    points = np.asarray(points, dtype=float)
+    height, width = image.shape[:2]
+    half_width = thickness / 2
+    indices, coverages = [], []
+    for (x0, y0), (x1, y1) in zip(points[:-1], points[1:]):
+        columns, rows = _pixel_box(image, min(x0, x1) - half_width - 1, max(x0, x1) + half_width + 1,
+                                   min(y0, y1) - half_width - 1, max(y0, y1) + half_width + 1)
+        if len(columns) == 0 or len(rows) == 0:
+            continue
+        # Distance of the pixel centers from the segment
+        dx, dy = x1 - x0, y1 - y0
+        px, py = columns[np.newaxis] + 0.5 - x0, rows[:, np.newaxis] + 0.5 - y0
+        t = np.clip((px * dx + py * dy) / max(dx * dx + dy * dy, 1e-12), 0, 1)
+        coverage = np.clip(half_width + 0.5 - np.hypot(px - t * dx, py - t * dy), 0, 1)
+        inside = coverage > 0
+        indices.append(((height - 1 - rows[:, np.newaxis]) * width + columns[np.newaxis])[inside])
+        coverages.append(coverage[inside])
+    if not indices:
+        return
+    # The largest coverage of each pixel
+    index, coverage = np.concatenate(indices), np.concatenate(coverages)
+    order = np.argsort(index, kind='stable')
+    index, coverage = index[order], coverage[order]
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    coverage = np.maximum.reduceat(coverage, starts)
+    rows, columns = np.divmod(index[starts], width)
+    _blend(image, columns, height - 1 - rows, coverage, color)
+
+
+def draw_text(image, text, x, y, color=(255, 255, 255), scale=1, anchor_x='left', anchor_y='bottom'):
+    """
+    Draws a single line of text in the built-in 5x7 font. Characters outside of printable ASCII are drawn as '?'.
+
+    Parameters:
+    image (np.ndarray): The image, modified in place.
+    text (str): The text.
+    x, y (float): The anchor point in window coordinates.
+    color (tuple, optional): The RGB color. Default: white.
+    scale (int, optional): The size of a font pixel in pixels. Default: 1.
+    anchor_x (str, optional): 'left', 'center' or 'right'. Default: 'left'.
+    anchor_y (str, optional): 'bottom', 'center' or 'top'. Default: 'bottom'.
+
+    Returns:
+    None.
+    """
+    if not text:
+        return
+    codes = np.array([ord(character) for character in text]) - 32
+    codes = np.where((codes >= 0) & (codes < len(_GLYPHS)), codes, ord('?') - 32)
+    # The glyphs side by side with one column of space in between, rows from the top
+    glyphs = np.pad(_GLYPHS[codes], ((0, 0), (0, 0), (0, 1)))
+    mask = glyphs.transpose(1, 0, 2).reshape(FONT_HEIGHT, -1)[:, :-1]
+    mask = np.kron(mask, np.ones((scale, scale), dtype=bool))
+    text_width, text_height = mask.shape[1], mask.shape[0]
+    left = int(round(x - {'left': 0, 'center': text_width / 2, 'right': text_width}[anchor_x]))
+    bottom = int(round(y - {'bottom': 0, 'center': text_height / 2, 'top': text_height}[anchor_y]))
+
+    columns, rows = _pixel_box(image, left, left + text_width - 1, bottom, bottom + text_height - 1)
+    if len(columns) == 0 or len(rows) == 0:
+        return
+    visible = mask[text_height - 1 - (rows[:, np.newaxis] - bottom), columns[np.newaxis] - left]
+    _blend(image, columns[np.newaxis], rows[:, np.newaxis], visible.astype(float), color)
+
+
+def encode_png(image, compression=1):
+    """
+    Encodes an image as PNG (8-bit RGB, no filter), with the standard library only.
+
+    Parameters:
+    image (np.ndarray): The image, shape (height, width, 3), dtype uint8.
+    compression (int, optional): The zlib compression level from 0 to 9. Default: 1 (fast).
+
+    Returns:
+    bytes: The PNG file.
+    """
+    height, width = image.shape[:2]
+    scanlines = np.zeros((height, 1 + 3 * width), dtype=np.uint8)  # each row starts with its filter type 0
+    scanlines[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) \
+        + chunk(b'IDAT', zlib.compress(scanlines.tobytes(), compression)) + chunk(b'IEND', b'')
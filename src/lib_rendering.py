@@ -0,0 +1,79 @@
+import numpy as np
+import pyglet
+from pyglet.gl import GL_POINTS, GL_TRIANGLES, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA
+from .lib_tails import TailSegments, ring_runs
+
+
+class ParticleCloud:
+    def __init__(self, num_particles, color=(120, 120, 120), batch=None, group=None):
+        """
+        Draws a large number of particles as single pixels. The vertex data is written in place with numpy,
+        so that no Python objects are created per particle.
+
+        Parameters:
+        num_particles (int): The number of particles.
+        color (tuple, optional): The RGB color of the particles. Default: (120, 120, 120).
+        batch (pyglet.graphics.Batch, optional): The batch to add the particles to. Default: None.
+        group (pyglet.graphics.Group, optional): The parent group. Default: None.
+        """
+        program = pyglet.shapes.get_default_shader()
+        self._group = pyglet.shapes.ShapeBase.group_class(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, program, group)
+        self._vertex_list = program.vertex_list(num_particles, GL_POINTS, batch, self._group,
+                                                position=('f', np.zeros(2 * num_particles)),
+                                                colors=('Bn', (*color, 255) * num_particles),
+                                                translation=('f', np.zeros(2 * num_particles)))
+
+    def update(self, x, y):
+        """
+        Moves the particles to new positions in window coordinates.
+
+        Parameters:
+        x (np.ndarray): The x-coordinates of the particles.
+        y (np.ndarray): The y-coordinates of the particles.
+
+        Returns:
+        None.
+        """
+        position = np.ctypeslib.as_array(self._vertex_list.position)  # the getter marks the data for upload
+        position[0::2] = x
+        position[1::2] = y
+
+    def delete(self):
+        self._vertex_list.delete()
+
+
+class TailRenderer(TailSegments):
+    def __init__(self, capacity, color, thickness=2, batch=None, group=None):
+        """
+        Draws the tail of a body, i.e. its newest points, at most capacity of them, in window coordinates.
+
+        The vertex list is allocated once with six vertices per segment slot, see lib_tails.TailSegments for
+        the layout of the slots. The GPU upload is limited to the changed slots.
+
+        Parameters:
+        capacity (int): The maximum number of points of the tail.
+        color (tuple): The RGB color of the tail.
+        thickness (float, optional): The width of the tail in pixels. Default: 2.
+        batch (pyglet.graphics.Batch, optional): The batch to add the tail to. Default: None.
+        group (pyglet.graphics.Group, optional): The parent group. Default: None.
+        """
+        super().__init__(capacity, thickness)
+        num_vertices = 6 * self.capacity
+        program = pyglet.shapes.get_default_shader()
+        self._group = pyglet.shapes.ShapeBase.group_class(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, program, group)
+        self._vertex_list = program.vertex_list(num_vertices, GL_TRIANGLES, batch, self._group,
+                                                position=('f', np.zeros(2 * num_vertices)),
+                                                colors=('Bn', (*color[:3], 255) * num_vertices),
+                                                translation=('f', np.zeros(2 * num_vertices)))
+
+    def _write(self, first_slot, quads):
+        # Writes consecutive segment slots (wrapping around) and marks only those for upload
+        buffer = self._vertex_list.domain.attribute_names['position'].buffer
+        for slot, offset, length in ring_runs(first_slot, len(quads), self.capacity):
+            first_vertex = self._vertex_list.start + 6 * slot
+            region = np.ctypeslib.as_array(buffer.get_region(first_vertex, 6 * length))
+            region[:] = quads[offset:offset + length].ravel()
+            buffer.invalidate_region(first_vertex, 6 * length)
+
+    def delete(self):
+        self._vertex_list.delete()
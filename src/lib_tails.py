@@ -0,0 +1,239 @@
+import numpy as np
+from .lib_plotting import segment_quads, project_to_view, decimation_stride
+
+# The bookkeeping of the tails of the bodies, independent of pyglet: which samples are drawn, and which segment
+# slots of the vertex data change. Drawing is left to lib_rendering.TailRenderer, so that this module can be
+# imported and tested without a display.
+
+
+def ring_runs(first_slot, count, capacity):
+    """
+    Splits consecutive slots of a ring, starting at first_slot and wrapping around, into contiguous runs.
+
+    Parameters:
+    first_slot (int): The first slot, in [0, capacity).
+    count (int): The number of slots, at most capacity.
+    capacity (int): The number of slots of the ring.
+
+    Returns:
+    list: One tuple (slot, offset, length) per run: the length slots from slot on take the items
+          offset:offset + length of the consecutive ones.
+    """
+    first_length = min(count, capacity - first_slot)
+    runs = [(first_slot, 0, first_length)] if first_length > 0 else []
+    if count > first_length:
+        runs.append((0, first_length, count - first_length))
+    return runs
+
+
+class TailSegments:
+    def __init__(self, capacity, thickness=2):
+        """
+        The segments of a tail through its newest points, at most capacity of them, in window coordinates.
+
+        There is one segment slot per point: the k-th appended point occupies ring slot k % capacity, and its
+        slot holds the segment from that point to the next one. On update, only the segments touching newly
+        appended points are rewritten, and the segment which would connect the newest to the oldest point is
+        hidden. Subclasses store the segments, see _write.
+
+        Parameters:
+        capacity (int): The maximum number of points of the tail.
+        thickness (float, optional): The width of the tail in pixels. Default: 2.
+        """
+        self.capacity = int(capacity)
+        self.thickness = thickness
+        self._num_drawn = 0  # number of appended points already drawn
+        self._newest = None  # the newest point drawn
+
+    def update(self, points, num_appended):
+        """
+        Appends the points added since the last call to the tail.
+
+        Parameters:
+        points (np.ndarray): The newest points in window coordinates, shape (n, 2). They must include the
+                             points appended since the last call plus the one before (if there was one).
+        num_appended (int): The total number of points appended, including the newest one.
+
+        Returns:
+        None.
+        """
+        if self.capacity < 2:
+            return
+        num_new = num_appended - self._num_drawn
+        if num_new < 0 or num_new >= self.capacity - 1:
+            self.redraw(points, num_appended)
+            return
+        if num_new == 0:
+            return
+        # Segments ending at the new points (and starting at the previous newest point, if any)
+        points = points[-(num_new + 1):] if self._num_drawn > 0 else points[-num_new:]
+        first_slot = (num_appended - len(points)) % self.capacity
+        quads = segment_quads(points[:-1], points[1:], self.thickness)
+        self._write(first_slot, quads)
+        # The segment from the newest point to the oldest one must not be drawn
+        self._write((num_appended - 1) % self.capacity, np.repeat(points[-1:], 6, axis=0)[np.newaxis])
+        self._num_drawn = num_appended
+        self._newest = points[-1]
+
+    def redraw(self, points, num_appended):
+        """
+        Rewrites all segments, e.g. after the history was cleared or the view changed.
+
+        Parameters:
+        points (np.ndarray): The newest points in window coordinates, shape (n, 2). Only the last capacity
+                             points are drawn.
+        num_appended (int): The total number of points appended, including the newest one.
+
+        Returns:
+        None.
+        """
+        if self.capacity < 2:
+            return
+        points = points[-self.capacity:]
+        quads = np.zeros((self.capacity, 6, 2))
+        if len(points) >= 2:
+            first_slot = (num_appended - len(points)) % self.capacity
+            slots = (first_slot + np.arange(len(points) - 1)) % self.capacity
+            quads[slots] = segment_quads(points[:-1], points[1:], self.thickness)
+        self._write(0, quads)
+        self._num_drawn = num_appended
+        self._newest = points[-1] if len(points) > 0 else None
+
+    def set_head(self, point):
+        """
+        Draws a segment from the newest point to the given one, e.g. to the current position of a body whose
+        tail has fewer points than samples. It is replaced by the next update.
+
+        Parameters:
+        point (np.ndarray): The end point of the segment in window coordinates.
+
+        Returns:
+        None.
+        """
+        if self.capacity < 2 or self._newest is None:
+            return
+        quads = segment_quads(self._newest[np.newaxis], np.asarray(point, dtype=float)[np.newaxis], self.thickness)
+        self._write((self._num_drawn - 1) % self.capacity, quads)
+
+    def _write(self, first_slot, quads):
+        """
+        Stores the segments of consecutive slots, see ring_runs.
+
+        Parameters:
+        first_slot (int): The slot of the first segment.
+        quads (np.ndarray): The vertices of the segments, shape (num_slots, 6, 2), see lib_plotting.segment_quads.
+
+        Returns:
+        None.
+        """
+        raise NotImplementedError
+
+
+class DecimatedTail:
+    def __init__(self, length, make_renderer, tolerance=0.5, max_points=1024):
+        """
+        Draws the tail of a body through every stride-th sample of its history, ending at its newest sample.
+        The stride is chosen on every redraw (e.g. when zooming, and whenever the history has doubled while it is
+        shorter than the tail), such that the tail deviates from the path through all samples by at most
+        tolerance pixels, and such that it has at most max_points points.
+        Samples are selected by their number since the history was cleared, so that the same samples stay
+        selected while new ones are appended.
+
+        Parameters:
+        length (int): The number of samples spanned by the tail.
+        make_renderer (callable): Creates the renderer of the points for a given capacity, e.g. a
+                                  lib_rendering.TailRenderer with the color of the body.
+        tolerance (float, optional): The admissible deviation in pixels. Default: 0.5.
+        max_points (int, optional): The maximum number of points of the tail. Default: 1024.
+        """
+        self.length = max(int(length), 1)
+        self._make_renderer = make_renderer
+        self.tolerance = tolerance
+        self.max_points = max(int(max_points), 2)
+        self.stride = 1
+        self._renderer = None
+        self._num_appended = 0  # number of samples appended when the tail was last drawn
+        self._num_probed = 0  # number of samples the stride was chosen from
+        self._last_kept_point = None  # the newest selected sample in window coordinates
+
+    @property
+    def num_points(self):
+        """
+        The capacity of the tail in points, at most max_points + 1.
+        """
+        return self._renderer.capacity if self._renderer is not None else 0
+
+    def redraw(self, samples, num_appended, view):
+        """
+        Chooses the stride for the view and rewrites the whole tail.
+
+        Parameters:
+        samples (np.ndarray): The newest positions of the body, shape (n, 3), see update.
+        num_appended (int): The total number of samples appended, including the newest one.
+        view (tuple): The projection matrix, scale and offset, see lib_plotting.project_to_view.
+
+        Returns:
+        None.
+        """
+        samples = samples[-self.length:]
+        self._num_probed = len(samples)
+        # The curvature is estimated from at most max_points samples
+        spacing = -(-self.length // self.max_points)
+        probe = project_to_view(samples[::-1][::spacing], *view)
+        self.stride = decimation_stride(probe, self.tolerance, spacing, max_stride=self.length)
+        capacity = self.length // self.stride + 1
+        if self._renderer is None or self._renderer.capacity != capacity:
+            if self._renderer is not None:
+                self._renderer.delete()
+            self._renderer = self._make_renderer(capacity)
+
+        first = (len(samples) - num_appended) % self.stride  # row of the oldest selected sample
+        points = project_to_view(samples[first::self.stride], *view)
+        self._renderer.redraw(points, self._num_selected(num_appended))
+        self._last_kept_point = points[-1] if len(points) > 0 else None
+        self._num_appended = num_appended
+        self._draw_head(samples, num_appended, view)
+
+    def update(self, samples, num_appended, view):
+        """
+        Appends the selected samples among the new ones to the tail.
+
+        Parameters:
+        samples (np.ndarray): The history of positions of the body, shape (n, 3), newest last. It must include
+                              all samples appended since the last call, and the whole tail in case of a redraw.
+        num_appended (int): The total number of samples appended, including the newest one.
+        view (tuple): The projection matrix, scale and offset, unchanged since the last redraw.
+
+        Returns:
+        None.
+        """
+        num_new = num_appended - self._num_appended
+        grown = self._num_probed < self.length and min(len(samples), self.length) >= 2 * self._num_probed
+        if self._renderer is None or num_new < 0 or num_new > len(samples) or grown:
+            self.redraw(samples, num_appended, view)
+            return
+        if num_new == 0:
+            return
+        samples = samples[-num_new:]
+        first = (num_new - num_appended) % self.stride
+        points = project_to_view(samples[first::self.stride], *view)
+        if len(points) > 0:
+            if self._last_kept_point is not None:
+                points = np.concatenate((self._last_kept_point[np.newaxis], points))
+            self._renderer.update(points, self._num_selected(num_appended))
+            self._last_kept_point = points[-1]
+        self._num_appended = num_appended
+        self._draw_head(samples, num_appended, view)
+
+    def _num_selected(self, num_appended):
+        # Number of selected samples among the first num_appended ones (numbers 0, stride, 2 * stride, ...)
+        return (num_appended - 1) // self.stride + 1 if num_appended > 0 else 0
+
+    def _draw_head(self, samples, num_appended, view):
+        if len(samples) > 0 and (num_appended - 1) % self.stride != 0:
+            self._renderer.set_head(project_to_view(samples[-1], *view))
+
+    def delete(self):
+        if self._renderer is not None:
+            self._renderer.delete()
+            self._renderer = None
@@ -1,40 +1,61 @@
-import pyglet
-import random
+import time
+start_time = time.perf_counter()  # The start of the application, for the startup timer
 import numpy as np
 import datetime
-import sys
-import threading
-import time
+import functools
+import shutil
+import tempfile
+import types
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from .utils.lazy_import import lazy_import
 from .utils.resource_path import resource_path
-from .classes import CelestialBody
 from .lib_calculation import *
 from .lib_plotting import *
+from .simulation import Simulation
+from .jobs import JumpScheduler
+from .playback import TrajectoryPlayer
+from .profiler import FrameProfiler, StartupTimer
+from .ring_buffer import RingBuffer
+from .lib_tails import DecimatedTail
 from .create_celestial_bodies import *
 from .utils.read_config import read_config
 
+# pyglet is executed on first use (by build_view, or a handler), which keeps it out of the import of this module
+pyglet = lazy_import('pyglet')
+
 ##################### Units and Constants ########################
 
-# For constants, please refer to create_celestial_bodies.py
+# For constants, including the gravitational constant G, please refer to create_celestial_bodies.py
 
 # Chosen units for computation
 # 1 m0 = 1 sun mass = 1
 # 1 A.U. (astronomical unit = 1
 # 1 day = 1
-G = 2.95912208286e-4  # Gravitational constant [AU^3 sunmass^-1 day^-2]
 
 ##################### Variables & Parameters ########################
 
 # # Simulation parameters
+which_bodies = 'inner'  # Take the inner solar system (plus Jupiter) for now, see create_celestial_bodies
 t_step = 1  # Time step of simulation in days
+integrator = 'euler'  # Time integration scheme, see lib_integration.INTEGRATORS
+num_asteroids = 0  # Number of massless particles in the asteroid belt (0: no belt)
+physics_in_process = False  # Advance the simulation in a separate process, decoupled from the frame rate
+target_accuracy = None  # Admissible relative energy drift; if set, the integrator and step are tuned to it
+tuning_horizon = 3650  # Time span in days the tuned configuration must keep the accuracy for
+jump_mode = 'integrate'  # 'integrate', or 'kepler' for instant date jumps on two-body orbits (previews)
+trajectory_file = None  # Directory of a trajectory written by simulate.py to play back instead of simulating
+playback_years = None  # If set (and trajectory_file is not), this many years are simulated at start and played back
 
 # # View parameters
-global current_date
 window_width = 1000
 window_height = 600
 navigation_width = 100  # Width of the navigation area in pixels
 field_of_view_AU = 12  # Size of the field of view in A.U.
 viewplane_normal_vector = np.array((0, 1, 2 / 3))  # Normal vector of the projection plane
 viewplane_vector1, viewplane_vector2 = generate_perpendicular_vectors(viewplane_normal_vector)
+view_projection = projection_matrix(viewplane_vector1, viewplane_vector2)  # (3, 2) matrix to the view plane
+zoom_factor = 1.1  # Change of the field of view per scroll step
+rotation_per_pixel = 0.005  # Rotation of the view plane in radians per pixel dragged
 
 # # Animation parameters
 global is_animating, speed, steps_per_frame
@@ -42,20 +63,113 @@ is_animating = True
 speed = 60
 steps_per_frame = 1  # Number of steps taken per frame
 rel_history_length = 2/3  # Length of tail in orbital periods
+tail_tolerance = 0.5  # Admissible deviation of the drawn tails from the simulated paths in pixels
+max_tail_points = 1024  # Maximum number of points of a tail; the deviation may be larger to respect this
+
+# # Instrumentation
+show_profiler = False  # Show the frame timings above info label 3 (toggle with F3)
+profiler_trace_file = None  # CSV or JSON file to which the frame timings are written on exit (and with F4)
+profiler = FrameProfiler(['physics', 'history', 'refresh', 'draw'], target_frame_time=1 / speed)
+startup = StartupTimer(start_time)  # Phases of the start until the first frame, printed once it is drawn
 
 # # Variables for setting an arbitrary date
 global computation_progress  # When calculating to a target date
 computation_progress = 0
+jump_scheduler = JumpScheduler()  # Runs the date jumps in the background
+jump_job = None  # The running date jump, if any
 target_date_error = None
+checkpoint_interval = 365  # Spacing of the system snapshots taken while jumping to a date, in days
+checkpoint_capacity = 256  # Number of snapshots held in memory
+checkpoint_directory = None  # Directory for persistent snapshots (None: memory only)
+
+##################### Simulation ########################
+# The simulation state lives in simulation.Simulation, which does not depend on pyglet.
+# It is created on first use, so that importing this module is cheap.
+#########################################################
+
+simulation = None
+physics = None  # PhysicsProcess if physics_in_process, see run()
+num_received_steps = 0  # Step counter of the newest frame received from the physics process
+player = None  # TrajectoryPlayer in playback mode, see load_playback()
+precomputed_directory = None  # Temporary directory of the trajectory precomputed for playback
+
+def get_simulation():
+    """
+    Returns the simulation, creating it on first use.
+
+    Returns:
+    Simulation: The simulation shown in the view.
+    """
+    global simulation
+    if simulation is None:
+        simulation = Simulation(which_bodies, t_step=t_step, integrator=integrator,
+                                num_asteroids=num_asteroids if player is None else 0,
+                                checkpoint_interval=checkpoint_interval, checkpoint_capacity=checkpoint_capacity,
+                                checkpoint_directory=checkpoint_directory)
+        simulation.monitor_conservation()
+        if target_accuracy is not None and player is None:
+            result = simulation.tune(target_accuracy, tuning_horizon)
+            print(f"Tuned to {result['integrator']} with steps of {result['t_step']} days "
+                  f"(energy drift {result['energy_drift']:.1e})")
+    return simulation
+
+##################### Playback ########################
+# With trajectory_file or playback_years, the animation plays back a precomputed trajectory instead of
+# simulating: each frame moves the player by any number of days (also backwards), and the bodies and their
+# tails are interpolated from the trajectory. The simulation only holds the bodies shown.
+#########################################################
+
+def load_playback():
+    """
+    Opens the trajectory to play back, or simulates it first to a temporary directory (see playback_years),
+    and selects the bodies of the trajectory for the simulation. Called by run() before the view is built.
+
+    Returns:
+    TrajectoryPlayer: The player, at the start of the trajectory.
+    """
+    global player, precomputed_directory, which_bodies
+    directory = trajectory_file
+    if directory is None:
+        from .simulate import run_simulation  # not needed otherwise
+        precomputed_directory = directory = tempfile.mkdtemp(prefix='solar-system-trajectory-')
+        start_date = create_celestial_bodies(which_bodies)[1]
+        end_date = start_date + datetime.timedelta(days=round(playback_years * 365.25))
+        print(f"Simulating {playback_years} years for playback...")
+        run_simulation(directory, end_date, which=which_bodies, t_step=t_step, integrator=integrator)
+    player = TrajectoryPlayer(directory, rate=steps_per_frame * t_step, spacing=t_step)
+    for which in (which_bodies, 'inner', 'outer', 'all'):
+        if [body.name for body in create_celestial_bodies(which)[0]] == player.trajectory.names:
+            which_bodies = which
+            break
+    else:
+        raise ValueError(f"The bodies of the trajectory {player.trajectory.names} are not one of the subsets "
+                         f"'inner', 'outer' or 'all' of the input data.")
+    return player
+
+def show_playback_frame(previous_days=None):
+    """
+    Moves the bodies to the time of the player and samples their tails up to it. The new samples are appended
+    when moving forwards by less than the length of the tails, otherwise (seeking, playing backwards) the tails
+    are sampled anew.
 
-##################### Planetary data ########################
-# These units are to be used for inputs to CelestialBody:
-# masses in sun masses
-# positions in astronomical units (A.U.)
-# velocities in A.U./day
-#############################################################
+    Parameters:
+    previous_days (float, optional): The time shown before, in days since the start of the trajectory.
+                                     Default: None (unknown).
 
-celestial_bodies, current_date = create_celestial_bodies('inner')  # Take the inner solar system (plus Jupiter) for now
+    Returns:
+    None.
+    """
+    simulation = get_simulation()
+    with profiler.measure('physics'):
+        simulation.set_state(*player.state())
+        simulation.current_date = player.date
+    with profiler.measure('history'):
+        span = history.capacity * player.spacing
+        if previous_days is not None and len(history) > 0 and 0 <= player.days - previous_days < span:
+            history.extend(player.history(player.history_times(since=previous_days)))
+        else:
+            history.clear()
+            history.extend(player.history(player.history_times(since=player.days - span)))
 
 #################### Helper Functions ########################
 
@@ -64,47 +178,125 @@ def position_in_view(position):
     Calculates the position of a celestial body in the view.
 
     Parameters:
-    position (numpy.ndarray): The 3D position of the celestial body.
+    position (numpy.ndarray): The 3D position of the celestial body, or an array of shape (n, 3) with several positions.
 
     Returns:
     tuple: A tuple (x, y) representing the 2D position of the celestial body in the view.
+           For several positions, x and y are arrays.
     """
-    relative_position = position - celestial_bodies[0].position  # center the view w.r.t. the Sun
-    # Projection
-    xproj, yproj = orthogonal_projection(relative_position, viewplane_vector1, viewplane_vector2)
-    # Scaling
-    x, y = apply_scaling(xproj, yproj, window, navigation_width, field_of_view_AU)
-    return (x, y)
+    relative_position = position - get_simulation().bodies[0].position  # center the view w.r.t. the Sun
+    xy = project_to_view(relative_position, view_projection, *get_view_transform())
+    return (xy[..., 0], xy[..., 1])
+
+def get_view_transform():
+    """
+    Returns:
+    tuple: The scale in pixels per A.U. and the offset in pixels of the view, see lib_plotting.view_transform.
+           The default window size is used as long as the window has not been created.
+    """
+    view_window = window if window is not None else types.SimpleNamespace(width=window_width, height=window_height)
+    return view_transform(view_window, navigation_width, field_of_view_AU)
+
+def set_viewplane(normal_vector):
+    """
+    Sets the normal vector of the projection plane. The tails are redrawn on the next refresh.
+
+    Parameters:
+    normal_vector (numpy.ndarray): The new normal vector (any norm except zero).
+
+    Returns:
+    None.
+    """
+    global viewplane_normal_vector, viewplane_vector1, viewplane_vector2, view_projection
+    viewplane_normal_vector = np.asarray(normal_vector, dtype=float)
+    viewplane_vector1, viewplane_vector2 = generate_perpendicular_vectors(viewplane_normal_vector)
+    view_projection = projection_matrix(viewplane_vector1, viewplane_vector2)
+
+def relative_positions():
+    """
+    Returns:
+    numpy.ndarray: The positions of all celestial bodies relative to the Sun, shape (num_bodies, 3).
+    """
+    simulation = get_simulation()
+    return np.array([body.position for body in simulation.bodies]) - simulation.bodies[0].position
 
 # Perform simulation to target date without animation
-def do_computation(target_date):
+def do_computation(target_date, integrator=None, t_step=None):
     """
-    Performs the computation to reach the target date. Aimed to run asynchronously.
+    Starts the computation to reach the target date in the background, superseding a running one.
+    The animation is paused, and the result is swapped in by finish_computation once it is complete.
+    With jump_mode 'kepler', the bodies are moved on two-body orbits instead, which takes no noticeable
+    time, and the result is swapped in right away.
 
     Parameters:
     target_date (datetime.date): The date to which the computation is performed.
+    integrator (str, optional): The time integration scheme. Default: the integrator of the animation.
+    t_step (float, optional): The maximum time step in days. The actual step is chosen such that
+                              the target date is hit exactly. Default: the time step of the animation.
 
     Returns:
-    None.
+    jobs.JumpJob: The job of the computation (None with jump_mode 'kepler').
     """
-    global current_date, computation_progress, is_animating
+    global computation_progress, is_animating, jump_job
     is_animating = False
     pyglet.clock.unschedule(animate)
+    update_physics_rate()
+    if jump_mode == 'kepler':
+        jump_scheduler.cancel()
+        jump_job = None
+        pyglet.clock.unschedule(finish_computation)
+        result = get_simulation().copy()
+        result.kepler_jump_to(target_date)
+        apply_computation(result)
+        return None
     print("Calculating to target date ...")
 
-    delta_days = (target_date - current_date).days
-    t_step = 1 if target_date > current_date else -1
-    delta_days = abs(delta_days)
-    
-    progress_step = 0.01
-    next_progress_to_report = progress_step  # shift register for computation_progress
-    for k in range(delta_days):
-        current_date = compute_timestep(celestial_bodies, G, current_date, t_step=t_step)
-        if (k + 1) / delta_days >= next_progress_to_report:
-            computation_progress = next_progress_to_report
-            next_progress_to_report += progress_step
+    job = None
+
+    def report_progress(fraction):
+        global computation_progress
+        if jump_job is job:  # ignore a superseded job
+            computation_progress = fraction
+
     computation_progress = 0
-    pyglet.clock.schedule_once(refresh_plot, 0.1) 
+    job = jump_job = jump_scheduler.submit(get_simulation(), target_date, integrator=integrator, t_step=t_step,
+                                           progress=report_progress, tolerance=target_accuracy)
+    pyglet.clock.unschedule(finish_computation)
+    pyglet.clock.schedule_interval(finish_computation, 0.05)
+    return job
+
+def finish_computation(dt):
+    """
+    Swaps in the result of the date jump once it is complete. Runs in the main thread, so that the view
+    never sees a partially computed state.
+    """
+    global computation_progress, jump_job, target_date_error
+    if jump_job is None or not jump_job.done():
+        return
+    pyglet.clock.unschedule(finish_computation)
+    job, jump_job = jump_job, None
+    computation_progress = 0
+    try:
+        result = job.result()
+    except CancelledError:
+        return
+    except Exception as e:
+        target_date_error = f"Calculation failed: {e}"
+        return
+    apply_computation(result)
+
+def apply_computation(result):
+    """
+    Replaces the shown simulation by the result of a date jump and clears the tails.
+    """
+    global simulation
+    if physics is not None:
+        physics.load(result)
+    else:
+        simulation = result
+    if history is not None:
+        history.clear()
+    pyglet.clock.schedule_once(refresh_plot, 0.1)
 
     
 def analyze_invalid_target_date_input(year, month, day):
@@ -130,71 +322,68 @@ def analyze_invalid_target_date_input(year, month, day):
         return "Day must be a number"
     return f"Day ({int(day)}) does not exist in month {int(month)}/{int(year)}"
 
+def load_images():
+    """
+    Starts decoding the images of the buttons in background threads.
+
+    Returns:
+    dict: The futures of the pyglet images by their name in the configuration.
+    """
+    images = read_config()['images']
+    executor = ThreadPoolExecutor(max_workers=len(images), thread_name_prefix='image')
+    futures = {name: executor.submit(pyglet.image.load, resource_path(image['path'])) for name, image in images.items()}
+    executor.shutdown(wait=False)
+    return futures
+
 ######################### VIEW ###############################
 # Unfortunately, pyglet architecture does not
 # fully support outsourcing the following code section.
 # This is why I decided to leave everything here
 ##############################################################
 
-############## Basic structure of the View ###################
-
-
-# Window
-window = pyglet.window.Window(window_width, window_height, caption='Solar System Animation')
-
-# Main batch component
-main_batch = pyglet.graphics.Batch()
-
-# A Frame instance to hold all widgets, and provide spacial hashing to avoid sending all the Window events to every widget.
-frame = pyglet.gui.Frame(window, order=4)
-
-##################### Initialization of View elements #########
-
+# View elements, created by build_view()
+window = None
+main_batch = None
+frame = None
+particle_cloud = None
+date_label = None
+play_pause_button = None
+info_label1 = None
+year_entry_label = None
+year_entry = None
+month_entry_label = None
+month_entry = None
+day_entry_label = None
+day_entry = None
+set_date_button = None
+info_label2 = None
+speed_entry_label = None
+speed_entry = None
+set_speed_button = None
+steps_per_frame_entry_label = None
+steps_per_frame_entry = None
+set_steps_per_frame_button = None
+info_label3 = None
+profiler_label = None
 circles = []
 labels = []
-histories = []
+history = None  # Positions relative to the Sun in A.U. of all bodies, shape (samples, num_bodies, 3)
 tails = []
-for i, body in enumerate(celestial_bodies):
-    # color = tuple(np.random.randint(0, 255, (3)))
-
-    # Circles
-    circle = pyglet.shapes.Circle(x=0, y=0, radius=body.radius_px, color=body.color, batch=main_batch)
-    circles.append(circle)
-
-    # Labels
-    label = pyglet.text.Label(body.name,
-                          font_name='Roboto',
-                          font_size=12,
-                          x=0, y=0,
-                          anchor_x='center', anchor_y='bottom',
-                          batch=main_batch)
-    labels.append(label)
-    
-    # Histories and tails
-    histories.append([])
-    tails.append(None)
-
-# Current date label
-date_label = pyglet.text.Label("Date: " + current_date.strftime("%d %B, %Y"),
-                          font_name='Roboto', font_size=12,
-                          x=navigation_width + 10, y=window.height - 20,
-                          anchor_x='left', anchor_y='top',
-                          batch=main_batch)
-
-##################### Navigation UI #####################
-x_margin = 10  # Margin to the left of the screen
-
+drawn_view = None  # View parameters the tails were drawn with; the tails are redrawn when they change
 
 # # Callback functions
 def press_play_pause_button_handler():
-    global is_animating, computation_progress
+    global is_animating
     if is_animating:
         pyglet.clock.unschedule(animate)
     else:
-        if computation_progress > 0:
+        if jump_job is not None:
             return
+        if player is not None and player.at_end:
+            player.rewind()  # play again
         pyglet.clock.schedule_interval(animate, 1 / speed)
     is_animating = not is_animating
+    update_physics_rate()
 
 
 def press_set_date_button_handler():
@@ -208,146 +397,255 @@ def press_set_date_button_handler():
         return
         
     if target_date_error is None:
-        threading.Thread(target=do_computation, args=([target_date])).start()
-        for history in histories:
-            history.clear()
+        if player is not None:
+            # Seeking within the trajectory takes no time
+            if not player.seek_date(target_date):
+                target_date_error = "Date outside of the trajectory"
+            show_playback_frame()
+            refresh_plot(0)
+        else:
+            do_computation(target_date)
 
         
 def set_speed_handler(text):
     global speed
     if text.isnumeric() and 1 <= float(text) <= 60:
         speed = float(text)
+        profiler.target_frame_time = 1 / speed
         pyglet.clock.unschedule(animate)
         pyglet.clock.schedule_interval(animate, 1 / speed)
+        update_physics_rate()
     return speed
         
 def set_steps_per_frame_handler(text):
     global steps_per_frame
+    if player is not None:
+        # Played back at any rate, also backwards
+        try:
+            rate = float(text)
+        except ValueError:
+            return player.rate
+        if rate != 0 and np.isfinite(rate):
+            player.rate = rate
+            if steps_per_frame_entry is not None:
+                steps_per_frame_entry.text = f"{rate:g}"
+        return player.rate
     if text.isnumeric() and 1 <= float(text) <= 50:
         val = int(round(float(text)))
         steps_per_frame = val
-        steps_per_frame_entry.text = str(val)
+        if steps_per_frame_entry is not None:
+            steps_per_frame_entry.text = str(val)
+        update_physics_rate()
     return steps_per_frame
 
-# # Widgets and labels
-
-
-# Play/Pause button
-path = resource_path(config['images']['play-pause']['path'])
-img_play_pause = pyglet.image.load(path)
-y_play_pause = window.height - 50
-play_pause_button = pyglet.gui.PushButton(x=(navigation_width - 70) // 2, y=y_play_pause,
-                                          pressed=img_play_pause, depressed=img_play_pause, hover=img_play_pause,
-                                          batch=main_batch)
-play_pause_button.set_handler('on_press', press_play_pause_button_handler)
-frame.add_widget(play_pause_button)
-
-# Info label 1
-y_info_label1 = y_play_pause - 15
-info_label1 = pyglet.text.Label("",
-                          font_name='Roboto', font_size=11,
-                          x=x_margin, y=y_info_label1,
-                          anchor_x='left', anchor_y='top', align="center",
-                          multiline=True, width=navigation_width - x_margin,
-                          batch=main_batch)
-
-# Text entries for year, month, day
-y_year = y_info_label1 - 70
-year_entry_label = pyglet.text.Label("Year",
-                                     x=x_margin, y=y_year, font_size=11,
-                                     batch=main_batch, anchor_x='left', anchor_y='bottom',
-                                     color=(255, 255, 255, 255))
-year_entry = pyglet.gui.TextEntry(str(current_date.year),
-                                  x=(navigation_width - x_margin) // 2 + x_margin, y=y_year,
-                                  width=40, batch=main_batch)
-frame.add_widget(year_entry)
-
-y_month = y_year - 30
-month_entry_label = pyglet.text.Label("Month",
-                                     x=x_margin, y=y_month, font_size=11,
-                                     batch=main_batch, anchor_x='left', anchor_y='bottom',
-                                     color=(255, 255, 255, 255))
-month_entry = pyglet.gui.TextEntry(str(current_date.month),
-                                   x=(navigation_width - x_margin) // 2 + x_margin, y=y_month,
-                                   width=40, batch=main_batch)
-frame.add_widget(month_entry)
-
-y_day = y_month - 30
-day_entry_label = pyglet.text.Label("Day",
-                                     x=x_margin, y=y_day, font_size=11,
-                                     batch=main_batch, anchor_x='left', anchor_y='bottom',
-                                     color=(255, 255, 255, 255))
-day_entry = pyglet.gui.TextEntry(str(current_date.day),
-                                 x=(navigation_width - x_margin) // 2 + x_margin, y=y_day,
-                                 width=40, batch=main_batch)
-frame.add_widget(day_entry)
-
-# Set Date button
-y_set_date_button = y_day - 50
-path = resource_path(config['images']['set-date']['path'])
-img_set_date = pyglet.image.load(path)
-set_date_button = pyglet.gui.PushButton(x=(navigation_width - 70) // 2, y=y_set_date_button,
-                                          pressed=img_set_date, depressed=img_set_date, hover=img_set_date,
-                                          batch=main_batch)
-set_date_button.set_handler('on_press', press_set_date_button_handler)
-frame.add_widget(set_date_button)
-
-# Info label 2
-y_info_label2 = y_set_date_button - 15
-info_label2 = pyglet.text.Label("",
-                          font_name='Roboto', font_size=11,
-                          x=x_margin, y=y_info_label2,
-                          anchor_x='left', anchor_y='top', align="center",
-                          multiline=True, width=navigation_width - x_margin,
-                          batch=main_batch)
-
-# # Text entries for speed, number of steps/days per frame
-# Speed
-y_speed = y_info_label2 - 60
-width_of_entry = 40
-path = resource_path(config['images']['set-parameter']['path'])
-img_set_parameter = pyglet.image.load(path)
-
-speed_entry_label = pyglet.text.Label("Speed (1-60)",
-                                     x=x_margin, y=y_speed, font_size=11,
-                                     batch=main_batch, anchor_x='left', anchor_y='bottom',
-                                     color=(255, 255, 255, 255))
-speed_entry = pyglet.gui.TextEntry(str(speed),
-                                  x=x_margin, y=y_speed - 25,
-                                  width=width_of_entry, batch=main_batch)
-speed_entry.set_handler('on_commit', set_speed_handler)
-frame.add_widget(speed_entry)
-set_speed_button = pyglet.gui.PushButton(x=x_margin + width_of_entry + 10, y=y_speed - 30,
-                                          pressed=img_set_parameter, depressed=img_set_parameter, hover=img_set_parameter,
-                                          batch=main_batch)
-set_speed_button.set_handler('on_press', lambda: set_speed_handler(speed_entry.value))
-frame.add_widget(set_speed_button)
-
-# Number of steps/days per frame
-y_steps_per_frame = y_speed - 70
-width_of_entry = 40
-
-steps_per_frame_entry_label = pyglet.text.Label("Days per frame (1-50)",
-                                     x=x_margin, y=y_steps_per_frame, font_size=11,
-                                     batch=main_batch, anchor_x='left', anchor_y='bottom',
-                                     multiline=True, width=navigation_width - x_margin,
-                                     color=(255, 255, 255, 255))
-steps_per_frame_entry = pyglet.gui.TextEntry(str(steps_per_frame),
-                                  x=x_margin, y=y_steps_per_frame - 25,
-                                  width=width_of_entry, batch=main_batch)
-steps_per_frame_entry.set_handler('on_commit', set_steps_per_frame_handler)
-frame.add_widget(steps_per_frame_entry)
-set_steps_per_frame_button = pyglet.gui.PushButton(x=x_margin + width_of_entry + 10, y=y_steps_per_frame - 30,
-                                          pressed=img_set_parameter, depressed=img_set_parameter, hover=img_set_parameter,
-                                          batch=main_batch)
-set_steps_per_frame_button.set_handler('on_press', lambda: set_steps_per_frame_handler(steps_per_frame_entry.value))
-frame.add_widget(set_steps_per_frame_button)
-
-# Info label 3 (bottom of the view)
-info_label3 = pyglet.text.Label("",
-                                     x=window.width//2, y=5, font_size=11,
-                                     batch=main_batch, anchor_x='center', anchor_y='bottom',
-                                     color=(255, 255, 255, 255))
+def update_physics_rate():
+    # The physics process keeps the pace of the animation: steps_per_frame steps per frame
+    if physics is not None:
+        physics.steps_per_second = speed * steps_per_frame if is_animating else 0
+
+
+##################### Construction of the View ########################
+
+
+def build_view():
+    """
+    Creates the window and all widgets. Called by run(), so that importing this module does not open a window.
+    """
+    global window, main_batch, frame, circles, labels, history, tails, drawn_view, particle_cloud, date_label, \
+           play_pause_button, info_label1, year_entry_label, year_entry, month_entry_label, month_entry, \
+           day_entry_label, day_entry, set_date_button, info_label2, speed_entry_label, speed_entry, \
+           set_speed_button, steps_per_frame_entry_label, steps_per_frame_entry, set_steps_per_frame_button, \
+           info_label3, profiler_label
+    # Importing pyglet's OpenGL bindings already creates a (hidden) window, hence the import here
+    from .lib_rendering import ParticleCloud, TailRenderer
+    startup.mark('opengl')
+    images = load_images()  # decoded while the simulation and the window are created
+    simulation = get_simulation()
+    startup.mark('simulation')
+
+    ############## Basic structure of the View ###################
+
+    # Window
+    window = pyglet.window.Window(window_width, window_height, caption='Solar System Animation')
+    startup.mark('window')
+
+    # Main batch component
+    main_batch = pyglet.graphics.Batch()
+
+    # A Frame instance to hold all widgets, and provide spacial hashing to avoid sending all the Window events to every widget.
+    frame = pyglet.gui.Frame(window, order=4)
+
+    ##################### Initialization of View elements #########
+
+    circles = []
+    labels = []
+    tails = []
+    tail_lengths = [int(np.ceil(rel_history_length * body.period)) for body in simulation.bodies]
+    history = RingBuffer(max(tail_lengths), (len(simulation.bodies), 3))
+    drawn_view = None
+    for i, body in enumerate(simulation.bodies):
+        # color = tuple(np.random.randint(0, 255, (3)))
+
+        # Circles
+        circle = pyglet.shapes.Circle(x=0, y=0, radius=body.radius_px, color=body.color, batch=main_batch)
+        circles.append(circle)
+
+        # Labels
+        label = pyglet.text.Label(body.name,
+                              font_name='Roboto',
+                              font_size=12,
+                              x=0, y=0,
+                              anchor_x='center', anchor_y='bottom',
+                              batch=main_batch)
+        labels.append(label)
+
+        # Tails
+        tails.append(DecimatedTail(tail_lengths[i],
+                                   functools.partial(TailRenderer, color=body.color, thickness=2, batch=main_batch),
+                                   tolerance=tail_tolerance, max_points=max_tail_points))
+
+    # Asteroids
+    particles = simulation.particles
+    particle_cloud = ParticleCloud(len(particles), particles.color, batch=main_batch) if particles is not None else None
+
+    # Current date label
+    date_label = pyglet.text.Label("Date: " + simulation.current_date.strftime("%d %B, %Y"),
+                              font_name='Roboto', font_size=12,
+                              x=navigation_width + 10, y=window.height - 20,
+                              anchor_x='left', anchor_y='top',
+                              batch=main_batch)
+
+    ##################### Navigation UI #####################
+    x_margin = 10  # Margin to the left of the screen
+
+    # # Widgets and labels
+
+
+    # Play/Pause button
+    img_play_pause = images['play-pause'].result()
+    y_play_pause = window.height - 50
+    play_pause_button = pyglet.gui.PushButton(x=(navigation_width - 70) // 2, y=y_play_pause,
+                                              pressed=img_play_pause, depressed=img_play_pause, hover=img_play_pause,
+                                              batch=main_batch)
+    play_pause_button.set_handler('on_press', press_play_pause_button_handler)
+    frame.add_widget(play_pause_button)
+
+    # Info label 1
+    y_info_label1 = y_play_pause - 15
+    info_label1 = pyglet.text.Label("",
+                              font_name='Roboto', font_size=11,
+                              x=x_margin, y=y_info_label1,
+                              anchor_x='left', anchor_y='top', align="center",
+                              multiline=True, width=navigation_width - x_margin,
+                              batch=main_batch)
+
+    # Text entries for year, month, day
+    y_year = y_info_label1 - 70
+    year_entry_label = pyglet.text.Label("Year",
+                                         x=x_margin, y=y_year, font_size=11,
+                                         batch=main_batch, anchor_x='left', anchor_y='bottom',
+                                         color=(255, 255, 255, 255))
+    year_entry = pyglet.gui.TextEntry(str(simulation.current_date.year),
+                                      x=(navigation_width - x_margin) // 2 + x_margin, y=y_year,
+                                      width=40, batch=main_batch)
+    frame.add_widget(year_entry)
+
+    y_month = y_year - 30
+    month_entry_label = pyglet.text.Label("Month",
+                                         x=x_margin, y=y_month, font_size=11,
+                                         batch=main_batch, anchor_x='left', anchor_y='bottom',
+                                         color=(255, 255, 255, 255))
+    month_entry = pyglet.gui.TextEntry(str(simulation.current_date.month),
+                                       x=(navigation_width - x_margin) // 2 + x_margin, y=y_month,
+                                       width=40, batch=main_batch)
+    frame.add_widget(month_entry)
+
+    y_day = y_month - 30
+    day_entry_label = pyglet.text.Label("Day",
+                                         x=x_margin, y=y_day, font_size=11,
+                                         batch=main_batch, anchor_x='left', anchor_y='bottom',
+                                         color=(255, 255, 255, 255))
+    day_entry = pyglet.gui.TextEntry(str(simulation.current_date.day),
+                                     x=(navigation_width - x_margin) // 2 + x_margin, y=y_day,
+                                     width=40, batch=main_batch)
+    frame.add_widget(day_entry)
+
+    # Set Date button
+    y_set_date_button = y_day - 50
+    img_set_date = images['set-date'].result()
+    set_date_button = pyglet.gui.PushButton(x=(navigation_width - 70) // 2, y=y_set_date_button,
+                                              pressed=img_set_date, depressed=img_set_date, hover=img_set_date,
+                                              batch=main_batch)
+    set_date_button.set_handler('on_press', press_set_date_button_handler)
+    frame.add_widget(set_date_button)
+
+    # Info label 2
+    y_info_label2 = y_set_date_button - 15
+    info_label2 = pyglet.text.Label("",
+                              font_name='Roboto', font_size=11,
+                              x=x_margin, y=y_info_label2,
+                              anchor_x='left', anchor_y='top', align="center",
+                              multiline=True, width=navigation_width - x_margin,
+                              batch=main_batch)
+
+    # # Text entries for speed, number of steps/days per frame
+    # Speed
+    y_speed = y_info_label2 - 60
+    width_of_entry = 40
+    img_set_parameter = images['set-parameter'].result()
+
+    speed_entry_label = pyglet.text.Label("Speed (1-60)",
+                                         x=x_margin, y=y_speed, font_size=11,
+                                         batch=main_batch, anchor_x='left', anchor_y='bottom',
+                                         color=(255, 255, 255, 255))
+    speed_entry = pyglet.gui.TextEntry(str(speed),
+                                      x=x_margin, y=y_speed - 25,
+                                      width=width_of_entry, batch=main_batch)
+    speed_entry.set_handler('on_commit', set_speed_handler)
+    frame.add_widget(speed_entry)
+    set_speed_button = pyglet.gui.PushButton(x=x_margin + width_of_entry + 10, y=y_speed - 30,
+                                              pressed=img_set_parameter, depressed=img_set_parameter, hover=img_set_parameter,
+                                              batch=main_batch)
+    set_speed_button.set_handler('on_press', lambda: set_speed_handler(speed_entry.value))
+    frame.add_widget(set_speed_button)
+
+    # Number of steps/days per frame
+    y_steps_per_frame = y_speed - 70
+    width_of_entry = 40
+
+    steps_per_frame_entry_label = pyglet.text.Label("Days per frame (1-50)" if player is None else
+                                         "Days per frame (<0: back)",
+                                         x=x_margin, y=y_steps_per_frame, font_size=11,
+                                         batch=main_batch, anchor_x='left', anchor_y='bottom',
+                                         multiline=True, width=navigation_width - x_margin,
+                                         color=(255, 255, 255, 255))
+    steps_per_frame_entry = pyglet.gui.TextEntry(str(steps_per_frame) if player is None else f"{player.rate:g}",
+                                      x=x_margin, y=y_steps_per_frame - 25,
+                                      width=width_of_entry, batch=main_batch)
+    steps_per_frame_entry.set_handler('on_commit', set_steps_per_frame_handler)
+    frame.add_widget(steps_per_frame_entry)
+    set_steps_per_frame_button = pyglet.gui.PushButton(x=x_margin + width_of_entry + 10, y=y_steps_per_frame - 30,
+                                              pressed=img_set_parameter, depressed=img_set_parameter, hover=img_set_parameter,
+                                              batch=main_batch)
+    set_steps_per_frame_button.set_handler('on_press', lambda: set_steps_per_frame_handler(steps_per_frame_entry.value))
+    frame.add_widget(set_steps_per_frame_button)
+
+    # Info label 3 (bottom of the view)
+    info_label3 = pyglet.text.Label("",
+                                         x=window.width//2, y=5, font_size=11,
+                                         batch=main_batch, anchor_x='center', anchor_y='bottom',
+                                         color=(255, 255, 255, 255))
+
+    # Frame timings (above info label 3)
+    profiler_label = pyglet.text.Label("",
+                                       x=navigation_width + 10, y=25, font_size=9, font_name='Roboto',
+                                       batch=main_batch, anchor_x='left', anchor_y='bottom',
+                                       multiline=True, width=window.width - navigation_width - 20,
+                                       color=(200, 200, 200, 255))
+    profiler_label.visible = show_profiler
+
+    window.push_handlers(on_draw, on_mouse_scroll, on_mouse_drag, on_key_press)
+    startup.mark('view')
 
 ##################### Animation ########################
 
@@ -356,17 +654,48 @@ def animate(dt):
     """
     Animation function to animate a number of steps_per_frame steps
     """
-    global current_date, steps_per_frame
-    
-    for i in range(steps_per_frame):
-        current_date = compute_timestep(celestial_bodies, G, current_date, t_step=t_step)
-        for (body, history) in zip(celestial_bodies, histories):
-            x, y = position_in_view(body.position)
-            history.append([x, y])
-            if len(history) > np.ceil(rel_history_length * body.period):
-                del history[0]
-    
-    refresh_plot(dt)
+    global steps_per_frame
+    simulation = get_simulation()
+    profiler.end_frame(dt)  # the previous frame, including its drawing
+
+    if player is not None:
+        previous_days = player.days
+        if not player.advance():
+            press_play_pause_button_handler()  # pause at the end of the trajectory
+        show_playback_frame(previous_days)
+    elif physics is None:
+        for i in range(steps_per_frame):
+            with profiler.measure('physics'):
+                simulation.step()
+            with profiler.measure('history'):
+                history.append(relative_positions())
+        profiler.add_steps(steps_per_frame)
+    else:
+        with profiler.measure('physics'):
+            profiler.add_steps(receive_frame())
+
+    with profiler.measure('refresh'):
+        refresh_plot(dt)
+
+def receive_frame():
+    """
+    Takes the newest state published by the physics process and copies it into the simulation, since the
+    shared memory is only valid until the next frame is taken. The tails get one point per new frame.
+
+    Returns:
+    int: The number of steps taken by the physics process since the previous frame.
+    """
+    global num_received_steps
+    simulation = get_simulation()
+    date, positions, velocities, num_steps, is_new = physics.latest()
+    if not is_new:
+        return 0
+    num_new_steps = max(num_steps - num_received_steps, 0)
+    num_received_steps = num_steps
+    simulation.current_date = date
+    simulation.set_state(positions, velocities)
+    history.append(relative_positions())
+    return num_new_steps
 
 ##################### Refresh functions ########################
 
@@ -375,30 +704,46 @@ def refresh_info_labels(dt):
     """
     Refresh all purely informational labels
     """
-    info_label1.text = "Running" if is_animating else ("Paused" if computation_progress == 0 else "Calculation in progress")
+    info_label1.text = "Running" if is_animating else ("Paused" if jump_job is None else "Calculation in progress")
     
-    if computation_progress > 0:
-    # if computation_progress > 0:
+    if jump_job is not None:
         info_label2.text = "Calculating: " + str(round(computation_progress * 100)) + "%"
     elif target_date_error is not None:
         info_label2.text = target_date_error
     else:
         info_label2.text = ""
         
-    info_label3.text = f"Target animation speed: {speed} frames/s   Elapsed days per frame: {steps_per_frame}"
+    days_per_frame = steps_per_frame if player is None else f"{player.rate:g} (playback)"
+    info_label3.text = f"Target animation speed: {speed} frames/s   Elapsed days per frame: {days_per_frame}"
+    if show_profiler:
+        profiler_label.text = profiler.summary()
+        monitor = get_simulation().monitor
+        if monitor is not None and physics is None:
+            profiler_label.text += (f"\nEnergy drift {monitor.energy_drift:.1e}   "
+                                    f"Angular momentum drift {monitor.angular_momentum_drift:.1e}")
+        profiler_label.text += "\n" + startup.summary()
         
     
 def refresh_plot(dt):
     """
     Refresh the plot with new positions of celestial bodies and their tails.
     """
-    date_label.text = "Date: " + current_date.strftime("%d %B, %Y")
-    
-    for i, (body, circle, label, history) in enumerate(zip(celestial_bodies, circles, labels, histories)):
-        if len(history) == 0:
-            x, y = position_in_view(body.position)
-        else:
-            x, y = history[-1]
+    global drawn_view
+    simulation = get_simulation()
+    if physics is not None:
+        receive_frame()
+    date_label.text = "Date: " + simulation.current_date.strftime("%d %B, %Y")
+
+    # The histories are stored in A.U.; each tail projects only the samples it draws
+    scale, offset = get_view_transform()
+    view = (scale, tuple(offset), view_projection.tobytes(), history.generation)
+    redraw = view != drawn_view
+    drawn_view = view
+    samples = history.view()
+    body_points = project_to_view(relative_positions(), view_projection, scale, offset)
+
+    for i, (body, circle, label, tail) in enumerate(zip(simulation.bodies, circles, labels, tails)):
+        x, y = body_points[i]
         # Label position
         label_x = x
         label_y = y + body.radius_px + 2
@@ -406,23 +751,84 @@ def refresh_plot(dt):
         circle.x, circle.y = x, y
         label.x, label.y = label_x, label_y
         # Tails
-        if len(history) >= 2:
-            tails[i] = pyglet.shapes.MultiLine(*history, thickness=2, color=body.color, batch=main_batch)
+        if redraw:
+            tail.redraw(samples[:, i], history.num_appended, (view_projection, scale, offset))
         else:
-            tails[i] = None
+            tail.update(samples[:, i], history.num_appended, (view_projection, scale, offset))
+
+    if particle_cloud is not None:
+        particle_cloud.update(*position_in_view(simulation.particles.positions))
 
 ##################### Listeners ########################
 
 
-@window.event
 def on_draw():
-    window.clear()
-    main_batch.draw()
+    with profiler.measure('draw'):
+        window.clear()
+        main_batch.draw()
+    if 'first_frame' not in startup.phases:
+        startup.mark('first_frame')
+        print(startup.summary())
+
+def on_key_press(symbol, modifiers):
+    global show_profiler
+    if symbol == pyglet.window.key.F3:
+        show_profiler = not show_profiler
+        profiler_label.visible = show_profiler
+    elif symbol == pyglet.window.key.F4:
+        export_profile()
+    elif player is not None and symbol in (pyglet.window.key.HOME, pyglet.window.key.END):
+        player.seek(player.first if symbol == pyglet.window.key.HOME else player.last)
+        show_playback_frame()
+        refresh_plot(0)
+
+def export_profile():
+    filename = profiler_trace_file or 'frame_trace.csv'
+    profiler.export(filename)
+    print(f"Frame timings written to {filename}")
+
+def on_mouse_scroll(x, y, scroll_x, scroll_y):
+    # Zoom
+    global field_of_view_AU
+    if x > navigation_width:
+        field_of_view_AU *= zoom_factor ** -scroll_y
+        refresh_plot(0)
+
+def on_mouse_drag(x, y, dx, dy, buttons, modifiers):
+    # Rotate the view plane: horizontal dragging turns it about the z-axis, vertical dragging tilts it
+    if x <= navigation_width or not buttons & pyglet.window.mouse.LEFT:
+        return
+    azimuth = np.arctan2(viewplane_normal_vector[1], viewplane_normal_vector[0]) - dx * rotation_per_pixel
+    elevation = np.arctan2(viewplane_normal_vector[2], np.linalg.norm(viewplane_normal_vector[:2])) - dy * rotation_per_pixel
+    elevation = np.clip(elevation, -np.pi / 2 + 0.01, np.pi / 2 - 0.01)  # stay off the z-axis
+    set_viewplane((np.cos(elevation) * np.cos(azimuth), np.cos(elevation) * np.sin(azimuth), np.sin(elevation)))
+    refresh_plot(0)
 
 def run():
+    global physics
+    startup.mark('imports')
+    if trajectory_file is not None or playback_years is not None:
+        load_playback()
+        startup.mark('trajectory')
+    build_view()
+    if player is not None:
+        show_playback_frame()
+    elif physics_in_process:
+        from .physics_process import PhysicsProcess  # multiprocessing and shared memory are not needed otherwise
+        physics = PhysicsProcess(get_simulation(), speed * steps_per_frame)
     pyglet.clock.schedule_interval(animate, 1 / speed)
     pyglet.clock.schedule_interval(refresh_info_labels, 1 / speed * 2)
-    pyglet.app.run()
+    try:
+        pyglet.app.run()
+    finally:
+        if profiler_trace_file is not None:
+            export_profile()
+        jump_scheduler.shutdown()
+        if physics is not None:
+            physics.close()
+            physics = None
+        if precomputed_directory is not None:
+            shutil.rmtree(precomputed_directory, ignore_errors=True)
 
 if __name__ == '__main__':
     run()
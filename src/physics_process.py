@@ -0,0 +1,275 @@
+import datetime
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+NUM_SLOTS = 3  # front (read by the consumer), ready (latest published frame), back (written by the producer)
+
+# Indices into the shared control array of PhysicsProcess
+RATE = 0  # steps per second (0: paused, inf: as fast as possible)
+PROGRESS = 1  # fraction of a date jump completed by the physics process
+PAUSED = 2  # set by the physics process while it does not step (acknowledges a rate of 0)
+
+
+class TripleBuffer:
+    def __init__(self, shape, name=None, lock=None, state=None):
+        """
+        Three frames of float64 in shared memory, for one producer and one consumer process.
+
+        The producer writes into the back frame and publishes it, the consumer takes the newest published
+        frame and reads it in place. Both sides own their frame exclusively until they swap it with the
+        ready frame, so the lock is only held to exchange two indices, never while copying data.
+
+        Parameters:
+        shape (tuple): The shape of one frame.
+        name (str, optional): The name of an existing shared memory block to attach to. Default: None (create one).
+        lock (multiprocessing.Lock, optional): The lock of an existing buffer. Default: None.
+        state (multiprocessing.RawArray, optional): The shared indices of an existing buffer. Default: None.
+        """
+        self.shape = tuple(shape)
+        self._owner = name is None
+        size = NUM_SLOTS * int(np.prod(self.shape)) * 8
+        self._memory = shared_memory.SharedMemory(name=name, create=self._owner, size=size if self._owner else 0)
+        self._frames = np.ndarray((NUM_SLOTS, *self.shape), dtype=float, buffer=self._memory.buf)
+        self._lock = lock if lock is not None else multiprocessing.Lock()
+        self._state = state if state is not None else multiprocessing.RawArray('l', [1, 0])  # ready slot, fresh flag
+        self._front, self._back = 0, 2  # private to the consumer and to the producer, respectively
+
+    def attach_args(self):
+        """
+        Returns:
+        tuple: The arguments to attach to this buffer in another process, i.e. TripleBuffer(*args).
+        """
+        return self.shape, self._memory.name, self._lock, self._state
+
+    def reset(self, frame):
+        """
+        Writes a frame to all slots, e.g. the initial state. Must not be called once the producer runs.
+
+        Parameters:
+        frame (np.ndarray): The frame.
+
+        Returns:
+        None.
+        """
+        self._frames[:] = frame
+        self._state[1] = 0
+
+    def back(self):
+        """
+        Returns:
+        np.ndarray: The frame to be written by the producer.
+        """
+        return self._frames[self._back]
+
+    def publish(self):
+        """
+        Makes the back frame the newest frame. Called by the producer.
+        """
+        with self._lock:
+            self._back, self._state[0] = self._state[0], self._back
+            self._state[1] = 1
+
+    def latest(self):
+        """
+        Takes the newest frame, without copying. Called by the consumer.
+
+        Returns:
+        tuple: A read-only view of the frame, valid until the next call or close(), and whether it is a new frame.
+        """
+        with self._lock:
+            is_new = bool(self._state[1])
+            if is_new:
+                self._front, self._state[0] = self._state[0], self._front
+                self._state[1] = 0
+        frame = self._frames[self._front].view()
+        frame.flags.writeable = False
+        return frame, is_new
+
+    def close(self):
+        """
+        Detaches from the shared memory, which is released by the process that created the buffer.
+        """
+        del self._frames
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+def _write_frame(frame, simulation, num_steps):
+    # Row 0 holds the date and the step counter, followed by the positions and the velocities
+    positions, velocities = simulation.get_state()
+    frame[0, :2] = simulation.current_date.toordinal(), num_steps
+    frame[1:1 + len(positions)] = positions
+    frame[1 + len(positions):] = velocities
+
+
+def _run(simulation, buffer_args, control, connection):
+    """
+    Physics process of PhysicsProcess. Steps the simulation at the requested rate, publishes every new
+    state, and executes commands received through the connection.
+    """
+    buffer = TripleBuffer(*buffer_args)
+    num_steps = 0
+    next_step_time = time.perf_counter()
+    try:
+        while True:
+            rate = control[RATE]
+            control[PAUSED] = rate <= 0
+            # Commands are checked between steps; while paused, they are waited for
+            if connection.poll(0 if rate > 0 else 0.05):
+                command, *args = connection.recv()
+                if command == 'stop':
+                    break
+                if command == 'jump':
+                    simulation.jump_to(*args, progress=lambda fraction: control.__setitem__(PROGRESS, fraction))
+                    control[PROGRESS] = 0
+                    _write_frame(buffer.back(), simulation, num_steps)
+                    buffer.publish()
+                    connection.send(simulation.current_date)
+                elif command == 'load':
+                    simulation.current_date = args[0]
+                    simulation.set_state(*args[1:])
+                    _write_frame(buffer.back(), simulation, num_steps)
+                    buffer.publish()
+                continue
+            if rate <= 0:
+                continue
+            simulation.step()
+            num_steps += 1
+            _write_frame(buffer.back(), simulation, num_steps)
+            buffer.publish()
+            # Keep the rate without accumulating a backlog after slow steps
+            next_step_time = max(next_step_time + 1 / rate, time.perf_counter() - 1 / rate)
+            delay = next_step_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        buffer.close()
+
+
+class PhysicsProcess:
+    def __init__(self, simulation, steps_per_second=60):
+        """
+        Advances a copy of the simulation continuously in a separate process, decoupled from the frame rate
+        of the view. The newest state is published through a triple buffer in shared memory.
+
+        Parameters:
+        simulation (Simulation): The simulation to be advanced. The process works on a copy of its state;
+                                 the simulation itself is not changed.
+        steps_per_second (float, optional): The number of steps per second (0: paused). Default: 60.
+        """
+        self.num_objects = len(simulation.get_state()[0])
+        self._buffer = TripleBuffer((1 + 2 * self.num_objects, 3))
+        _write_frame(self._buffer.back(), simulation, 0)
+        self._buffer.reset(self._buffer.back())
+        self._control = multiprocessing.RawArray('d', [steps_per_second, 0, 0])
+        self._connection, child_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_run, daemon=True,
+                                                args=(simulation, self._buffer.attach_args(), self._control,
+                                                      child_connection))
+        self._process.start()
+
+    @property
+    def steps_per_second(self):
+        return self._control[RATE]
+
+    @steps_per_second.setter
+    def steps_per_second(self, value):
+        self._control[RATE] = max(value, 0)
+
+    def pause(self, timeout=5):
+        """
+        Stops stepping and waits until the physics process has acknowledged it, so that the published state
+        no longer changes. Set steps_per_second to continue.
+
+        Parameters:
+        timeout (float, optional): The maximum time to wait in seconds. Default: 5.
+
+        Returns:
+        bool: Whether the physics process is paused.
+        """
+        # The flag is cleared first: the process sets it again only once it has read the rate of 0
+        self._control[PAUSED] = 0
+        self.steps_per_second = 0
+        deadline = time.perf_counter() + timeout
+        while not self._control[PAUSED]:
+            if time.perf_counter() > deadline or not self._process.is_alive():
+                return False
+            time.sleep(0.001)
+        return True
+
+    @property
+    def progress(self):
+        """
+        The fraction of the current date jump completed, or 0 if there is none.
+        """
+        return self._control[PROGRESS]
+
+    def latest(self):
+        """
+        Returns the newest state published by the physics process, without copying.
+
+        Returns:
+        tuple: The date, read-only views of the positions and of the velocities of all bodies followed by those
+               of the particles (valid until the next call or close()), the number of steps taken, and whether
+               the state is new.
+        """
+        frame, is_new = self._buffer.latest()
+        date = datetime.date.fromordinal(int(frame[0, 0]))
+        return date, frame[1:1 + self.num_objects], frame[1 + self.num_objects:], int(frame[0, 1]), is_new
+
+    def jump_to(self, target_date, integrator=None, t_step=None, progress=None, poll_interval=0.05):
+        """
+        Lets the physics process integrate to the target date and waits for it. The process is paused
+        afterwards; set steps_per_second to continue.
+
+        Parameters:
+        target_date (datetime.date): The date to which the computation is performed.
+        integrator (str, optional): The time integration scheme. Default: the integrator of the simulation.
+        t_step (float, optional): The maximum time step in days. Default: the time step of the simulation.
+        progress (callable, optional): Called with the completed fraction while waiting. Default: None.
+        poll_interval (float, optional): The time between progress reports in seconds. Default: 0.05.
+
+        Returns:
+        datetime.date: The new date of the simulation.
+        """
+        self.steps_per_second = 0
+        self._connection.send(('jump', target_date, integrator, t_step))
+        while not self._connection.poll(poll_interval):
+            if progress is not None and self.progress > 0:
+                progress(self.progress)
+        return self._connection.recv()
+
+    def load(self, simulation):
+        """
+        Replaces the state of the physics process by the state of a simulation, e.g. the result of a date
+        jump computed elsewhere. The new state is published as the next frame.
+
+        Parameters:
+        simulation (Simulation): The simulation with the new date and state.
+
+        Returns:
+        None.
+        """
+        self._connection.send(('load', simulation.current_date, *simulation.get_state()))
+
+    def close(self):
+        """
+        Stops the physics process and releases the shared memory.
+        """
+        try:
+            self._connection.send(('stop',))
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,112 @@
+import datetime
+import numpy as np
+from .trajectory import Trajectory
+
+# Playback of a precomputed trajectory: the time shown is a position within the trajectory, which moves by
+# a fixed number of days per frame (forwards or backwards, at any rate) or jumps anywhere at once.
+# The states in between the samples are interpolated, see trajectory.hermite_interpolate; no physics is run.
+
+
+class TrajectoryPlayer:
+    def __init__(self, trajectory, rate=1, spacing=1, center=0):
+        """
+        Plays back a trajectory written by simulate.py (see simulate.run_simulation).
+
+        Parameters:
+        trajectory (Trajectory or str): The trajectory or its directory.
+        rate (float, optional): The days per frame; negative values play backwards. Default: 1.
+        spacing (float, optional): The spacing of the samples of the tails in days, see history. Default: 1.
+        center (int, optional): The index of the body the history is relative to. Default: 0 (the Sun).
+        """
+        self.trajectory = trajectory if isinstance(trajectory, Trajectory) else Trajectory(trajectory)
+        self.first, self.last = sorted((float(self.trajectory.times[0]), float(self.trajectory.times[-1])))
+        self.rate = rate
+        self.spacing = spacing
+        self.center = center
+        self.days = None  # the time shown, in days since the start date
+        self.rewind()
+
+    @property
+    def date(self):
+        """
+        The date shown (the day the current time falls on).
+        """
+        return self.trajectory.start_date + datetime.timedelta(days=self.days)
+
+    def seek(self, days):
+        """
+        Moves to a time, limited to the range of the trajectory.
+
+        Parameters:
+        days (float): The time in days since the start date of the trajectory.
+
+        Returns:
+        bool: Whether the time is within the trajectory (otherwise, the nearest end is shown).
+        """
+        self.days = float(np.clip(days, self.first, self.last))
+        return self.days == days
+
+    def seek_date(self, date):
+        """
+        Moves to the beginning of a date, see seek.
+        """
+        return self.seek((date - self.trajectory.start_date).days)
+
+    @property
+    def at_end(self):
+        """
+        Whether the end of the trajectory in the direction of playback (the start when playing backwards)
+        is reached.
+        """
+        return (self.rate > 0 and self.days == self.last) or (self.rate < 0 and self.days == self.first)
+
+    def advance(self, num_frames=1):
+        """
+        Moves by rate days per frame.
+
+        Parameters:
+        num_frames (int, optional): The number of frames. Default: 1.
+
+        Returns:
+        bool: Whether playback can continue, see at_end.
+        """
+        self.seek(self.days + self.rate * num_frames)
+        return not self.at_end
+
+    def rewind(self):
+        """
+        Moves to the start of the trajectory, or to its end when playing backwards.
+        """
+        self.seek(self.first if self.rate >= 0 else self.last)
+
+    def state(self):
+        """
+        Returns:
+        tuple: The positions and velocities of all bodies at the current time, shape (num_bodies, 3) each.
+        """
+        positions, velocities = self.trajectory.interpolate([self.days])
+        return positions[0], velocities[0]
+
+    def history_times(self, since=None):
+        """
+        The times of the samples of the tails up to the current time, on a grid with the given spacing
+        anchored at the start of the trajectory, so that the same times are sampled whatever the rate.
+
+        Parameters:
+        since (float, optional): Only times after this one. Default: None (from the start of the trajectory).
+
+        Returns:
+        np.ndarray: The increasing times in days.
+        """
+        since = self.first - self.spacing if since is None else max(since, self.first - self.spacing)
+        first = np.floor((since - self.first) / self.spacing + 1e-9) + 1
+        last = np.floor((self.days - self.first) / self.spacing + 1e-9)
+        return self.first + np.arange(first, last + 1) * self.spacing
+
+    def history(self, times):
+        """
+        Returns:
+        np.ndarray: The positions relative to the center body at the given times, shape (num_times, num_bodies, 3).
+        """
+        positions, _ = self.trajectory.interpolate(times)
+        return positions - positions[:, self.center:self.center + 1]
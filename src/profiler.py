@@ -0,0 +1,163 @@
+import collections
+import contextlib
+import csv
+import json
+import time
+import numpy as np
+from .ring_buffer import RingBuffer
+
+
+class FrameProfiler:
+    def __init__(self, stages, window=300, target_frame_time=None, trace_length=100000):
+        """
+        Lightweight per-frame timers. The time spent in each stage is summed per frame; the statistics are
+        taken over the last window frames, and every frame is kept in a trace that can be exported.
+
+        Parameters:
+        stages (list): The names of the stages, in the order of the columns of the trace.
+        window (int, optional): The number of frames of the rolling statistics. Default: 300.
+        target_frame_time (float, optional): The intended time between frames in seconds. Frames taking longer
+                                             than 1.5 times that count as dropped frames. Default: None (no count).
+        trace_length (int, optional): The maximum number of frames kept for export. Default: 100000.
+        """
+        self.stages = list(stages)
+        self.target_frame_time = target_frame_time
+        self.num_frames = 0
+        self.dropped_frames = 0
+        self._durations = {stage: RingBuffer(window, 1) for stage in self.stages}
+        self._frame_times = RingBuffer(window, 1)
+        self._steps = RingBuffer(window, 1)
+        self._current = dict.fromkeys(self.stages, 0.0)
+        self._current_steps = 0
+        self._trace = collections.deque(maxlen=trace_length)
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        """
+        Context manager adding the time spent in its body to a stage of the current frame.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[stage] += time.perf_counter() - start
+
+    def add_steps(self, num_steps):
+        """
+        Counts simulation steps taken in the current frame.
+        """
+        self._current_steps += num_steps
+
+    def end_frame(self, frame_time):
+        """
+        Closes the current frame.
+
+        Parameters:
+        frame_time (float): The time since the previous frame in seconds.
+
+        Returns:
+        None.
+        """
+        for stage, duration in self._current.items():
+            self._durations[stage].append(duration)
+        self._frame_times.append(frame_time)
+        self._steps.append(self._current_steps)
+        if self.target_frame_time and frame_time > 1.5 * self.target_frame_time:
+            self.dropped_frames += int(round(frame_time / self.target_frame_time)) - 1
+        self._trace.append((self.num_frames, time.time(), frame_time, self._current_steps,
+                            *(self._current[stage] for stage in self.stages)))
+        self.num_frames += 1
+        self._current = dict.fromkeys(self.stages, 0.0)
+        self._current_steps = 0
+
+    def statistics(self):
+        """
+        Returns:
+        dict: For each stage its p50, p95 and max in seconds over the window, as well as the frames and
+              steps per second over the window, and the total numbers of frames and dropped frames.
+        """
+        statistics = {}
+        for stage, durations in self._durations.items():
+            values = durations.view()[:, 0]
+            if len(values) > 0:
+                p50, p95 = np.percentile(values, (50, 95))
+                statistics[stage] = {'p50': float(p50), 'p95': float(p95), 'max': float(values.max())}
+        total_time = self._frame_times.view().sum()
+        statistics['frames_per_second'] = len(self._frame_times) / total_time if total_time > 0 else 0.0
+        statistics['steps_per_second'] = self._steps.view().sum() / total_time if total_time > 0 else 0.0
+        statistics['num_frames'] = self.num_frames
+        statistics['dropped_frames'] = self.dropped_frames
+        return statistics
+
+    def summary(self):
+        """
+        Returns:
+        str: The statistics as text, one line per stage, with times in milliseconds.
+        """
+        statistics = self.statistics()
+        lines = [f"{statistics['frames_per_second']:.1f} frames/s   {statistics['steps_per_second']:.0f} steps/s   "
+                 f"{statistics['dropped_frames']} dropped frames"]
+        for stage in self.stages:
+            if stage in statistics:
+                values = statistics[stage]
+                lines.append(f"{stage}: p50 {values['p50'] * 1e3:.2f}  p95 {values['p95'] * 1e3:.2f}  "
+                             f"max {values['max'] * 1e3:.2f} ms")
+        return '\n'.join(lines)
+
+    def export(self, filename):
+        """
+        Writes the trace of all recorded frames (times in seconds) to a CSV file, or to a JSON file if the
+        file name ends with .json; the JSON file includes the statistics.
+
+        Parameters:
+        filename (str): The output file.
+
+        Returns:
+        None.
+        """
+        columns = ['frame', 'timestamp', 'frame_time', 'steps', *self.stages]
+        if filename.endswith('.json'):
+            with open(filename, 'w') as f:
+                json.dump({'statistics': self.statistics(),
+                           'frames': [dict(zip(columns, row)) for row in self._trace]}, f, indent=2)
+        else:
+            with open(filename, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(self._trace)
+
+
+class StartupTimer:
+    def __init__(self, start=None):
+        """
+        Records when each phase of the start of the application completes.
+
+        Parameters:
+        start (float, optional): The time.perf_counter() value the phases are measured from. Default: now.
+        """
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = {}  # name -> time since start in seconds, in the order of completion
+
+    def mark(self, phase):
+        """
+        Records the completion of a phase. Later marks of the same phase are ignored.
+        """
+        self.phases.setdefault(phase, time.perf_counter() - self.start)
+
+    def durations(self):
+        """
+        Returns:
+        dict: The duration of each phase in seconds, i.e. the time since the completion of the previous one.
+        """
+        times = [0.0, *self.phases.values()]
+        return {phase: end - begin for phase, begin, end in zip(self.phases, times, times[1:])}
+
+    def summary(self):
+        """
+        Returns:
+        str: The total time and the durations of the phases as text.
+        """
+        if not self.phases:
+            return "Startup: no phase completed"
+        phases = '  '.join(f"{phase} {duration:.3f}" for phase, duration in self.durations().items())
+        return f"Startup {list(self.phases.values())[-1]:.3f} s: {phases}"
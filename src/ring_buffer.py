@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity, dim=2):
+        """
+        A fixed-capacity buffer of points with O(1) append. Once full, each append drops the oldest point.
+
+        Every point is stored twice, at index k and k + capacity, so that the points are always available
+        as one contiguous array in chronological order without copying (see view()).
+
+        Parameters:
+        capacity (int): The maximum number of points.
+        dim (int or tuple, optional): The number of coordinates per point, or the shape of each point,
+                                      e.g. (num_bodies, 3) for the positions of several bodies. Default: 2.
+        """
+        self.capacity = max(int(capacity), 0)
+        self._data = np.zeros((2 * self.capacity, *np.atleast_1d(dim)))
+        self._next = 0  # slot of the next point
+        self._size = 0
+        self.num_appended = 0  # number of points appended since creation or the last clear()
+        self.generation = 0  # incremented by clear()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, point):
+        """
+        Appends a point, dropping the oldest one if the buffer is full.
+
+        Parameters:
+        point (sequence or np.ndarray): The coordinates of the point.
+
+        Returns:
+        None.
+        """
+        if self.capacity == 0:
+            return
+        self._data[self._next] = point
+        self._data[self._next + self.capacity] = point
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.num_appended += 1
+
+    def extend(self, points):
+        """
+        Appends several points at once, as a sequence of append() calls would.
+
+        Parameters:
+        points (np.ndarray): The points, oldest first, shape (n, *dim).
+
+        Returns:
+        None.
+        """
+        points = np.asarray(points)
+        num_points = len(points)
+        if self.capacity == 0 or num_points == 0:
+            return
+        kept = points[-self.capacity:]  # older points would be dropped anyway
+        # Slots of the kept points, in at most two contiguous runs
+        start = (self._next + num_points - len(kept)) % self.capacity
+        first_run = min(len(kept), self.capacity - start)
+        for offset in (0, self.capacity):
+            self._data[offset + start:offset + start + first_run] = kept[:first_run]
+            self._data[offset:offset + len(kept) - first_run] = kept[first_run:]
+        self._next = (self._next + num_points) % self.capacity
+        self._size = min(self._size + num_points, self.capacity)
+        self.num_appended += num_points
+
+    def view(self):
+        """
+        Returns:
+        np.ndarray: A read-only view of shape (len, *dim) with the points from oldest to newest.
+                    The view is only valid until the next append.
+        """
+        end = self._next + self.capacity
+        view = self._data[end - self._size:end]
+        view.flags.writeable = False
+        return view
+
+    def last(self):
+        """
+        Returns:
+        np.ndarray: The newest point.
+        """
+        if self._size == 0:
+            raise IndexError("The buffer is empty.")
+        return self._data[self._next + self.capacity - 1]
+
+    def clear(self):
+        """
+        Removes all points.
+        """
+        self._next = 0
+        self._size = 0
+        self.num_appended = 0
+        self.generation += 1
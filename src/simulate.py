@@ -0,0 +1,126 @@
+import argparse
+import datetime
+import sys
+import numpy as np
+from .create_celestial_bodies import create_celestial_bodies, G
+from .lib_calculation import get_state, get_solver, SOLVERS
+from .lib_integration import INTEGRATORS, get_integrator
+from .trajectory import TrajectoryWriter
+
+
+def advance(positions, velocities, masses, days, t_step=1, integrator='euler', solver='exact'):
+    """
+    Integrates a system over a number of days, with steps of at most t_step days.
+
+    Parameters:
+    positions (np.ndarray): An array of shape (num_bodies, 3) with the positions of the bodies.
+    velocities (np.ndarray): An array of shape (num_bodies, 3) with the velocities of the bodies.
+    masses (np.ndarray): An array of shape (num_bodies,) with the masses of the bodies.
+    days (float): The time span in days; negative values integrate backwards.
+    t_step (float, optional): The maximum time step in days. Default: 1.
+    integrator (str, optional): The time integrator. Default: 'euler'.
+    solver (str, optional): The acceleration solver. Default: 'exact'.
+
+    Returns:
+    tuple: The positions and velocities after the time span.
+    """
+    solve, integrate = get_solver(solver), get_integrator(integrator)
+    num_steps = int(np.ceil(abs(days) / t_step))
+    for _ in range(num_steps):
+        positions, velocities = integrate(positions, velocities, days / num_steps, lambda x: solve(x, masses, G))
+    return positions, velocities
+
+
+def run_simulation(output, end_date, start_date=None, which='all', filename=None, t_step=1, integrator='euler',
+                   solver='exact', save_every=1, chunk_size=1000, progress=None):
+    """
+    Simulates from start_date to end_date and streams positions and velocities to a trajectory on disk.
+    Only one chunk of samples is held in memory at any time.
+
+    Parameters:
+    output (str): The output directory of the trajectory.
+    end_date (datetime.date): The end date of the simulation.
+    start_date (datetime.date, optional): The date of the first sample. Default: the date of the input data.
+    which (str, optional): 'all', 'inner' or 'outer', see create_celestial_bodies. Default: 'all'.
+    filename (str, optional): The input data file. Default: the configured input data.
+    t_step (float, optional): The maximum time step in days. Default: 1.
+    integrator (str, optional): The time integrator. Default: 'euler'.
+    solver (str, optional): The acceleration solver. Default: 'exact'.
+    save_every (int, optional): Only every save_every-th step is written, and the last step. Default: 1.
+    chunk_size (int, optional): The number of samples written at once. Default: 1000.
+    progress (callable, optional): Called with the fraction of completed steps. Default: None.
+
+    Returns:
+    str: The output directory.
+    """
+    bodies, data_date = create_celestial_bodies(which, filename=filename)
+    positions, velocities, masses = get_state(bodies)
+    start_date = start_date or data_date
+    positions, velocities = advance(positions, velocities, masses, (start_date - data_date).days,
+                                    t_step, integrator, solver)
+
+    total_days = (end_date - start_date).days
+    num_steps = int(np.ceil(abs(total_days) / t_step))
+    step = total_days / num_steps if num_steps > 0 else 0
+    # The state at end_date is written even if save_every does not divide the number of steps
+    num_samples = num_steps // save_every + 1 + (num_steps % save_every != 0)
+    solve, integrate = get_solver(solver), get_integrator(integrator)
+
+    times = np.empty(chunk_size)
+    chunk_positions = np.empty((chunk_size, len(bodies), 3))
+    chunk_velocities = np.empty((chunk_size, len(bodies), 3))
+    metadata = {'integrator': integrator, 't_step': step, 'save_every': save_every}
+    with TrajectoryWriter(output, num_samples, [body.name for body in bodies], masses, start_date, metadata) as writer:
+        filled = 0
+        for k in range(num_steps + 1):
+            if k > 0:
+                positions, velocities = integrate(positions, velocities, step, lambda x: solve(x, masses, G))
+            if k % save_every == 0 or k == num_steps:
+                times[filled], chunk_positions[filled], chunk_velocities[filled] = k * step, positions, velocities
+                filled += 1
+                if filled == chunk_size or k == num_steps:
+                    writer.write(times[:filled], chunk_positions[:filled], chunk_velocities[:filled])
+                    filled = 0
+                    if progress is not None:
+                        progress(k / max(num_steps, 1))
+    return output
+
+
+def parse_date(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{text}'. Expected YYYY-MM-DD.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the solar system without GUI and write the trajectory "
+                                                 "(positions and velocities) to .npy files.")
+    parser.add_argument('--data', default=None, help="input data file (default: the configured planet data)")
+    parser.add_argument('--bodies', default='all', choices=['inner', 'outer', 'all'], help="subset of bodies")
+    parser.add_argument('--start', type=parse_date, default=None, help="first date YYYY-MM-DD (default: date of the data)")
+    parser.add_argument('--end', type=parse_date, required=True, help="last date YYYY-MM-DD")
+    parser.add_argument('--step', type=float, default=1, help="maximum time step in days (default: 1)")
+    parser.add_argument('--integrator', default='euler', choices=list(INTEGRATORS), help="time integrator")
+    parser.add_argument('--solver', default='exact', choices=list(SOLVERS),
+                        help="acceleration solver, 'parallel' for many bodies on several CPUs (default: exact)")
+    parser.add_argument('--save-every', type=int, default=1, help="write every n-th step (default: 1)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="samples per write (default: 1000)")
+    parser.add_argument('--output', required=True, help="output directory")
+    parser.add_argument('--quiet', action='store_true', help="do not report progress")
+    args = parser.parse_args(argv)
+    if args.step <= 0 or args.save_every < 1 or args.chunk_size < 1:
+        parser.error("--step must be positive, --save-every and --chunk-size at least 1")
+
+    def report(fraction):
+        print(f"\r{fraction * 100:5.1f}%", end='', file=sys.stderr, flush=True)
+
+    run_simulation(args.output, args.end, start_date=args.start, which=args.bodies, filename=args.data,
+                   t_step=args.step, integrator=args.integrator, solver=args.solver, save_every=args.save_every,
+                   chunk_size=args.chunk_size, progress=None if args.quiet else report)
+    if not args.quiet:
+        print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
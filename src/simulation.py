@@ -0,0 +1,255 @@
+import copy
+import datetime
+import numpy as np
+from .lib_calculation import compute_timestep, get_state, set_state
+from .lib_diagnostics import ConservationMonitor, tune_integration
+from .lib_kepler import propagate
+from .lib_backend import get_backend
+from .checkpoints import CheckpointStore
+from .create_celestial_bodies import create_celestial_bodies, create_asteroid_belt, G
+
+##################### Units ########################
+# masses in sun masses
+# positions in astronomical units (A.U.)
+# velocities in A.U./day
+# time in days
+####################################################
+
+
+class Simulation:
+    def __init__(self, which='inner', filename=None, t_step=1, integrator='euler', solver='exact', num_asteroids=0,
+                 checkpoint_interval=365, checkpoint_capacity=256, checkpoint_directory=None, max_step=None,
+                 backend='auto'):
+        """
+        The state of the simulated system and the logic to advance it. Does not depend on any GUI.
+
+        Parameters:
+        which (str, optional): 'all', 'inner' or 'outer', see create_celestial_bodies. Default: 'inner'.
+        filename (str, optional): The input data file. Default: the configured input data.
+        t_step (float, optional): The time step in days. Default: 1.
+        integrator (str, optional): The time integrator, see lib_integration.INTEGRATORS. Default: 'euler'.
+        solver (str or callable, optional): The acceleration solver, see lib_calculation.get_solver. Default: 'exact'.
+        num_asteroids (int, optional): The number of massless particles in the asteroid belt. Default: 0.
+        checkpoint_interval (int, optional): Spacing of the snapshots taken while jumping to a date, in days. Default: 365.
+        checkpoint_capacity (int, optional): Number of snapshots held in memory. Default: 256.
+        checkpoint_directory (str, optional): Directory for persistent snapshots. Default: None (memory only).
+        max_step (float, optional): The largest integration step in days. Steps of t_step days are divided into
+                                    substeps if necessary. Default: None (no limit).
+        backend (str, optional): The backend of date jumps, see lib_backend.get_backend. Default: 'auto'
+                                 (compiled if numba is installed).
+        """
+        self.bodies, self.current_date = create_celestial_bodies(which, filename=filename)
+        self.particles = create_asteroid_belt(num_asteroids, self.bodies[0], G, seed=0) if num_asteroids > 0 else None
+        self.t_step = t_step
+        self.integrator = integrator
+        self.solver = solver
+        self.max_step = max_step
+        self.backend = backend
+        self.steps_per_call = 64  # steps of a date jump advanced per backend call, between progress reports
+        self.monitor = None  # ConservationMonitor, see monitor_conservation
+        # Snapshots for date jumps, starting with the initial state
+        self.checkpoints = CheckpointStore(checkpoint_interval, checkpoint_capacity, checkpoint_directory)
+        self.checkpoints.add(self.current_date, *self.get_state())
+
+    def get_state(self):
+        """
+        Returns:
+        tuple: Positions and velocities of all celestial bodies followed by those of the particles.
+        """
+        positions, velocities, _ = get_state(self.bodies)
+        if self.particles is not None:
+            positions = np.concatenate((positions, self.particles.positions))
+            velocities = np.concatenate((velocities, self.particles.velocities))
+        return positions, velocities
+
+    def set_state(self, positions, velocities):
+        """
+        Restores a state as returned by get_state.
+        """
+        num_bodies = len(self.bodies)
+        set_state(self.bodies, positions[:num_bodies], velocities[:num_bodies])
+        if self.particles is not None:
+            self.particles.positions = np.array(positions[num_bodies:])
+            self.particles.velocities = np.array(velocities[num_bodies:])
+
+    def copy(self):
+        """
+        Returns:
+        Simulation: A copy with its own bodies and particles, which can be advanced independently.
+                    The checkpoint store is shared (it is thread-safe), so that snapshots taken by either one
+                    serve both.
+        """
+        clone = copy.copy(self)
+        clone.bodies = copy.deepcopy(self.bodies)
+        clone.particles = copy.deepcopy(self.particles)
+        clone.monitor = copy.deepcopy(self.monitor)
+        return clone
+
+    def massive_state(self):
+        """
+        Returns:
+        tuple: Positions, velocities and masses of the celestial bodies only (without particles).
+        """
+        return get_state(self.bodies)
+
+    def monitor_conservation(self, every=10):
+        """
+        Starts tracking the drift of energy and angular momentum from the current state, see
+        lib_diagnostics.ConservationMonitor. The drift is updated by step() every few steps.
+
+        Parameters:
+        every (int, optional): The number of steps between two evaluations. Default: 10.
+
+        Returns:
+        ConservationMonitor: The monitor, also available as the attribute monitor.
+        """
+        self.monitor = ConservationMonitor(*self.massive_state(), G, every=every)
+        return self.monitor
+
+    def tune(self, tolerance, horizon, **options):
+        """
+        Chooses the integrator and the largest integration step which keep the relative energy drift within
+        the tolerance, see lib_diagnostics.tune_integration. The time step of the dates (t_step) is kept;
+        max_step is set to the tuned step.
+
+        Parameters:
+        tolerance (float): The admissible relative energy drift.
+        horizon (float): The time span in days the configuration is needed for.
+        options: Further arguments of tune_integration, e.g. integrators or min_step.
+
+        Returns:
+        dict: The result of tune_integration.
+        """
+        options.setdefault('max_step', self.t_step)
+        result = tune_integration(*self.massive_state(), G, tolerance, horizon, solver=self.solver, **options)
+        self.integrator = result['integrator']
+        self.max_step = result['t_step']
+        return result
+
+    def step(self, num_steps=1):
+        """
+        Advances the simulation by a number of time steps of t_step days.
+
+        Parameters:
+        num_steps (int, optional): The number of steps. Default: 1.
+
+        Returns:
+        datetime.date: The new current date.
+        """
+        num_substeps = int(np.ceil(self.t_step / self.max_step)) if self.max_step else 1
+        for _ in range(num_steps):
+            for _ in range(num_substeps):
+                compute_timestep(self.bodies, G, self.current_date, t_step=self.t_step / num_substeps,
+                                 solver=self.solver, integrator=self.integrator, particles=self.particles)
+            self.current_date += datetime.timedelta(days=self.t_step)
+            if self.monitor is not None and self.monitor.due():
+                self.monitor.update(*self.massive_state()[:2])
+        return self.current_date
+
+    def jump_to(self, target_date, integrator=None, t_step=None, progress=None, tolerance=None, min_step=1/64):
+        """
+        Integrates the system to the target date, starting from the nearest snapshot if it is closer
+        than the current date.
+
+        With a tolerance, the relative energy drift is checked at every snapshot date: a stretch exceeding
+        the tolerance is integrated again with half the step, and the step grows back (up to t_step) when
+        the drift stays well within the tolerance.
+
+        Parameters:
+        target_date (datetime.date): The date to which the computation is performed.
+        integrator (str, optional): The time integration scheme. Default: the integrator of the simulation.
+        t_step (float, optional): The maximum time step in days. The actual step is chosen such that
+                                  the target date is hit exactly. Default: the time step of the simulation,
+                                  limited by max_step.
+        progress (callable, optional): Called with the fraction of completed days after every steps_per_call steps.
+                                       Default: None.
+        tolerance (float, optional): The admissible relative energy drift of the jump. Default: None (fixed step).
+        min_step (float, optional): The smallest step used to meet the tolerance in days. Default: 1/64.
+
+        Returns:
+        datetime.date: The new current date.
+        """
+        integrator = integrator if integrator is not None else self.integrator
+        if t_step is None:
+            t_step = min(self.t_step, self.max_step or self.t_step)
+        max_step = t_step = abs(t_step)
+
+        checkpoint = self.checkpoints.nearest(target_date)
+        if checkpoint is not None and abs((checkpoint.date - target_date).days) < abs((self.current_date - target_date).days):
+            self.set_state(checkpoint.positions, checkpoint.velocities)
+            self.current_date = checkpoint.date
+
+        total_days = abs((target_date - self.current_date).days)
+        days_done = 0
+        advance = get_backend(self.backend, integrator, self.solver)
+        masses = self.massive_state()[2]
+        monitor = ConservationMonitor(*self.massive_state(), G) if tolerance is not None else None
+        # Integrate piecewise from checkpoint to checkpoint, so that each checkpoint date is hit exactly
+        for waypoint in self.checkpoints.checkpoint_dates_between(self.current_date, target_date) + [target_date]:
+            delta_days = (waypoint - self.current_date).days
+            start_state, start_days_done = (self.get_state(), days_done) if monitor is not None else (None, None)
+            while True:
+                num_steps = int(np.ceil(abs(delta_days) / t_step))
+                step = delta_days / num_steps if num_steps > 0 else 0
+                positions, velocities = self.get_state()
+                for first_step in range(0, num_steps, self.steps_per_call):
+                    batch = min(self.steps_per_call, num_steps - first_step)
+                    positions, velocities = advance(positions, velocities, masses, G, step, batch, integrator,
+                                                    self.solver)
+                    days_done += abs(step) * batch
+                    if progress is not None:
+                        progress(min(days_done, total_days) / total_days)
+                self.set_state(positions, velocities)
+                if monitor is None or num_steps == 0:
+                    break
+                drift = monitor.update(*self.massive_state()[:2])
+                if drift <= tolerance:
+                    if drift < tolerance / 4:
+                        t_step = min(2 * t_step, max_step)
+                    break
+                if t_step / 2 < min_step:
+                    break  # the tolerance cannot be met; keep the result of the smallest step
+                # Integrate the stretch again with half the step
+                t_step /= 2
+                self.set_state(*start_state)
+                days_done = start_days_done
+            self.current_date = waypoint
+            if self.checkpoints.is_checkpoint_date(self.current_date):
+                self.checkpoints.add(self.current_date, *self.get_state())
+        return self.current_date
+
+    def kepler_jump_to(self, target_date):
+        """
+        Moves the system to the target date on unperturbed two-body orbits around the first body (the Sun),
+        see lib_kepler. The cost does not depend on how far the date is, but the mutual perturbations of the
+        bodies are neglected: suited for previews, distant test particles and comets. The barycenter moves
+        uniformly, and the Sun is placed such that it stays the barycenter. No checkpoints are taken.
+
+        Parameters:
+        target_date (datetime.date): The date to which the system is moved.
+
+        Returns:
+        datetime.date: The new current date.
+        """
+        days = (target_date - self.current_date).days
+        positions, velocities = self.get_state()
+        num_bodies = len(self.bodies)
+        masses = np.zeros(len(positions))
+        masses[:num_bodies] = [body.mass for body in self.bodies]
+        total_mass = masses.sum()
+        barycenter = masses @ positions / total_mass
+        barycenter_velocity = masses @ velocities / total_mass
+
+        relative_positions, relative_velocities = propagate(positions[1:] - positions[0], velocities[1:] - velocities[0],
+                                                            G * (masses[0] + masses[1:]), days)
+        positions[1:], velocities[1:] = relative_positions, relative_velocities
+        positions[0] = barycenter + barycenter_velocity * days - masses[1:] @ relative_positions / total_mass
+        velocities[0] = barycenter_velocity - masses[1:] @ relative_velocities / total_mass
+        positions[1:] += positions[0]
+        velocities[1:] += velocities[0]
+
+        self.set_state(positions, velocities)
+        self.current_date = target_date
+        if self.monitor is not None:
+            self.monitor.reset(*self.massive_state()[:2])
+        return self.current_date
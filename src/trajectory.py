@@ -0,0 +1,160 @@
+import datetime
+import json
+import os
+import numpy as np
+
+# A trajectory is a directory holding one .npy file per column plus a JSON file with metadata:
+#     times.npy       (num_samples,)           days since start_date
+#     positions.npy   (num_samples, num_bodies, 3)  A.U.
+#     velocities.npy  (num_samples, num_bodies, 3)  A.U./day
+#     metadata.json   names, masses, start_date, ...
+# The .npy files are written and read as memory maps, so that trajectories can be larger than the memory.
+
+
+def hermite_interpolate(times, positions, velocities, at):
+    """
+    Interpolates positions and velocities between samples with cubic Hermite polynomials, which match the
+    positions and velocities at both ends of each interval. Only the samples around the requested times are
+    read, so that the samples can be memory-mapped.
+
+    Parameters:
+    times (np.ndarray): The increasing or decreasing times of the samples, shape (num_samples,).
+    positions (np.ndarray): The positions of the samples, shape (num_samples, num_bodies, 3).
+    velocities (np.ndarray): The velocities of the samples (derivatives with respect to the times), likewise.
+    at (np.ndarray): The times to interpolate at, shape (num_times,), within the range of the samples.
+
+    Returns:
+    tuple: The interpolated positions and velocities, of shape (num_times, num_bodies, 3) each.
+    """
+    times, at = np.asarray(times, dtype=float), np.asarray(at, dtype=float)
+    if len(times) == 1:
+        index = np.zeros(len(at), dtype=int)
+        return np.asarray(positions[index], dtype=float), np.asarray(velocities[index], dtype=float)
+    sign = 1 if times[-1] >= times[0] else -1  # trajectories simulated backwards have decreasing times
+    index = np.clip(np.searchsorted(sign * times, sign * at, side='right') - 1, 0, len(times) - 2)
+    h = (times[index + 1] - times[index])[:, np.newaxis, np.newaxis]
+    s = (at[:, np.newaxis, np.newaxis] - times[index, np.newaxis, np.newaxis]) / h
+    p0, p1 = positions[index], positions[index + 1]
+    v0, v1 = velocities[index], velocities[index + 1]
+    # The Hermite basis functions of the end values and end derivatives, and their derivatives
+    s2, s3 = s * s, s * s * s
+    interpolated_positions = (2 * s3 - 3 * s2 + 1) * p0 + (-2 * s3 + 3 * s2) * p1 \
+        + h * ((s3 - 2 * s2 + s) * v0 + (s3 - s2) * v1)
+    interpolated_velocities = (6 * s2 - 6 * s) * (p0 - p1) / h + (3 * s2 - 4 * s + 1) * v0 + (3 * s2 - 2 * s) * v1
+    return interpolated_positions, interpolated_velocities
+
+
+class TrajectoryWriter:
+    def __init__(self, directory, num_samples, names, masses, start_date, metadata=None):
+        """
+        Creates a trajectory on disk with room for a fixed number of samples, to be filled with write().
+
+        Parameters:
+        directory (str): The output directory. It is created if necessary.
+        num_samples (int): The number of samples of the trajectory.
+        names (list): The names of the bodies.
+        masses (np.ndarray): The masses of the bodies in sun masses.
+        start_date (datetime.date): The date corresponding to time 0.
+        metadata (dict, optional): Additional information stored in metadata.json. Default: None.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_samples = num_samples
+        self.num_written = 0
+        num_bodies = len(names)
+        self.times = np.lib.format.open_memmap(os.path.join(directory, 'times.npy'), mode='w+',
+                                               dtype=float, shape=(num_samples,))
+        self.positions = np.lib.format.open_memmap(os.path.join(directory, 'positions.npy'), mode='w+',
+                                                   dtype=float, shape=(num_samples, num_bodies, 3))
+        self.velocities = np.lib.format.open_memmap(os.path.join(directory, 'velocities.npy'), mode='w+',
+                                                    dtype=float, shape=(num_samples, num_bodies, 3))
+        self.metadata = {
+            **(metadata or {}),
+            'names': list(names),
+            'masses': [float(m) for m in masses],
+            'start_date': start_date.isoformat(),
+            'num_samples': num_samples,
+        }
+        with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+            json.dump(self.metadata, f, indent=2)
+
+    def write(self, times, positions, velocities):
+        """
+        Appends a chunk of samples and flushes it to disk.
+
+        Parameters:
+        times (np.ndarray): The times of the samples in days since the start date, shape (chunk,).
+        positions (np.ndarray): The positions, shape (chunk, num_bodies, 3).
+        velocities (np.ndarray): The velocities, shape (chunk, num_bodies, 3).
+
+        Returns:
+        None.
+        """
+        start, stop = self.num_written, self.num_written + len(times)
+        if stop > self.num_samples:
+            raise ValueError(f"The trajectory has room for {self.num_samples} samples only.")
+        self.times[start:stop] = times
+        self.positions[start:stop] = positions
+        self.velocities[start:stop] = velocities
+        for column in (self.times, self.positions, self.velocities):
+            column.flush()
+        self.num_written = stop
+
+    def close(self):
+        for column in (self.times, self.positions, self.velocities):
+            column.flush()
+        del self.times, self.positions, self.velocities
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Trajectory:
+    def __init__(self, directory):
+        """
+        Opens a trajectory written by TrajectoryWriter. The columns are memory-mapped read-only.
+
+        Parameters:
+        directory (str): The trajectory directory.
+        """
+        with open(os.path.join(directory, 'metadata.json'), 'r') as f:
+            self.metadata = json.load(f)
+        self.directory = directory
+        self.names = self.metadata['names']
+        self.masses = np.array(self.metadata['masses'])
+        self.start_date = datetime.date.fromisoformat(self.metadata['start_date'])
+        self.times = np.load(os.path.join(directory, 'times.npy'), mmap_mode='r')
+        self.positions = np.load(os.path.join(directory, 'positions.npy'), mmap_mode='r')
+        self.velocities = np.load(os.path.join(directory, 'velocities.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.times)
+
+    def date(self, index):
+        """
+        Returns:
+        datetime.date: The date of the sample with the given index.
+        """
+        return self.start_date + datetime.timedelta(days=float(self.times[index]))
+
+    def interpolate(self, days):
+        """
+        Positions and velocities at any times within the trajectory, see hermite_interpolate.
+
+        Parameters:
+        days (np.ndarray): The times in days since the start date.
+
+        Returns:
+        tuple: The positions and velocities, of shape (len(days), num_bodies, 3) each.
+
+        Raises:
+        ValueError: If a time is outside of the trajectory.
+        """
+        days = np.atleast_1d(np.asarray(days, dtype=float))
+        first, last = sorted((float(self.times[0]), float(self.times[-1])))
+        if len(days) and (days.min() < first or days.max() > last):
+            raise ValueError(f"The trajectory covers the days {first} to {last} only.")
+        return hermite_interpolate(self.times, self.positions, self.velocities, days)
@@ -0,0 +1,151 @@
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import numpy as np
+
+# Bodies of a catalog in the units of the data file (kg, km, km/s)
+CATALOG_DTYPE = np.dtype([('name', 'U32'), ('mass', 'f8'), ('position', 'f8', 3), ('velocity', 'f8', 3)])
+CATALOG_VERSION = 1  # part of the cache key; increment when the parsing or CATALOG_DTYPE changes
+
+_KEYS = re.compile(r'[A-Za-z]+=')  # the "X=", "VX=", ... in front of the numbers
+
+
+def _parse_records(records):
+    # Converts the lines of many bodies at once: names, then one string per column of numbers
+    names, masses, positions, velocities = zip(*records)
+    chunk = np.empty(len(records), dtype=CATALOG_DTYPE)
+    chunk['name'] = [name.strip() for name in names]
+    chunk['mass'] = np.array(_KEYS.sub(' ', ' '.join(masses)).split(), dtype=float)
+    chunk['position'] = np.array(_KEYS.sub(' ', ' '.join(positions)).split(), dtype=float).reshape(-1, 3)
+    chunk['velocity'] = np.array(_KEYS.sub(' ', ' '.join(velocities)).split(), dtype=float).reshape(-1, 3)
+    return chunk
+
+
+def iter_catalog(filename, chunk_size=65536):
+    """
+    Reads a file in the format of parse_data line by line and yields the bodies in chunks, so that
+    catalogs of any size can be read with bounded memory.
+
+    Parameters:
+    filename (str): The name of the file to be parsed.
+    chunk_size (int, optional): The number of bodies per chunk. Default: 65536.
+
+    Yields:
+    datetime.datetime: First the date and time of the data,
+    np.ndarray: then structured arrays of CATALOG_DTYPE with up to chunk_size bodies each.
+    """
+    with open(filename, 'r') as f:
+        sections = _iter_sections(f)
+        next(sections)  # comments and units
+        date_section = next(sections)
+        yield datetime.datetime.strptime(date_section[1], date_section[3])
+
+        records = []
+        for lines in sections:
+            records.append(lines[:4])
+            if len(records) == chunk_size:
+                yield _parse_records(records)
+                records = []
+        if records:
+            yield _parse_records(records)
+
+
+def _iter_sections(f):
+    # Groups the lines of a file into sections separated by blank lines
+    lines = []
+    for line in f:
+        line = line.rstrip('\n')
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def file_hash(filename, block_size=2 ** 20):
+    """
+    Returns:
+    str: The SHA-256 hex digest of the content of a file.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_cache_directory():
+    """
+    Returns:
+    str: The directory of the cached catalogs within the cache directory of the user (XDG_CACHE_HOME or
+         ~/.cache, %LOCALAPPDATA% on Windows, ~/Library/Caches on macOS).
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'solar-system-animation', 'catalogs')
+
+
+def load_catalog(filename, chunk_size=65536, cache=True, cache_directory=None):
+    """
+    Loads a catalog of bodies into a structured array.
+
+    The parsed catalog is cached in a binary sidecar file (.npy plus .json for the date) whose name contains
+    the hash of the source file, so that later loads of an unchanged file memory-map the sidecar instead of
+    parsing it. Writing a sidecar removes those of earlier contents of the same file. If the sidecar cannot
+    be written (e.g. in a read-only home directory), the catalog is parsed on every load.
+
+    Parameters:
+    filename (str): The catalog file, in the format of parse_data.
+    chunk_size (int, optional): The number of bodies parsed at once. Default: 65536.
+    cache (bool, optional): Whether to use and write the sidecar. Default: True.
+    cache_directory (str, optional): The directory of the sidecar. Default: see default_cache_directory.
+
+    Returns:
+    tuple: The date and time of the data (datetime object) and a structured array of CATALOG_DTYPE
+           (read-only if memory-mapped).
+    """
+    if cache:
+        # The sidecars of one source file share a prefix, which includes the hash of its path, since
+        # catalogs of the same name from different directories are cached side by side
+        cache_directory = cache_directory or default_cache_directory()
+        path_key = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()[:8]
+        prefix = os.path.join(cache_directory, f"{os.path.basename(filename)}.{path_key}.")
+        stem = f"{prefix}{file_hash(filename)[:16]}-v{CATALOG_VERSION}"
+        try:
+            with open(stem + '.json', 'r') as f:
+                date_time = datetime.datetime.fromisoformat(json.load(f)['date'])
+            return date_time, np.load(stem + '.npy', mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            pass
+
+    chunks = iter_catalog(filename, chunk_size)
+    date_time = next(chunks)
+    bodies = np.concatenate(list(chunks) or [np.empty(0, dtype=CATALOG_DTYPE)])
+
+    if cache:
+        try:
+            os.makedirs(cache_directory, exist_ok=True)
+            # Written under temporary names first, so that a concurrent load never sees a partial file
+            np.save(stem + '.npy.tmp', bodies, allow_pickle=False)
+            os.replace(stem + '.npy.tmp.npy', stem + '.npy')
+            with open(stem + '.json.tmp', 'w') as f:
+                json.dump({'source': os.path.basename(filename), 'date': date_time.isoformat(),
+                           'num_bodies': len(bodies)}, f)
+            os.replace(stem + '.json.tmp', stem + '.json')
+            # Sidecars of earlier contents or versions would never be read again
+            for stale in glob.glob(glob.escape(prefix) + '*-v*.*'):
+                if stale.endswith(('.npy', '.json')) and not stale.startswith(stem + '.'):
+                    os.remove(stale)
+        except OSError:
+            pass
+    return date_time, bodies
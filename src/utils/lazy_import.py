@@ -0,0 +1,26 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Import a module on first use: the module object is returned at once, and the module is executed when one
+    of its attributes is accessed for the first time (see importlib.util.LazyLoader).
+
+    Parameters:
+    name (str): The name of the module, e.g. 'pyglet'.
+
+    Returns:
+    module: The module, already executed if it had been imported before.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
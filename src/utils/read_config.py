@@ -1,6 +1,14 @@
+import functools
 from .resource_path import resource_path
-import yaml
 
+@functools.lru_cache(maxsize=None)
 def read_config():
+    """
+    Parses the configuration file on first use. Later calls return the same dictionary, which must not be modified.
+
+    Returns:
+    dict: The configuration.
+    """
+    import yaml  # only imported when the configuration is needed
     with open(resource_path("config/config.yaml"), "r") as file:
-        return yaml.safe_load(file)
\ No newline at end of file
+        return yaml.safe_load(file)
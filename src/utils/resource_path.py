@@ -1,7 +1,27 @@
+import functools
 import os
 import sys
-from dotenv import load_dotenv
 
+@functools.lru_cache(maxsize=None)
+def base_path():
+    """
+    Get the directory containing the resources folder. It is determined once, on first use.
+
+    Returns:
+    str: The temporary folder of the PyInstaller build, or in development the BASE_PATH
+         of the .env file, falling back to the repository root.
+    """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        return sys._MEIPASS
+
+    except Exception:
+        # In development, use the .env file, falling back to the repository root
+        from dotenv import load_dotenv  # not needed in the PyInstaller build
+        load_dotenv()
+        return os.getenv('BASE_PATH') or os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@functools.lru_cache(maxsize=None)
 def resource_path(relative_path):
     """
     Get absolute path to resource, works for both development and PyInstaller environments.
@@ -13,18 +33,5 @@ def resource_path(relative_path):
     str: The absolute path to the resource file.
     """
     relative_path_parts = os.path.normpath(relative_path).split(os.sep)
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-
-    except Exception:
-        # In development, use the .env file
-        load_dotenv()
-        base_path = os.getenv('BASE_PATH')
-        
     # Join the base path with the relative path to get the absolute path to the resource
-    return os.path.join(base_path, 'resources', *relative_path_parts)
-    
-
-
-    
+    return os.path.join(base_path(), 'resources', *relative_path_parts)
@@ -0,0 +1,29 @@
+import json
+from ..src.benchmark import run_benchmarks, compare, main, BENCHMARKS
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(sizes=[6, 20], steps=[1, 10], min_time=0)
+    assert {'commit', 'numpy', 'cpu_count'} <= set(results['environment'])
+    num_parametrized = sum(parameter is not None for parameter, _ in BENCHMARKS.values())
+    assert len(results['results']) == 2 * num_parametrized + (len(BENCHMARKS) - num_parametrized)
+    assert results['results'][-1]['benchmark'] == 'startup' and results['results'][-1]['params'] == {}
+    for result in results['results']:
+        assert result['repeats'] == 1 and 0 < result['best'] <= result['median']
+    rows = compare(results, results)
+    assert len(rows) == len(results['results']) and all(row[-1] == 1 for row in rows)
+
+
+def test_main_writes_json(tmp_path, capsys):
+    output = str(tmp_path / 'results.json')
+    arguments = ['--benchmarks', 'jump', 'force_matrix', '--sizes', '6,1e5', '--steps', '5', '--min-time', '0', '--quiet']
+    main(arguments + ['--output', output])
+    with open(output) as f:
+        results = json.load(f)['results']
+    assert [result['benchmark'] for result in results] == ['jump', 'force_matrix', 'force_matrix']
+    assert results[0]['params'] == {'num_steps': 5}
+    assert results[2] == {'benchmark': 'force_matrix', 'params': {'num_bodies': 100000}, 'skipped': True}
+
+    # Comparison with the earlier run
+    main(arguments + ['--compare', output])
+    assert 'force_matrix' in capsys.readouterr().err
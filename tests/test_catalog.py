@@ -0,0 +1,102 @@
+import os
+import sys
+import numpy as np
+from ..src.utils import catalog as catalog_module
+from ..src.utils.catalog import load_catalog, iter_catalog, default_cache_directory
+from ..src.utils.parse_data import parse_data
+from ..src.create_celestial_bodies import create_celestial_bodies
+
+HEADER = """// Synthetic catalog
+Units: kg, km, km/s
+
+Date
+2024-01-01 00:00:00
+Format
+%Y-%m-%d %H:%M:%S
+
+"""
+
+
+def write_catalog(filename, num_bodies, seed=0):
+    # A sun at rest plus bodies on circular orbits in the ecliptic, at 1 A.U. for the first one
+    rng = np.random.default_rng(seed)
+    GM_sun = 1.32712440018e11  # km^3/s^2
+    with open(filename, 'w') as f:
+        f.write(HEADER)
+        f.write("Sun\nM=1.9885E30\n X=0 Y=0 Z=0\n VX=0 VY=0 VZ=0\n")
+        for i in range(1, num_bodies):
+            r = 1.496e8 if i == 1 else rng.uniform(0.5, 5) * 1.496e8
+            v = np.sqrt(GM_sun / r)
+            f.write(f"\nBody {i}\nM={rng.uniform(1e15, 1e20):.6E}\n"
+                    f" X={r:.15E} Y=0 Z=0\n  VX=0 VY={v:.15E} VZ=0\n")
+
+
+def test_iter_catalog_matches_parse_data(tmp_path):
+    filename = str(tmp_path / 'catalog.txt')
+    write_catalog(filename, 100)
+    chunks = iter_catalog(filename, chunk_size=7)
+    date_time = next(chunks)
+    chunks = list(chunks)
+    assert [len(chunk) for chunk in chunks] == [7] * 14 + [2]
+    catalog = np.concatenate(chunks)
+
+    expected_date_time, expected = parse_data(filename)
+    assert date_time == expected_date_time
+    assert list(catalog['name']) == [body['name'] for body in expected]
+    np.testing.assert_array_equal(catalog['mass'], [body['mass'] for body in expected])
+    np.testing.assert_array_equal(catalog['position'], [body['position'] for body in expected])
+    np.testing.assert_array_equal(catalog['velocity'], [body['velocity'] for body in expected])
+
+
+def test_load_catalog_cache(tmp_path):
+    filename = str(tmp_path / 'catalog.txt')
+    cache_directory = str(tmp_path / 'cache')
+    write_catalog(filename, 50)
+    date_time, parsed = load_catalog(filename, cache_directory=cache_directory)
+    sidecars = sorted(os.listdir(cache_directory))
+    assert len(sidecars) == 2 and sidecars[0].endswith('.json') and sidecars[1].endswith('.npy')
+    assert sorted(os.listdir(tmp_path)) == ['cache', 'catalog.txt']  # nothing next to the catalog
+
+    cached_date_time, cached = load_catalog(filename, cache_directory=cache_directory)
+    assert isinstance(cached, np.memmap)
+    assert cached_date_time == date_time
+    np.testing.assert_array_equal(cached, parsed)
+
+    # A changed file is parsed again, under a new key, and the stale sidecars are removed
+    del cached
+    write_catalog(filename, 20, seed=1)
+    _, changed = load_catalog(filename, cache_directory=cache_directory)
+    assert len(changed) == 20
+    assert len(os.listdir(cache_directory)) == 2 and not set(os.listdir(cache_directory)) & set(sidecars)
+
+    # A catalog of the same name elsewhere is cached side by side
+    (tmp_path / 'other').mkdir()
+    other = str(tmp_path / 'other' / 'catalog.txt')
+    write_catalog(other, 10)
+    load_catalog(other, cache_directory=cache_directory)
+    assert len(os.listdir(cache_directory)) == 4
+    assert len(load_catalog(filename, cache_directory=cache_directory)[1]) == 20
+
+    # Without cache, nothing is written
+    empty_directory = tmp_path / 'empty'
+    empty_directory.mkdir()
+    load_catalog(filename, cache=False, cache_directory=str(empty_directory))
+    assert os.listdir(empty_directory) == []
+
+
+def test_default_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert default_cache_directory() == os.path.join(str(tmp_path), 'solar-system-animation', 'catalogs')
+
+
+def test_create_celestial_bodies_large_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, 'default_cache_directory', lambda: str(tmp_path / 'cache'))
+    filename = str(tmp_path / 'catalog.txt')
+    write_catalog(filename, 1000)
+    celestial_bodies, _ = create_celestial_bodies('all', filename=filename)
+    assert len(celestial_bodies) == 1000
+    assert celestial_bodies[0].color == (255, 223, 0)  # styled by name
+    assert celestial_bodies[1].name == 'Body 1'
+    assert celestial_bodies[1].radius_px == 2 and celestial_bodies[1].color == (150, 150, 150)
+    np.testing.assert_allclose(celestial_bodies[1].period, 365.25, rtol=1e-2)  # Kepler's third law
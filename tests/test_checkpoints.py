@@ -0,0 +1,89 @@
+import numpy as np
+import datetime
+import pickle
+import threading
+import pytest
+from ..src.checkpoints import CheckpointStore
+
+positions = np.arange(6, dtype=float).reshape(2, 3)
+velocities = -positions
+
+
+def test_nearest_checkpoint():
+    store = CheckpointStore(interval=10)
+    store.add(datetime.date(2024, 1, 1), positions, velocities)
+    store.add(datetime.date(2100, 1, 1), positions + 1, velocities)
+    checkpoint = store.nearest(datetime.date(2090, 1, 1))
+    assert checkpoint.date == datetime.date(2100, 1, 1)
+    np.testing.assert_array_equal(checkpoint.positions, positions + 1)
+    assert CheckpointStore().nearest(datetime.date(2024, 1, 1)) is None
+
+
+def test_eviction_of_least_recently_used():
+    store = CheckpointStore(capacity=2)
+    dates = [datetime.date(2000 + k, 1, 1) for k in range(3)]
+    store.add(dates[0], positions, velocities)
+    store.add(dates[1], positions, velocities)
+    store.get(dates[0])  # dates[1] is now the least recently used one
+    store.add(dates[2], positions, velocities)
+    assert store.dates() == [dates[0], dates[2]]
+
+
+def test_checkpoints_on_disk(tmp_path):
+    date = datetime.date(2024, 1, 1)
+    store = CheckpointStore(capacity=1, directory=str(tmp_path))
+    store.add(date, positions, velocities)
+    store.add(datetime.date(2025, 1, 1), positions, velocities)  # evicts the first one from memory
+    assert date in store
+
+    reloaded = CheckpointStore(directory=str(tmp_path)).get(date)
+    np.testing.assert_array_equal(reloaded.positions, positions)
+    np.testing.assert_array_equal(reloaded.velocities, velocities)
+
+
+def test_checkpoint_dates_between():
+    store = CheckpointStore(interval=100)
+    start = datetime.date.fromordinal(1050)
+    end = datetime.date.fromordinal(1300)
+    forward = store.checkpoint_dates_between(start, end)
+    assert [d.toordinal() for d in forward] == [1100, 1200]
+    assert store.checkpoint_dates_between(end, start) == forward[::-1]
+    assert all(store.is_checkpoint_date(d) for d in forward)
+
+
+def test_invalid_interval():
+    with pytest.raises(ValueError):
+        CheckpointStore(interval=0)
+
+
+def test_store_shared_between_threads():
+    store = CheckpointStore(interval=1, capacity=8)
+    dates = [datetime.date(2000, 1, 1) + datetime.timedelta(days=k) for k in range(200)]
+    errors = []
+
+    def work(offset):
+        try:
+            for k in range(2000):
+                date = dates[(k * 7 + offset) % len(dates)]
+                store.add(date, positions, velocities)
+                store.get(dates[(k + offset) % len(dates)])
+                assert store.nearest(date) is not None
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=work, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert 0 < len(store) <= 8
+
+
+def test_store_can_be_pickled():
+    store = CheckpointStore(interval=10)
+    store.add(datetime.date(2024, 1, 1), positions, velocities)
+    restored = pickle.loads(pickle.dumps(store))
+    np.testing.assert_array_equal(restored.get(datetime.date(2024, 1, 1)).positions, positions)
+    restored.add(datetime.date(2025, 1, 1), positions, velocities)
+    assert len(store) == 1 and len(restored) == 2
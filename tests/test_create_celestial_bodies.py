@@ -2,7 +2,7 @@ import numpy as np
 import datetime
 import pytest
 import mock
-from ..src.create_celestial_bodies import create_celestial_bodies
+from ..src.create_celestial_bodies import create_celestial_bodies, create_asteroid_belt
 #from ..src.parse_data import parse_data
     
 def test_create_celestial_bodies_default():
@@ -44,4 +44,17 @@ def test_create_celestial_bodies_invalid_which():
 #     celestial_bodies, current_date = create_celestial_bodies('all')
 #     assert len(celestial_bodies) == 2, "Expected 2 celestial bodies when input data is valid"
 #     assert celestial_bodies[0].name == "Earth", "Expected 'Earth' as the first celestial body"
-#     assert celestial_bodies[1].name == "Mars", "Expected 'Mars' as the second celestial body"
\ No newline at end of file
+#     assert celestial_bodies[1].name == "Mars", "Expected 'Mars' as the second celestial body"
+
+def test_create_asteroid_belt():
+    G = 2.95912208286e-4
+    sun = create_celestial_bodies()[0][0]
+    belt = create_asteroid_belt(1000, sun, G, inner_radius=2, outer_radius=3, seed=0)
+    assert len(belt) == 1000
+    relative_position = belt.positions - sun.position
+    relative_velocity = belt.velocities - sun.velocity
+    radius = np.linalg.norm(relative_position, axis=1)
+    assert np.all((2 <= radius) & (radius <= 3))
+    # Circular orbits: velocity perpendicular to the radius, with circular speed
+    np.testing.assert_allclose(np.sum(relative_position * relative_velocity, axis=1), 0, atol=1e-12)
+    np.testing.assert_allclose(np.linalg.norm(relative_velocity, axis=1), np.sqrt(G * sun.mass / radius))
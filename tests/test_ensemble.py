@@ -0,0 +1,78 @@
+import json
+import numpy as np
+import pytest
+from ..src.ensemble import sample_initial_conditions, spread_statistics, advance_ensemble, run_ensemble, main
+from ..src.lib_backend import advance_numpy
+from ..src.create_celestial_bodies import create_celestial_bodies, G
+from ..src.lib_calculation import get_state
+
+
+def test_sample_initial_conditions():
+    positions, velocities = np.ones((3, 3)), np.zeros((3, 3))
+    member_positions, member_velocities = sample_initial_conditions(positions, velocities, 2000, [0, 1e-3, 1e-2],
+                                                                    1e-5, seed=1)
+    assert member_positions.shape == member_velocities.shape == (2000, 3, 3)
+    np.testing.assert_array_equal(member_positions[0], positions)
+    np.testing.assert_array_equal(member_velocities[0], velocities)
+    np.testing.assert_array_equal(member_positions[:, 0], 1)  # zero uncertainty
+    np.testing.assert_allclose(np.std(member_positions[1:, 1:], axis=(0, 2)), [1e-3, 1e-2], rtol=0.05)
+    np.testing.assert_allclose(np.std(member_velocities[1:]), 1e-5, rtol=0.05)
+
+    # Reproducible with a seed
+    again = sample_initial_conditions(positions, velocities, 2000, [0, 1e-3, 1e-2], 1e-5, seed=1)
+    np.testing.assert_array_equal(again[0], member_positions)
+
+
+def test_spread_statistics():
+    # Body 1 is at +-d from the Sun (which itself moves) in x, so its distance from the mean is always d
+    positions = np.zeros((4, 2, 3))
+    positions[:, 0, 1] = [0, 1, 2, 3]
+    positions[:, 1] = positions[:, 0]
+    positions[:, 1, 0] = [5 + 0.1, 5 - 0.1, 5 + 0.1, 5 - 0.1]
+    statistics = spread_statistics(positions)
+    for name in ('rms', 'p95', 'max'):
+        np.testing.assert_allclose(statistics[name], [0, 0.1])
+
+
+def test_advance_ensemble_matches_single_systems():
+    bodies, _ = create_celestial_bodies('inner')
+    positions, velocities, masses = get_state(bodies)
+    member_positions, member_velocities = sample_initial_conditions(positions, velocities, 5, 1e-4, 1e-6, seed=2)
+
+    for integrator in ('euler', 'yoshida4'):
+        ensemble = advance_ensemble(member_positions, member_velocities, masses, 2, 10, integrator)
+        for member in range(5):
+            expected = advance_numpy(member_positions[member], member_velocities[member], masses, G, 2, 10,
+                                     integrator)
+            np.testing.assert_allclose(ensemble[0][member], expected[0], rtol=1e-10)
+            np.testing.assert_allclose(ensemble[1][member], expected[1], rtol=1e-10)
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_run_ensemble(num_workers):
+    reported = []
+    results = run_ensemble(7, 100, which='inner', t_step=3, report_every=30, num_workers=num_workers,
+                           progress=lambda days, statistics: reported.append(days))
+    assert results['names'][0] == 'Sun'
+    # 34 steps of 100/34 days, reported every 10 steps
+    np.testing.assert_allclose(results['days'], [0, 1000 / 34, 2000 / 34, 3000 / 34, 100])
+    assert reported == results['days']
+    assert results['rms'].shape == results['max'].shape == (5, 6)
+    assert results['positions'].shape == (7, 6, 3)
+    np.testing.assert_array_equal(results['rms'][:, 0], 0)
+    assert np.all(results['max'][-1, 1:] > results['max'][0, 1:])  # the members drift apart
+
+    # The split across processes does not change the result
+    single = run_ensemble(7, 100, which='inner', t_step=3, report_every=30)
+    np.testing.assert_allclose(results['positions'], single['positions'], rtol=1e-14)
+
+
+def test_main_writes_json(tmp_path, capsys):
+    output = str(tmp_path / 'ensemble.json')
+    main(['--bodies', 'inner', '--members', '3', '--years', '0.1', '--report-every', '10', '--workers', '1',
+          '--output', output])
+    with open(output) as f:
+        results = json.load(f)
+    assert results['names'][0] == 'Sun'
+    assert len(results['days']) == len(results['rms']) == 5
+    assert 'Mercury' in capsys.readouterr().err
@@ -0,0 +1,79 @@
+import datetime
+import numpy as np
+import pytest
+from ..src.ephemeris import ecliptic_to_equatorial, sky_coordinates, iter_trajectory_ephemeris, \
+    iter_simulation_ephemeris, main, OBLIQUITY, SPEED_OF_LIGHT
+from ..src.simulate import run_simulation
+from ..src.simulation import Simulation
+from ..src.trajectory import Trajectory
+
+
+def test_ecliptic_to_equatorial():
+    # The equinox stays, the pole of the ecliptic is tilted by the obliquity towards negative y
+    np.testing.assert_allclose(ecliptic_to_equatorial(np.array([1.0, 0, 0])), [1, 0, 0])
+    pole = ecliptic_to_equatorial(np.array([0, 0, 1.0]))
+    np.testing.assert_allclose(pole, [0, -np.sin(np.radians(OBLIQUITY)), np.cos(np.radians(OBLIQUITY))])
+
+
+def test_sky_coordinates_geometry():
+    # Sun at the origin, observer at (1, 0, 0), a body at (1, 1, 0), all at rest
+    positions = np.array([[[0, 0, 0], [1, 0, 0], [1, 1, 0]]], dtype=float)
+    coordinates = sky_coordinates(positions, np.zeros_like(positions), observer=1, obliquity=0)
+    np.testing.assert_allclose(coordinates['distance'][0], [1, np.nan, 1])
+    np.testing.assert_allclose(coordinates['ra'][0], [180, np.nan, 90])
+    np.testing.assert_allclose(coordinates['dec'][0], [0, np.nan, 0], atol=1e-12)
+    np.testing.assert_allclose(coordinates['elongation'][0], [np.nan, np.nan, 90])
+
+
+def test_sky_coordinates_light_time():
+    # A body 10 A.U. away moving sideways is seen where it was 10 / c days ago
+    positions = np.array([[[0, 0, 0], [10, 0, 0]]], dtype=float)
+    velocities = np.array([[[0, 0, 0], [0, 0.01, 0]]])
+    coordinates = sky_coordinates(positions, velocities, observer=0, center=1, obliquity=0)
+    light_time = 10 / SPEED_OF_LIGHT
+    np.testing.assert_allclose(coordinates['ra'][0, 1], 360 - np.degrees(np.arctan(0.01 * light_time / 10)))
+    np.testing.assert_allclose(coordinates['distance'][0, 1], np.hypot(10, 0.01 * light_time), rtol=1e-12)
+
+
+def test_simulation_and_trajectory_agree(tmp_path):
+    output = str(tmp_path / 'trajectory')
+    run_simulation(output, datetime.date(2024, 3, 1), which='inner', integrator='leapfrog')
+    trajectory = Trajectory(output)
+
+    simulation = Simulation('inner', integrator='leapfrog')
+    positions = simulation.get_state()[0]
+    chunks = list(iter_simulation_ephemeris(simulation, 60, step=1, chunk_size=7))
+    np.testing.assert_array_equal(simulation.get_state()[0], positions)  # the simulation is not advanced
+    assert [len(chunk['days']) for chunk in chunks] == [7] * 8 + [5]
+    from_simulation = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+    chunks = list(iter_trajectory_ephemeris(trajectory, chunk_size=50))
+    from_trajectory = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    for name in ('days', 'ra', 'dec', 'distance', 'elongation'):
+        np.testing.assert_allclose(from_simulation[name], from_trajectory[name], rtol=1e-9)
+
+    # Interpolated between the samples of the trajectory, hourly
+    chunks = list(iter_trajectory_ephemeris(trajectory, step=1 / 24, start=10, stop=12))
+    assert len(chunks) == 1 and len(chunks[0]['days']) == 49
+    np.testing.assert_allclose(chunks[0]['ra'][::24], from_trajectory['ra'][10:13], rtol=1e-12)
+    assert np.all(np.abs(np.diff(chunks[0]['ra'][:, 1])) < 0.2)  # Mercury moves smoothly in between
+
+
+def test_backwards():
+    chunks = list(iter_simulation_ephemeris(Simulation('inner'), -3, observer='mars', step=0.5))
+    np.testing.assert_allclose(chunks[0]['days'], [0, -0.5, -1, -1.5, -2, -2.5, -3])
+    assert np.all(np.isnan(chunks[0]['ra'][:, 4]))
+    with pytest.raises(ValueError):
+        next(iter_simulation_ephemeris(Simulation('inner'), 1, observer='Vulcan'))
+
+
+def test_main_writes_csv(tmp_path, capsys):
+    output = str(tmp_path / 'ephemeris.csv')
+    main(['--bodies', 'inner', '--years', '0.01', '--output', output])
+    with open(output) as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith('# Seen from Earth since 2024-01-01')
+    assert lines[1].split(',')[:3] == ['days', 'Sun_ra', 'Sun_dec']
+    assert len(lines) == 2 + int(0.01 * 365.25 * 24) + 1
+    assert len(lines[2].split(',')) == 1 + 4 * 6
+    assert 'written' in capsys.readouterr().err
@@ -0,0 +1,76 @@
+import datetime
+import io
+import os
+import numpy as np
+import pytest
+from ..src.export import SceneRenderer, frame_times, export_frames, main
+from ..src.simulate import run_simulation
+from ..src.trajectory import Trajectory
+from .test_lib_raster import decode_png
+
+SIZE = {'width': 160, 'height': 120}
+
+
+@pytest.fixture(scope='module')
+def trajectory_directory(tmp_path_factory):
+    output = str(tmp_path_factory.mktemp('export') / 'trajectory')
+    run_simulation(output, datetime.date(2024, 4, 10), which='inner', integrator='leapfrog', save_every=2)
+    return output
+
+
+def test_render(trajectory_directory):
+    renderer = SceneRenderer(trajectory_directory, field_of_view=4, **SIZE)
+    image = renderer.render(50)
+    assert image.shape == (120, 160, 3) and image.dtype == np.uint8
+    # The Sun is drawn in its color at the center of the frame, the tails and labels elsewhere
+    sun_color = renderer.styles[0][1]
+    np.testing.assert_array_equal(image[60, 80], sun_color)
+    assert np.count_nonzero(image.any(axis=2)) > 200
+    # Each frame only depends on its time
+    np.testing.assert_array_equal(renderer.render(50), SceneRenderer(trajectory_directory, field_of_view=4,
+                                                                     **SIZE).render(50))
+    assert not np.array_equal(renderer.render(0), image)
+
+
+def test_frame_times(trajectory_directory):
+    trajectory = Trajectory(trajectory_directory)
+    np.testing.assert_array_equal(frame_times(trajectory, 30), [0, 30, 60, 90])
+    np.testing.assert_array_equal(frame_times(trajectory, -45.5), [100, 54.5, 9])
+    np.testing.assert_array_equal(frame_times(trajectory, 10, start=95), [95])
+    np.testing.assert_array_equal(frame_times(trajectory, 10, start=20, stop=10), [])
+
+
+def test_export_raw_frames_in_parallel(trajectory_directory):
+    times = frame_times(Trajectory(trajectory_directory), 7)
+    outputs, written = [], []
+    for num_workers in (1, 2):
+        output = io.BytesIO()
+        assert export_frames(trajectory_directory, output, times, num_workers=num_workers, chunk_size=3,
+                             progress=written.append, **SIZE) == len(times)
+        outputs.append(output.getvalue())
+    # The frames come in order, whatever the number of workers
+    assert outputs[0] == outputs[1]
+    assert len(outputs[0]) == len(times) * 120 * 160 * 3
+    assert written[:5] == [3, 6, 9, 12, 15] and written[4] == len(times)
+    frame = np.frombuffer(outputs[0], dtype=np.uint8).reshape(len(times), 120, 160, 3)[2]
+    np.testing.assert_array_equal(frame, SceneRenderer(trajectory_directory, **SIZE).render(times[2]))
+
+
+def test_export_png_sequence(trajectory_directory, tmp_path):
+    output = str(tmp_path / 'frames')
+    times = np.array([10, 20.5, 30])
+    assert export_frames(trajectory_directory, output, times, num_workers=2, chunk_size=2, **SIZE) == 3
+    assert sorted(os.listdir(output)) == ['frame_000000.png', 'frame_000001.png', 'frame_000002.png']
+    with open(os.path.join(output, 'frame_000001.png'), 'rb') as f:
+        image = decode_png(f.read())
+    np.testing.assert_array_equal(image, SceneRenderer(trajectory_directory, **SIZE).render(20.5))
+
+
+def test_main(trajectory_directory, tmp_path, capsys):
+    output = str(tmp_path / 'frames')
+    main(['--trajectory', trajectory_directory, '--output', output, '--width', '64', '--height', '48',
+          '--start', '2024-02-01', '--end', '2024-02-10', '--days-per-frame', '3', '--workers', '1'])
+    assert len(os.listdir(output)) == 4
+    assert "4 frames written" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(['--trajectory', trajectory_directory, '--output', output, '--days-per-frame', '0'])
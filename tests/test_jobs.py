@@ -0,0 +1,43 @@
+import datetime
+import numpy as np
+import pytest
+from concurrent.futures import CancelledError
+from ..src.jobs import JumpScheduler
+from ..src.simulation import Simulation
+
+
+def test_jump_runs_on_private_copy():
+    simulation = Simulation('inner')
+    start_date = simulation.current_date
+    initial_positions = simulation.get_state()[0]
+    target_date = start_date + datetime.timedelta(days=200)
+    progress = []
+    scheduler = JumpScheduler(progress_interval=0.5)
+    try:
+        result = scheduler.submit(simulation, target_date, progress=progress.append).result(timeout=30)
+    finally:
+        scheduler.shutdown()
+    assert result.current_date == target_date
+    # The original is untouched, and the job gives the same state as a jump in place
+    assert simulation.current_date == start_date
+    np.testing.assert_array_equal(simulation.get_state()[0], initial_positions)
+    expected = Simulation('inner')
+    expected.jump_to(target_date)
+    np.testing.assert_array_equal(result.get_state()[0], expected.get_state()[0])
+    # Throttled progress, ending with completion
+    assert 1 <= len(progress) < 10 and progress[-1] == 1
+
+
+def test_new_jump_supersedes_running_one():
+    simulation = Simulation('inner')
+    scheduler = JumpScheduler()
+    try:
+        slow_job = scheduler.submit(simulation, simulation.current_date + datetime.timedelta(days=10 ** 6))
+        target_date = simulation.current_date + datetime.timedelta(days=10)
+        job = scheduler.submit(simulation, target_date)
+        assert job.result(timeout=30).current_date == target_date
+        assert slow_job.cancelled()
+        with pytest.raises(CancelledError):
+            slow_job.result()
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import pytest
+from ..src.utils.lazy_import import lazy_import
+
+
+def test_lazy_import_executes_on_first_use(tmp_path, monkeypatch):
+    (tmp_path / 'lazy_probe.py').write_text('import sys\nsys.lazy_probe_runs += 1\nVALUE = 42\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, 'lazy_probe_runs', 0, raising=False)
+    monkeypatch.delitem(sys.modules, 'lazy_probe', raising=False)
+    module = lazy_import('lazy_probe')
+    assert sys.lazy_probe_runs == 0
+    assert module.VALUE == 42
+    assert sys.lazy_probe_runs == 1
+    assert lazy_import('lazy_probe') is sys.modules['lazy_probe']
+    assert sys.lazy_probe_runs == 1
+
+
+def test_lazy_import_returns_imported_module():
+    assert lazy_import('os') is os
+
+
+def test_lazy_import_missing_module():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import('no_such_module_for_lazy_import')
+
+
+def test_main_import_does_not_execute_pyglet():
+    root_package = __package__.split('.')[0]
+    parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {root_package}.src.main'],
+                            cwd=parent, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    imported = [line.rsplit('|', 1)[-1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')]
+    assert f'{root_package}.src.main' in imported
+    assert 'pyglet' not in imported
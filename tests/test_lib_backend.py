@@ -0,0 +1,76 @@
+import datetime
+import numpy as np
+import pytest
+import mock
+from ..src import lib_backend
+from ..src.lib_backend import advance_numpy, advance_numba, get_backend, COMPILED_INTEGRATORS
+from ..src.lib_calculation import compute_timestep
+from ..src.simulation import Simulation
+from ..src.create_celestial_bodies import G
+
+
+def system(num_asteroids=20):
+    simulation = Simulation('all', num_asteroids=num_asteroids)
+    positions, velocities = simulation.get_state()
+    return simulation, positions, velocities, simulation.massive_state()[2]
+
+
+def run_kernel(positions, velocities, masses, t_step, num_steps, integrator):
+    # The loop of the numba backend, run by the interpreter if numba is not installed
+    kernel = getattr(lib_backend._advance, 'py_func', lib_backend._advance)
+    drifts, kicks = (np.array(coefficients, dtype=float) for coefficients in COMPILED_INTEGRATORS[integrator])
+    positions, velocities = positions.copy(), velocities.copy()
+    kernel(positions, velocities, masses, G, t_step, num_steps, drifts, kicks)
+    return positions, velocities
+
+
+def test_advance_numpy_matches_compute_timestep():
+    simulation, positions, velocities, masses = system()
+    for _ in range(10):
+        compute_timestep(simulation.bodies, G, simulation.current_date, t_step=0.5, integrator='leapfrog',
+                         particles=simulation.particles)
+    new_positions, new_velocities = advance_numpy(positions, velocities, masses, G, 0.5, 10, 'leapfrog')
+    np.testing.assert_array_equal(new_positions, simulation.get_state()[0])
+    np.testing.assert_array_equal(new_velocities, simulation.get_state()[1])
+
+
+@pytest.mark.parametrize('integrator', list(COMPILED_INTEGRATORS))
+def test_compiled_loop_matches_numpy(integrator):
+    _, positions, velocities, masses = system()
+    expected = advance_numpy(positions, velocities, masses, G, 0.5, 20, integrator)
+    result = run_kernel(positions, velocities, masses, 0.5, 20, integrator)
+    np.testing.assert_allclose(result[0], expected[0], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result[1], expected[1], rtol=0, atol=1e-14)
+
+
+@pytest.mark.parametrize('integrator', list(COMPILED_INTEGRATORS))
+def test_numba_matches_numpy(integrator):
+    pytest.importorskip('numba')
+    _, positions, velocities, masses = system(num_asteroids=100)
+    expected = advance_numpy(positions, velocities, masses, G, 1, 365, integrator)
+    result = advance_numba(positions, velocities, masses, G, 1, 365, integrator)
+    np.testing.assert_allclose(result[0], expected[0], rtol=0, atol=1e-10)
+    np.testing.assert_allclose(result[1], expected[1], rtol=0, atol=1e-12)
+    assert get_backend('auto', integrator) is advance_numba
+
+
+def test_get_backend():
+    with mock.patch.object(lib_backend, 'numba', None):
+        assert get_backend() is advance_numpy
+        with pytest.raises(ValueError):
+            advance_numba(np.zeros((2, 3)), np.zeros((2, 3)), np.ones(2), G, 1, 1)
+    assert get_backend('numpy', 'rk45') is advance_numpy
+    assert get_backend('auto', 'rk45') is advance_numpy
+    assert get_backend('auto', 'euler', solver='barnes-hut') is advance_numpy
+    with pytest.raises(ValueError):
+        get_backend('fortran')
+
+
+def test_simulation_backends_agree():
+    target_date = datetime.date(2025, 1, 1)
+    states = []
+    for backend in ('numpy', 'auto'):
+        simulation = Simulation('inner', integrator='yoshida4', num_asteroids=10, backend=backend)
+        simulation.jump_to(target_date)
+        states.append(simulation.get_state())
+    np.testing.assert_allclose(states[0][0], states[1][0], rtol=0, atol=1e-10)
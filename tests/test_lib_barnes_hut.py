@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from ..src.lib_barnes_hut import *
+from ..src.lib_calculation import compute_accelerations, acceleration_error, get_solver
+
+G = 2.95912208286e-4
+rng = np.random.default_rng(1)
+positions = rng.normal(size=(500, 3)) * np.array([10, 10, 1])
+masses = rng.uniform(1e-10, 1e-8, size=500)
+
+
+def test_barnes_hut_zero_opening_angle_is_exact():
+    accelerations = compute_accelerations_barnes_hut(positions, masses, G, theta=0)
+    expected = compute_accelerations(positions, masses, G)
+    np.testing.assert_allclose(accelerations, expected, rtol=1e-9)
+
+
+def test_barnes_hut_error_decreases_with_opening_angle():
+    coarse = acceleration_error(positions, masses, G, get_solver('barnes-hut', theta=1.0))
+    fine = acceleration_error(positions, masses, G, get_solver('barnes-hut', theta=0.3))
+    assert fine['median'] < coarse['median']
+    assert fine['p99'] < 1e-2
+
+
+def test_octree_contains_all_bodies():
+    tree = Octree(positions, masses, leaf_size=4)
+    assert tree.leaf_count.sum() == len(masses)
+    assert np.all(tree.leaf_count[~tree.is_leaf] == 0)
+    assert np.isclose(tree.mass[0], masses.sum())
+    np.testing.assert_allclose(tree.center_of_mass[0], masses @ positions / masses.sum())
+
+
+def test_octree_refit():
+    tree = Octree(positions, masses)
+    shifted = positions + 0.01
+    tree.refit(shifted)
+    np.testing.assert_allclose(tree.center_of_mass[0], masses @ shifted / masses.sum())
+    np.testing.assert_allclose(tree.accelerations(G, theta=0), compute_accelerations(shifted, masses, G), rtol=1e-9)
+
+
+def test_unknown_solver():
+    with pytest.raises(ValueError):
+        get_solver('invalid')
@@ -40,4 +40,57 @@ def test_total_force_out_of_range():
         total_force(forces, 3)
         assert False, "Expected an IndexError"
     except IndexError:
-        assert True
\ No newline at end of file
+        assert True
+
+def test_compute_accelerations_equivalence():
+    # The tiled kernel must match the force matrix divided by the masses
+    rng = np.random.default_rng(0)
+    num_bodies = 50
+    positions = rng.normal(size=(num_bodies, 3)) * 1e11
+    masses = rng.uniform(1e22, 1e25, size=num_bodies)
+    bodies = [Struct(position=p, mass=m) for p, m in zip(positions, masses)]
+
+    forces = compute_force_matrix(bodies, G)
+    expected = np.array([total_force(forces, i) / masses[i] for i in range(num_bodies)])
+
+    for tile_size in [1, 7, 256]:
+        accelerations = compute_accelerations(positions, masses, G, tile_size=tile_size)
+        np.testing.assert_allclose(accelerations, expected, rtol=1e-10, atol=0)
+
+
+def test_compute_force_matrix_matches_compute_force():
+    bodies = [
+        Struct(**body1),
+        Struct(**body2),
+        Struct(**body3)
+    ]
+    forces = compute_force_matrix(bodies, G)
+    for i in range(len(bodies)):
+        for j in range(len(bodies)):
+            expected = np.zeros(3) if i == j else compute_force(bodies[i], bodies[j], G)
+            np.testing.assert_allclose(forces[:, i, j], expected, rtol=1e-12)
+
+
+def test_particle_accelerations_match_full_solution():
+    # Massless particles must feel the same acceleration as in a full solution with zero masses
+    rng = np.random.default_rng(2)
+    positions = rng.normal(size=(5, 3))
+    masses = rng.uniform(0.1, 1, size=5)
+    particle_positions = rng.normal(size=(20, 3))
+
+    accelerations = compute_particle_accelerations(particle_positions, positions, masses, G, chunk_size=6)
+    expected = compute_accelerations(np.concatenate((positions, particle_positions)),
+                                     np.concatenate((masses, np.zeros(20))), G)[5:]
+    np.testing.assert_allclose(accelerations, expected, rtol=1e-12)
+
+
+def test_ensemble_accelerations_match_single_systems():
+    rng = np.random.default_rng(3)
+    positions = rng.normal(size=(11, 6, 3))
+    masses = rng.uniform(0.1, 1, size=6)
+
+    accelerations = compute_ensemble_accelerations(positions, masses, G, chunk_size=4)
+    assert accelerations.shape == positions.shape
+    for member in range(len(positions)):
+        np.testing.assert_allclose(accelerations[member], compute_accelerations(positions[member], masses, G),
+                                   rtol=1e-10, atol=1e-30)
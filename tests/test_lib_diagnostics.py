@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from ..src.lib_diagnostics import *
+from ..src.create_celestial_bodies import create_celestial_bodies, G
+from ..src.lib_calculation import get_state
+
+
+def test_energy_and_angular_momentum_of_two_bodies():
+    positions = np.array([[0, 0, 0], [2, 0, 0]], dtype=float)
+    velocities = np.array([[0, 0, 0], [0, 3, 0]], dtype=float)
+    masses = np.array([4, 1], dtype=float)
+    assert kinetic_energy(velocities, masses) == pytest.approx(4.5)
+    assert potential_energy(positions, masses, 1) == pytest.approx(-2)
+    np.testing.assert_allclose(angular_momentum(positions, velocities, masses), [0, 0, 6])
+
+
+def test_potential_energy_tiles():
+    rng = np.random.default_rng(0)
+    positions, masses = rng.normal(size=(50, 3)), rng.uniform(size=50)
+    expected = -sum(masses[i] * masses[j] / np.linalg.norm(positions[i] - positions[j])
+                    for i in range(50) for j in range(i + 1, 50))
+    assert potential_energy(positions, masses, 1, tile_size=7) == pytest.approx(expected, rel=1e-12)
+
+
+def test_conservation_monitor():
+    positions, velocities, masses = get_state(create_celestial_bodies('inner')[0])
+    monitor = ConservationMonitor(positions, velocities, masses, G, every=3)
+    assert [monitor.due() for _ in range(6)] == [False, False, True, False, False, True]
+    assert monitor.update(positions, velocities) == 0
+    assert monitor.update(positions, velocities * 1.01) > 1e-3
+    assert monitor.angular_momentum_drift == pytest.approx(0.01)
+
+
+def test_tune_integration():
+    positions, velocities, masses = get_state(create_celestial_bodies('inner')[0])
+    # A loose budget is met by the cheapest scheme, a tight one needs a higher order
+    assert tune_integration(positions, velocities, masses, G, 1e-3, 365)['integrator'] == 'euler'
+    result = tune_integration(positions, velocities, masses, G, 1e-8, 365, max_probe_days=100)
+    assert result['integrator'] == 'yoshida4'
+    assert result['energy_drift'] <= 1e-8
+    assert energy_drift(positions, velocities, masses, G, 100, 2 * result['t_step'], 'yoshida4') > 1e-8
+    with pytest.raises(ValueError):
+        tune_integration(positions, velocities, masses, G, 1e-16, 365, min_step=0.5)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from ..src.lib_integration import *
+from ..src.lib_calculation import compute_accelerations
+
+G = 2.95912208286e-4
+masses = np.array([1, 3e-6])
+# Earth-like orbit with some eccentricity
+positions0 = np.array([[0, 0, 0], [1, 0, 0]], dtype=float)
+velocities0 = np.array([[0, 0, 0], [0, 0.02, 0]], dtype=float)
+
+
+def acceleration(positions):
+    return compute_accelerations(positions, masses, G)
+
+
+def integrate(integrator, t_step, t_end=365):
+    positions, velocities = positions0, velocities0
+    for _ in range(int(round(t_end / t_step))):
+        positions, velocities = get_integrator(integrator)(positions, velocities, t_step, acceleration)
+    return positions, velocities
+
+
+def test_convergence_order():
+    reference, _ = integrate('rk45', 5)
+    for integrator, order in [('euler', 1), ('leapfrog', 2), ('yoshida4', 4)]:
+        error_coarse = np.abs(integrate(integrator, 2)[0] - reference).max()
+        error_fine = np.abs(integrate(integrator, 1)[0] - reference).max()
+        observed_order = np.log2(error_coarse / error_fine)
+        assert observed_order > order - 0.5, f"{integrator}: observed order {observed_order}"
+
+
+def test_inputs_not_modified():
+    positions, velocities = positions0.copy(), velocities0.copy()
+    for integrator in ['euler', 'leapfrog', 'yoshida4', 'rk45']:
+        get_integrator(integrator)(positions, velocities, 1, acceleration)
+        np.testing.assert_array_equal(positions, positions0)
+        np.testing.assert_array_equal(velocities, velocities0)
+
+
+def test_backward_integration():
+    positions, velocities = integrate('yoshida4', 1, t_end=100)
+    for _ in range(100):
+        positions, velocities = yoshida4_step(positions, velocities, -1, acceleration)
+    np.testing.assert_allclose(positions, positions0, atol=1e-9)
+
+
+def test_dop853():
+    pytest.importorskip('scipy')
+    reference, _ = integrate('rk45', 5)
+    positions, _ = integrate('dop853', 73)
+    np.testing.assert_allclose(positions, reference, atol=1e-6)
+
+
+def test_unknown_integrator():
+    with pytest.raises(ValueError):
+        get_integrator('invalid')
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from ..src.lib_kepler import solve_kepler, state_to_elements, elements_to_state, propagate
+from ..src.lib_integration import get_integrator
+
+G = 2.95912208286e-4
+
+
+def random_orbits(num_bodies, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.normal(size=(num_bodies, 3))
+    velocities = rng.normal(size=(num_bodies, 3)) * 0.02
+    # Special cases: circular orbit in the x-y plane, retrograde orbit in the x-y plane, hyperbolic orbit
+    positions[:3] = (1, 0, 0)
+    velocities[:3] = (0, np.sqrt(G), 0), (0, -0.015, 0), (0, 0.05, 0.01)
+    return positions, velocities
+
+
+@pytest.mark.parametrize('eccentricity', [0, 0.1, 0.5, 0.9, 0.999, 1.5, 10])
+def test_solve_kepler(eccentricity):
+    mean_anomaly = np.linspace(-20, 20, 1001)
+    anomaly = solve_kepler(mean_anomaly, eccentricity)
+    if eccentricity < 1:
+        residual = anomaly - eccentricity * np.sin(anomaly) - (np.mod(mean_anomaly + np.pi, 2 * np.pi) - np.pi)
+    else:
+        residual = eccentricity * np.sinh(anomaly) - anomaly - mean_anomaly
+    np.testing.assert_allclose(residual, 0, atol=1e-10)
+
+
+def test_elements_round_trip():
+    positions, velocities = random_orbits(100)
+    elements = state_to_elements(positions, velocities, G)
+    assert elements['e'][0] < 1e-12 and elements['inclination'][0] == 0
+    assert elements['inclination'][1] == pytest.approx(np.pi)
+    assert elements['e'][2] > 1 and elements['a'][2] < 0
+    new_positions, new_velocities = elements_to_state(elements, G)
+    np.testing.assert_allclose(new_positions, positions, atol=1e-11)
+    np.testing.assert_allclose(new_velocities, velocities, atol=1e-13)
+
+
+def test_propagate_matches_integration():
+    positions, velocities = random_orbits(50)
+    elements = state_to_elements(positions, velocities, G)
+    keep = elements['a'] * (1 - elements['e']) > 0.1  # close approaches need smaller steps to integrate
+    positions, velocities = positions[keep], velocities[keep]
+
+    integrate = get_integrator('yoshida4')
+    integrated_positions, integrated_velocities = positions, velocities
+    for _ in range(1000):
+        integrated_positions, integrated_velocities = integrate(
+            integrated_positions, integrated_velocities, 0.1,
+            lambda x: -G * x / np.linalg.norm(x, axis=1)[:, np.newaxis]**3)
+
+    new_positions, new_velocities = propagate(positions, velocities, G, 100)
+    np.testing.assert_allclose(new_positions, integrated_positions, atol=1e-6)
+    np.testing.assert_allclose(new_velocities, integrated_velocities, atol=1e-7)
+
+    # Several times at once, and back again
+    series, _ = propagate(positions, velocities, G, np.array([0, 100, 1e6]))
+    assert series.shape == (3, len(positions), 3)
+    np.testing.assert_allclose(series[1], new_positions, atol=1e-12)
+    old_positions, _ = propagate(new_positions, new_velocities, G, -100)
+    np.testing.assert_allclose(old_positions, positions, atol=1e-10)
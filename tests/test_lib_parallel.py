@@ -0,0 +1,57 @@
+import numpy as np
+import datetime
+import pytest
+from ..src.lib_parallel import ParallelSolver, shared_solver, close_shared_solvers
+from ..src.lib_calculation import compute_accelerations, compute_accelerations_rows, compute_timestep, get_solver
+from ..src.classes import CelestialBody
+
+G = 2.95912208286e-4
+rng = np.random.default_rng(3)
+positions = rng.normal(size=(300, 3))
+masses = rng.uniform(1e-6, 1e-3, size=300)
+
+
+def test_accelerations_rows():
+    expected = compute_accelerations(positions, masses, G)
+    rows = compute_accelerations_rows(positions, masses, G, 100, 250, tile_size=64)
+    np.testing.assert_allclose(rows, expected[100:250], rtol=1e-10)
+
+
+def test_parallel_solver_matches_exact_kernel():
+    expected = compute_accelerations(positions, masses, G)
+    with ParallelSolver(num_workers=3, tile_size=64, min_bodies=0) as solver:
+        np.testing.assert_allclose(solver(positions, masses, G), expected, rtol=1e-10)
+        # Changed positions and a changed number of bodies
+        np.testing.assert_allclose(solver(positions[:100] * 2, masses[:100], G),
+                                   compute_accelerations(positions[:100] * 2, masses[:100], G), rtol=1e-10)
+
+
+def test_parallel_solver_in_compute_timestep():
+    bodies = [CelestialBody(m, p, np.zeros(3)) for m, p in zip(masses[:20], positions[:20])]
+    with ParallelSolver(num_workers=2, min_bodies=0) as solver:
+        compute_timestep(bodies, G, datetime.date(2024, 1, 1), solver=solver)
+    expected = positions[:20] + compute_accelerations(positions[:20], masses[:20], G)
+    np.testing.assert_allclose([body.position for body in bodies], expected, rtol=1e-10)
+
+
+def test_parallel_solver_reports_dead_worker():
+    with ParallelSolver(num_workers=2, min_bodies=0, poll_interval=0.01) as solver:
+        solver(positions, masses, G)
+        solver._workers[1].kill()
+        solver._workers[1].join()
+        with pytest.raises(RuntimeError, match="worker process"):
+            solver(positions, masses, G)
+        assert solver._workers == []
+        # New workers are started by the next call
+        np.testing.assert_allclose(solver(positions, masses, G), compute_accelerations(positions, masses, G),
+                                   rtol=1e-10)
+
+
+def test_parallel_solver_by_name():
+    solve = get_solver('parallel', num_workers=2, min_bodies=0)
+    try:
+        np.testing.assert_allclose(solve(positions, masses, G), compute_accelerations(positions, masses, G),
+                                   rtol=1e-10)
+        assert shared_solver(num_workers=2, min_bodies=0).num_bodies == len(masses)  # the workers are reused
+    finally:
+        close_shared_solvers()
@@ -41,3 +41,43 @@ def test_generate_perpendicular_vectors():
     with pytest.raises(ValueError) as e:
         generate_perpendicular_vectors(v1)
         assert str(e.value) == "The zero vector does not have a well-defined perpendicular vector.", "Expected ValueError with appropriate error message."
+
+
+def test_segment_quads():
+    starts = np.array([[0, 0], [1, 1]], dtype=float)
+    ends = np.array([[2, 0], [1, 1]], dtype=float)
+    quads = segment_quads(starts, ends, 2)
+    assert quads.shape == (2, 6, 2)
+    # Horizontal segment: offset by half the thickness in y
+    np.testing.assert_allclose(quads[0], [[0, 1], [2, 1], [0, -1], [2, 1], [2, -1], [0, -1]])
+    # Zero length: all vertices collapse onto the point
+    np.testing.assert_allclose(quads[1], np.ones((6, 2)))
+
+
+def test_project_to_view():
+    window = Struct(width=500, height=300)
+    v1, v2 = generate_perpendicular_vectors(np.array([0, 1, 2 / 3]))
+    positions = np.random.default_rng(0).normal(size=(4, 3, 3))  # (samples, bodies, 3)
+    result = project_to_view(positions, projection_matrix(v1, v2), *view_transform(window, 100, 8))
+    assert result.shape == (4, 3, 2)
+    # Same as the projection and scaling of each point on its own
+    for sample, point in zip(result.reshape(-1, 2), positions.reshape(-1, 3)):
+        expected_result = apply_scaling(*orthogonal_projection(point, v1, v2), window, 100, 8)
+        assert np.allclose(sample, expected_result)
+
+
+def test_decimation_stride():
+    # A circle of radius 300 pixels with 1000 samples per revolution
+    angles = np.arange(2000) * 2 * np.pi / 1000
+    points = 300 * np.column_stack((np.cos(angles), np.sin(angles)))
+    stride = decimation_stride(points, tolerance=0.5)
+    # The chords over stride samples deviate from the circle by at most the tolerance (sagitta)
+    sagitta = 300 * (1 - np.cos(stride * np.pi / 1000))
+    assert 0.25 < sagitta <= 0.5
+    # The same estimate from every 10th point, and the limits
+    assert abs(decimation_stride(points[::10], tolerance=0.5, spacing=10) - stride) <= 1
+    assert decimation_stride(points, tolerance=0.5, max_stride=5) == 5
+    assert decimation_stride(points[::50], tolerance=0.5, spacing=50) == 50
+    # Straight lines and single points can be drawn with a single segment
+    assert decimation_stride(np.column_stack((np.arange(100.0), np.zeros(100))), tolerance=0.5) == 99
+    assert decimation_stride(points[:1], tolerance=0.5, max_stride=7) == 7
@@ -0,0 +1,65 @@
+import struct
+import zlib
+import numpy as np
+from ..src.lib_raster import new_image, draw_disk, draw_polyline, draw_text, encode_png
+
+
+def decode_png(data):
+    # Reads the PNG files of encode_png (8-bit RGB, filter type 0)
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    position, chunks = 8, {}
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        kind, content = data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        assert struct.unpack('>I', data[position + 8 + length:position + 12 + length])[0] == zlib.crc32(kind + content)
+        chunks[kind] = chunks.get(kind, b'') + content
+        position += 12 + length
+    width, height = struct.unpack('>II', chunks[b'IHDR'][:8])
+    scanlines = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, -1)
+    assert np.all(scanlines[:, 0] == 0)
+    return scanlines[:, 1:].reshape(height, width, 3)
+
+
+def test_encode_png_round_trip():
+    image = np.random.default_rng(0).integers(0, 256, size=(7, 11, 3), dtype=np.uint8)
+    np.testing.assert_array_equal(decode_png(encode_png(image)), image)
+    np.testing.assert_array_equal(new_image(4, 3, (1, 2, 3))[2, 3], [1, 2, 3])
+
+
+def test_draw_disk():
+    image = new_image(40, 30)
+    draw_disk(image, 10, 5, 4, (255, 0, 0))
+    # y is upwards from the bottom: the center is in row 30 - 1 - 5 from the top
+    np.testing.assert_array_equal(image[24, 10], [255, 0, 0])
+    assert np.all(image[24, 15:] == 0) and np.all(image[:18] == 0)
+    # The area matches the circle, with partially covered pixels at the edge
+    np.testing.assert_allclose(image[..., 0].sum() / 255, np.pi * 16, rtol=0.05)
+    assert np.any((image[..., 0] > 0) & (image[..., 0] < 255))
+
+    # Clipped at the border
+    draw_disk(image, -2, 29, 5, (0, 255, 0))
+    assert image[0, 0, 1] == 255
+
+
+def test_draw_polyline():
+    image = new_image(50, 50)
+    draw_polyline(image, [(5, 10), (45, 10), (45, 40)], (0, 0, 200), thickness=2)
+    # A horizontal segment 2 pixels wide around y = 10, i.e. rows 9 and 10 from the bottom
+    np.testing.assert_array_equal(image[[39, 40], 20, 2], [200, 200])
+    assert image[38, 20, 2] == 0 and image[41, 20, 2] == 0
+    # The corner is not drawn twice, and the vertical segment is there
+    assert image[39, 44, 2] == 200
+    np.testing.assert_array_equal(image[20, [44, 45], 2], [200, 200])
+    # The drawn area is about length times thickness
+    np.testing.assert_allclose(image[..., 2].sum() / 200, (40 + 30) * 2, rtol=0.1)
+
+
+def test_draw_text():
+    image = new_image(100, 20)
+    draw_text(image, "Hi!", 50, 10, color=(0, 255, 0), scale=2, anchor_x='center', anchor_y='center')
+    rows, columns = np.nonzero(image[..., 1])
+    # 3 characters of 5 columns with a column of space in between, 7 rows, scaled by 2, centered at (50, 10)
+    assert columns.min() == 50 - 17 and columns.max() < 50 + 17
+    assert rows.min() == 20 - 1 - (10 + 6) and rows.max() == 20 - 1 - (10 - 7)
+    assert set(np.unique(image[..., 1])) == {0, 255}
+    draw_text(image, "é", 500, 500)  # outside of the image and of the font: nothing happens
@@ -0,0 +1,190 @@
+import numpy as np
+from ..src.lib_tails import DecimatedTail, TailSegments, ring_runs
+from ..src.lib_plotting import project_to_view, segment_quads
+from ..src.ring_buffer import RingBuffer
+
+# Projection onto the x-y plane, 100 pixels per A.U., centered at the origin
+VIEW = (np.array([[1.0, 0], [0, 1], [0, 0]]), 100.0, np.zeros(2))
+
+
+class FakeTailRenderer:
+    # Records the points of a TailRenderer by their number (the selected samples in order) instead of drawing them
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.points = {}
+        self.num_drawn = 0
+        self.head = None
+
+    def redraw(self, points, num_appended):
+        points = points[-self.capacity:]
+        self.points = {num_appended - len(points) + k: point for k, point in enumerate(points)}
+        self.num_drawn, self.head = num_appended, None
+
+    def update(self, points, num_appended):
+        for k, point in enumerate(points):
+            number = num_appended - len(points) + k
+            if number in self.points:  # the previous newest point, passed again to connect the new segment
+                np.testing.assert_array_equal(self.points[number], point)
+            self.points[number] = point
+        self.num_drawn, self.head = num_appended, None
+
+    def set_head(self, point):
+        self.head = np.asarray(point)
+
+    def drawn(self):
+        # The points within the capacity of the ring, oldest first
+        numbers = sorted(number for number in self.points if number > self.num_drawn - 1 - self.capacity)
+        return np.array([self.points[number] for number in numbers])
+
+    def delete(self):
+        pass
+
+
+def orbit(numbers):
+    # Samples along a circle of radius 1 A.U., 0.02 rad apart: curved enough for a stride well below the length
+    angles = 0.02 * np.asarray(numbers)
+    return np.column_stack((np.cos(angles), np.sin(angles), np.zeros(len(angles))))
+
+
+def expected_points(tail, num_appended):
+    # The samples numbered 0, stride, 2 * stride, ... among the last length ones
+    numbers = [k for k in range(max(num_appended - tail.length, 0), num_appended) if k % tail.stride == 0]
+    return project_to_view(orbit(numbers), *VIEW)
+
+
+def assert_tail(tail, num_appended):
+    expected = expected_points(tail, num_appended)
+    drawn = tail._renderer.drawn()
+    # The ring may hold one selected sample older than the tail, since the tail ends at the newest sample
+    assert len(drawn) - len(expected) in (0, 1)
+    np.testing.assert_allclose(drawn[len(drawn) - len(expected):], expected, atol=1e-9)
+    newest = project_to_view(orbit([num_appended - 1]), *VIEW)[0]
+    if (num_appended - 1) % tail.stride != 0:
+        np.testing.assert_allclose(tail._renderer.head, newest, atol=1e-9)
+    else:
+        assert tail._renderer.head is None
+
+
+def test_decimated_tail_update_matches_redraw():
+    length = 200
+    history = RingBuffer(300, dim=3)
+    tail = DecimatedTail(length, FakeTailRenderer)
+    redrawn_at = []
+    redraw = tail.redraw
+
+    def record_redraw(samples, num_appended, view):
+        redrawn_at.append(num_appended)
+        redraw(samples, num_appended, view)
+
+    tail.redraw = record_redraw
+    # Single samples while the history grows beyond the tail, then also batches while it wraps around
+    batch_sizes = [1] * 250 + [3, 7, 1, 1, 13] * 20 + [1] * 50
+    for batch_size in batch_sizes:
+        start = history.num_appended
+        history.extend(orbit(range(start, start + batch_size)))
+        tail.update(history.view(), history.num_appended, VIEW)
+        assert_tail(tail, history.num_appended)
+
+        fresh = DecimatedTail(length, FakeTailRenderer)
+        fresh.redraw(history.view(), history.num_appended, VIEW)
+        if history.num_appended >= length:
+            # Once the tail is full, the stride is chosen from the same samples
+            assert fresh.stride == tail.stride
+            expected = fresh._renderer.drawn()
+            np.testing.assert_allclose(tail._renderer.drawn()[-len(expected):], expected, atol=1e-9)
+
+    assert 3 <= tail.stride < length // 4
+    # The stride is chosen again whenever the history has doubled while it is shorter than the tail
+    assert redrawn_at == [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def test_decimated_tail_redraws_after_clear_and_gaps():
+    history = RingBuffer(100, dim=3)
+    tail = DecimatedTail(80, FakeTailRenderer)
+    history.extend(orbit(range(90)))
+    tail.update(history.view(), history.num_appended, VIEW)
+    assert_tail(tail, 90)
+
+    # More new samples than the history holds: the tail is redrawn from the history
+    history.extend(orbit(range(90, 300)))
+    tail.update(history.view(), history.num_appended, VIEW)
+    assert_tail(tail, 300)
+
+    # After a clear, the numbering starts again
+    history.clear()
+    history.extend(orbit(range(5)))
+    tail.update(history.view(), history.num_appended, VIEW)
+    assert_tail(tail, 5)
+
+
+class ArrayTailSegments(TailSegments):
+    # Stores the segments in an array, as TailRenderer does in its vertex list, and records the written slots
+    def __init__(self, capacity, thickness=2):
+        super().__init__(capacity, thickness)
+        self.quads = np.zeros((self.capacity, 6, 2))
+        self.written = []
+
+    def _write(self, first_slot, quads):
+        for slot, offset, length in ring_runs(first_slot, len(quads), self.capacity):
+            self.quads[slot:slot + length] = quads[offset:offset + length]
+            self.written.extend(range(slot, slot + length))
+
+
+def test_ring_runs():
+    assert ring_runs(2, 3, 8) == [(2, 0, 3)]
+    assert ring_runs(6, 5, 8) == [(6, 0, 2), (0, 2, 3)]
+    assert ring_runs(0, 8, 8) == [(0, 0, 8)]
+    assert ring_runs(7, 8, 8) == [(7, 0, 1), (0, 1, 7)]
+    assert ring_runs(3, 0, 8) == []
+
+
+def assert_segments(tail, points, num_drawn):
+    # Each slot holds the segment from its point to the next one, and the slot of the newest point is hidden
+    # (its six vertices coincide)
+    capacity = tail.capacity
+    for number in range(max(num_drawn - capacity, 0), num_drawn - 1):
+        np.testing.assert_allclose(tail.quads[number % capacity],
+                                   segment_quads(points[number:number + 1], points[number + 1:number + 2], 2)[0])
+    hidden = tail.quads[(num_drawn - 1) % capacity]
+    np.testing.assert_array_equal(hidden, np.repeat(hidden[:1], 6, axis=0))
+
+
+def test_tail_segments_update_wraps_around():
+    capacity = 8
+    points = orbit(range(100))[:, :2] * 100
+    tail = ArrayTailSegments(capacity)
+    num_drawn = 0
+    # Single points, batches across the end of the ring, and batches too large for an update (redrawn)
+    for batch_size in [1, 1, 3, 2, 1, 5, 4, 1, 7, 1, 12, 1, 2, 3]:
+        tail.written.clear()
+        num_drawn += batch_size
+        tail.update(points[:num_drawn], num_drawn)
+        assert_segments(tail, points, num_drawn)
+        if batch_size < capacity - 1:
+            # Only the segments ending at the new points (from the previous newest one, if any) are written
+            first = num_drawn - batch_size - 1 if num_drawn > batch_size else num_drawn - batch_size
+            expected = {number % capacity for number in range(first, num_drawn)}
+            assert set(tail.written) == expected
+        else:
+            assert sorted(tail.written) == list(range(capacity))
+
+
+def test_tail_segments_head_and_redraw():
+    capacity = 8
+    points = orbit(range(30))[:, :2] * 100
+    tail = ArrayTailSegments(capacity)
+    tail.redraw(points[:19], 19)
+    assert_segments(tail, points, 19)
+
+    # The head connects the newest point to the current position, in the slot of the newest point
+    head = np.array([5.0, 7.0])
+    tail.set_head(head)
+    np.testing.assert_allclose(tail.quads[18 % capacity], segment_quads(points[18:19], head[np.newaxis], 2)[0])
+    # and is replaced by the next update
+    tail.update(points[:20], 20)
+    assert_segments(tail, points, 20)
+
+    # A redraw with fewer points than the capacity leaves the other slots empty
+    tail.redraw(points[:3], 3)
+    assert_segments(tail, points, 3)
+    assert np.all(tail.quads[3:] == 0)
@@ -2,19 +2,21 @@ import numpy as np
 from ..src.main import *
 from ..src.classes import CelestialBody
 import datetime
+import time
 import pytest
 import mock
 
 
 def test_position_in_view_edge_cases():
+    sun = get_simulation().bodies[0]
 
     # Test cases at the edge of view
     positions = [
         # At the boundary of the window 
-        celestial_bodies[0].position + np.array([field_of_view_AU / 2, 0, 0]),
-        celestial_bodies[0].position + np.array([-field_of_view_AU / 2, 0, 0]),
-        celestial_bodies[0].position + np.array([0, field_of_view_AU / 2, 0]),
-        celestial_bodies[0].position + np.array([0, -field_of_view_AU / 2, 0]),
+        sun.position + np.array([field_of_view_AU / 2, 0, 0]),
+        sun.position + np.array([-field_of_view_AU / 2, 0, 0]),
+        sun.position + np.array([0, field_of_view_AU / 2, 0]),
+        sun.position + np.array([0, -field_of_view_AU / 2, 0]),
     ]
 
     for position in positions:
@@ -59,3 +61,40 @@ def test_set_steps_per_frame_handler():
     
     assert steps_per_frame == 20, "Steps per frame is not as expected"
 
+
+def test_import_does_not_create_view():
+    assert window is None, "The window must only be created by run()"
+
+
+def test_set_steps_per_frame_handler_in_playback():
+    from ..src import main
+    player = mock.Mock(rate=1.0)
+    with mock.patch.object(main, 'player', player):
+        assert main.set_steps_per_frame_handler("-1000") == -1000  # any rate, also backwards
+        assert main.set_steps_per_frame_handler("0") == -1000
+        assert main.set_steps_per_frame_handler("fast") == -1000
+        assert main.set_steps_per_frame_handler("2.5") == 2.5
+    assert main.set_steps_per_frame_handler("1000") == main.steps_per_frame <= 50  # the live limit is unchanged
+
+
+def test_receive_frame_copies_the_state():
+    from ..src import main
+    from ..src.physics_process import PhysicsProcess
+    from ..src.simulation import Simulation
+    simulation = Simulation('inner', num_asteroids=5)
+    physics = PhysicsProcess(simulation, steps_per_second=0)
+    physics.load(simulation)
+    history = mock.Mock()
+    try:
+        with mock.patch.multiple(main, simulation=simulation, physics=physics, history=history, num_received_steps=0):
+            deadline = time.perf_counter() + 10
+            while main.receive_frame() == 0 and not history.append.called and time.perf_counter() < deadline:
+                time.sleep(0.01)
+    finally:
+        physics.close()
+    assert history.append.called
+    # The state outlives the shared memory of the physics process
+    positions, velocities = simulation.get_state()
+    assert positions.shape == (len(simulation.bodies) + 5, 3)
+    assert np.all(np.isfinite(positions)) and np.all(np.isfinite(velocities))
+    assert all(body.position.flags.owndata for body in simulation.bodies)
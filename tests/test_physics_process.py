@@ -0,0 +1,66 @@
+import datetime
+import time
+import numpy as np
+from ..src.physics_process import TripleBuffer, PhysicsProcess
+from ..src.simulation import Simulation
+
+
+def test_triple_buffer_returns_newest_frame():
+    buffer = TripleBuffer((2, 3))
+    try:
+        frame, is_new = buffer.latest()
+        assert not is_new
+        for k in range(3):
+            buffer.back()[:] = k
+            buffer.publish()
+        frame, is_new = buffer.latest()
+        assert is_new and np.all(frame == 2)
+        # The frame of the consumer is not overwritten by the producer
+        for k in range(3, 6):
+            buffer.back()[:] = k
+            buffer.publish()
+            assert np.all(frame == 2)
+        frame, is_new = buffer.latest()
+        assert is_new and np.all(frame == 5)
+        assert not buffer.latest()[1]
+    finally:
+        buffer.close()
+
+
+def test_physics_process_steps_and_jumps():
+    simulation = Simulation('inner', num_asteroids=10)
+    start_date = simulation.current_date
+    with PhysicsProcess(simulation, steps_per_second=float('inf')) as physics:
+        deadline = time.perf_counter() + 10
+        date, positions, _, num_steps, _ = physics.latest()
+        while num_steps < 5 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+            date, positions, _, num_steps, _ = physics.latest()
+        assert num_steps >= 5
+        assert date == start_date + datetime.timedelta(days=num_steps)
+        assert positions.shape == (len(simulation.bodies) + 10, 3)
+        assert not positions.flags.writeable
+
+        # Jump ahead of wherever the paused process is (backward Euler steps would not retrace the path)
+        assert physics.pause()
+        num_steps = physics.latest()[3]
+        target_date = physics.latest()[0] + datetime.timedelta(days=30)
+        assert physics.jump_to(target_date) == target_date
+        date, positions, velocities, num_jump_steps, _ = physics.latest()
+        assert num_jump_steps == num_steps  # no step after the pause
+        positions, velocities = positions.copy(), velocities.copy()  # the view is invalid once the process is closed
+
+        # Loading a state computed elsewhere
+        other = Simulation('inner', num_asteroids=10)
+        other.step(3)
+        physics.load(other)
+        deadline = time.perf_counter() + 10
+        while physics.latest()[0] != other.current_date and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        np.testing.assert_array_equal(physics.latest()[1], other.get_state()[0])
+    # The simulation passed in is unchanged and gives the same state when jumping itself
+    assert simulation.current_date == start_date
+    simulation.jump_to(target_date)
+    assert date == target_date
+    np.testing.assert_allclose(positions, simulation.get_state()[0], rtol=1e-12)
+    np.testing.assert_allclose(velocities, simulation.get_state()[1], rtol=1e-12)
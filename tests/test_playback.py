@@ -0,0 +1,60 @@
+import datetime
+import numpy as np
+import pytest
+from ..src.playback import TrajectoryPlayer
+from ..src.simulate import run_simulation
+from ..src.trajectory import Trajectory
+
+
+@pytest.fixture(scope='module')
+def trajectory(tmp_path_factory):
+    output = str(tmp_path_factory.mktemp('playback') / 'trajectory')
+    run_simulation(output, datetime.date(2024, 4, 10), which='inner', integrator='leapfrog', save_every=2)
+    return Trajectory(output)
+
+
+def test_seek_and_advance(trajectory):
+    player = TrajectoryPlayer(trajectory, rate=7)
+    assert player.days == 0 and player.date == datetime.date(2024, 1, 1)
+    assert player.advance(3) and player.days == 21
+
+    assert player.seek_date(datetime.date(2024, 3, 1)) and player.days == 60
+    assert not player.seek(200) and player.days == 100  # clamped to the end
+    assert player.at_end and not player.advance()
+
+    player.rate = -45.5
+    assert not player.at_end
+    assert player.advance() and player.days == 54.5
+    assert player.date == datetime.date(2024, 2, 24)
+    assert not player.advance(2) and player.days == 0
+    player.rate = 1000
+    player.rewind()
+    assert player.days == 0
+
+
+def test_state_is_interpolated(trajectory):
+    player = TrajectoryPlayer(trajectory)
+    player.seek(40)
+    positions, velocities = player.state()
+    np.testing.assert_array_equal(positions, trajectory.positions[20])
+    np.testing.assert_array_equal(velocities, trajectory.velocities[20])
+
+    # Halfway between two samples, the path is followed closely
+    player.seek(41)
+    positions, _ = player.state()
+    midpoint = (trajectory.positions[20] + trajectory.positions[21]) / 2
+    assert 0 < np.abs(positions - midpoint).max() < 1e-3
+
+
+def test_history(trajectory):
+    player = TrajectoryPlayer(trajectory, spacing=0.5)
+    player.seek(3.2)
+    np.testing.assert_allclose(player.history_times(), [0, 0.5, 1, 1.5, 2, 2.5, 3])
+    np.testing.assert_allclose(player.history_times(since=1.5), [2, 2.5, 3])
+    np.testing.assert_allclose(player.history_times(since=1.4), [1.5, 2, 2.5, 3])
+    assert len(player.history_times(since=3)) == 0
+
+    history = player.history([0, 2])
+    assert history.shape == (2, 6, 3)
+    np.testing.assert_array_equal(history[:, 0], 0)  # relative to the Sun
+    np.testing.assert_allclose(history[1], trajectory.positions[1] - trajectory.positions[1, 0])
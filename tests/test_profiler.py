@@ -0,0 +1,51 @@
+import csv
+import json
+import time
+import pytest
+from ..src.profiler import FrameProfiler, StartupTimer
+
+
+def test_statistics_and_dropped_frames():
+    profiler = FrameProfiler(['physics', 'draw'], window=4, target_frame_time=0.1)
+    for k in range(6):
+        with profiler.measure('physics'):
+            time.sleep(0.001 * k)
+        profiler.add_steps(2)
+        profiler.end_frame(0.1 if k < 5 else 0.3)  # the last frame took the time of three
+    statistics = profiler.statistics()
+    assert statistics['num_frames'] == 6
+    assert statistics['dropped_frames'] == 2
+    assert statistics['steps_per_second'] == pytest.approx(8 / 0.6)
+    # Only the last 4 frames count: 2, 3, 4 and 5 ms
+    assert 0.002 <= statistics['physics']['p50'] <= statistics['physics']['p95'] <= statistics['physics']['max']
+    assert statistics['physics']['max'] >= 0.005
+    assert statistics['draw']['max'] == 0
+    assert 'physics: p50' in profiler.summary()
+
+
+def test_export(tmp_path):
+    profiler = FrameProfiler(['physics'], trace_length=3)
+    for k in range(5):
+        profiler.end_frame(0.02)
+    profiler.export(str(tmp_path / 'trace.csv'))
+    with open(tmp_path / 'trace.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row['frame']) for row in rows] == [2, 3, 4]
+    assert set(rows[0]) == {'frame', 'timestamp', 'frame_time', 'steps', 'physics'}
+
+    profiler.export(str(tmp_path / 'trace.json'))
+    with open(tmp_path / 'trace.json') as f:
+        trace = json.load(f)
+    assert trace['statistics']['num_frames'] == 5 and len(trace['frames']) == 3
+
+
+def test_startup_timer():
+    timer = StartupTimer(start=time.perf_counter() - 1)
+    assert timer.summary() == "Startup: no phase completed"
+    timer.mark('imports')
+    timer.mark('view')
+    timer.mark('imports')  # ignored
+    assert list(timer.phases) == ['imports', 'view']
+    durations = timer.durations()
+    assert durations['imports'] >= 1 and 0 <= durations['view'] < 1
+    assert timer.summary().startswith("Startup 1.")
@@ -0,0 +1,25 @@
+import os
+import mock
+from ..src.utils.read_config import read_config
+from ..src.utils.resource_path import resource_path, base_path
+
+
+def test_read_config_is_parsed_once():
+    config = read_config()
+    assert config['input-data'] == 'data/planet-data.txt'
+    assert read_config() is config
+
+
+def test_resource_path_loads_dotenv_once():
+    base_path.cache_clear()
+    resource_path.cache_clear()
+    try:
+        with mock.patch('dotenv.load_dotenv') as load_dotenv:
+            path = resource_path('data/planet-data.txt')
+            resource_path('config/config.yaml')
+            assert load_dotenv.call_count == 1
+        assert os.path.isfile(path)
+        assert path.endswith(os.path.join('resources', 'data', 'planet-data.txt'))
+    finally:
+        base_path.cache_clear()
+        resource_path.cache_clear()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from ..src.ring_buffer import RingBuffer
+
+
+def test_append_and_view():
+    buffer = RingBuffer(3)
+    assert len(buffer) == 0
+    assert buffer.view().shape == (0, 2)
+    for k in range(5):
+        buffer.append((k, -k))
+    assert len(buffer) == 3
+    np.testing.assert_array_equal(buffer.view(), [[2, -2], [3, -3], [4, -4]])
+    np.testing.assert_array_equal(buffer.last(), [4, -4])
+
+
+def test_view_is_contiguous_after_wrap_around():
+    buffer = RingBuffer(4, dim=3)
+    for k in range(7):
+        buffer.append(np.full(3, k))
+        assert buffer.view().flags.c_contiguous
+        np.testing.assert_array_equal(buffer.view()[:, 0], np.arange(max(0, k - 3), k + 1))
+
+
+def test_clear_and_empty():
+    buffer = RingBuffer(2)
+    buffer.append((1, 1))
+    buffer.clear()
+    assert len(buffer) == 0
+    with pytest.raises(IndexError):
+        buffer.last()
+
+    # Zero capacity keeps nothing
+    buffer = RingBuffer(0)
+    buffer.append((1, 1))
+    assert len(buffer) == 0
+
+
+def test_append_counters():
+    buffer = RingBuffer(2)
+    for k in range(5):
+        buffer.append((k, k))
+    assert buffer.num_appended == 5
+    generation = buffer.generation
+    buffer.clear()
+    assert buffer.num_appended == 0
+    assert buffer.generation == generation + 1
+
+
+def test_points_of_several_bodies():
+    buffer = RingBuffer(3, dim=(2, 3))
+    for k in range(4):
+        buffer.append(np.full((2, 3), k))
+    assert buffer.view().shape == (3, 2, 3)
+    np.testing.assert_array_equal(buffer.view()[:, 1, 0], [1, 2, 3])
+
+
+def test_extend_matches_append():
+    rng = np.random.default_rng(0)
+    extended, appended = RingBuffer(5, dim=1), RingBuffer(5, dim=1)
+    value = 0
+    for num_points in rng.integers(0, 12, size=30):
+        points = np.arange(value, value + num_points)[:, np.newaxis]
+        value += num_points
+        extended.extend(points)
+        for point in points:
+            appended.append(point)
+        np.testing.assert_array_equal(extended.view(), appended.view())
+        assert extended.num_appended == appended.num_appended
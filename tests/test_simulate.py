@@ -0,0 +1,51 @@
+import numpy as np
+import datetime
+import pytest
+from ..src.simulate import run_simulation, advance, main
+from ..src.trajectory import Trajectory
+from ..src.create_celestial_bodies import create_celestial_bodies
+from ..src.lib_calculation import compute_timestep, get_state
+from ..src.create_celestial_bodies import G
+
+
+def test_run_simulation(tmp_path):
+    output = str(tmp_path / 'trajectory')
+    run_simulation(output, datetime.date(2024, 2, 1), which='inner', save_every=3, chunk_size=4)
+    trajectory = Trajectory(output)
+    # Every third of the 31 steps, and the last one although 3 does not divide 31
+    assert len(trajectory) == 31 // 3 + 2
+    np.testing.assert_array_equal(trajectory.times, [*range(0, 31, 3), 31])
+    assert trajectory.names[0] == 'Sun'
+    assert trajectory.date(0) == datetime.date(2024, 1, 1)
+    assert trajectory.date(-1) == datetime.date(2024, 2, 1)
+    assert trajectory.positions.shape == (len(trajectory), 6, 3)
+
+    # The samples must agree with the animation's time stepping
+    bodies, date = create_celestial_bodies('inner')
+    for _ in range(30):
+        date = compute_timestep(bodies, G, date)
+    np.testing.assert_allclose(trajectory.positions[-2], get_state(bodies)[0], rtol=1e-12)
+    compute_timestep(bodies, G, date)
+    np.testing.assert_allclose(trajectory.positions[-1], get_state(bodies)[0], rtol=1e-12)
+
+    # No extra sample if save_every divides the number of steps
+    run_simulation(output, datetime.date(2024, 2, 1), which='inner', save_every=31)
+    np.testing.assert_array_equal(Trajectory(output).times, [0, 31])
+
+
+def test_advance_forth_and_back():
+    bodies, _ = create_celestial_bodies('inner')
+    positions, velocities, masses = get_state(bodies)
+    forth = advance(positions, velocities, masses, 100, integrator='leapfrog')
+    back = advance(*forth, masses, -100, integrator='leapfrog')
+    np.testing.assert_allclose(back[0], positions, atol=1e-10)
+
+
+def test_command_line(tmp_path):
+    output = str(tmp_path / 'trajectory')
+    main(['--bodies', 'outer', '--start', '2024-01-11', '--end', '2023-12-22', '--step', '5',
+          '--integrator', 'yoshida4', '--output', output, '--quiet'])
+    trajectory = Trajectory(output)
+    assert len(trajectory) == 5
+    assert trajectory.date(-1) == datetime.date(2023, 12, 22)
+    assert trajectory.metadata['integrator'] == 'yoshida4'
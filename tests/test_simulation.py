@@ -0,0 +1,86 @@
+import numpy as np
+import datetime
+import subprocess
+import sys
+import os
+import pytest
+from ..src.simulation import Simulation
+
+# Importing the simulation core must stay cheap, so that tests, tools and workers start quickly
+IMPORT_TIME_BUDGET = 1.0  # seconds
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_of_simulation_core():
+    code = ("import time, sys; start = time.perf_counter(); import src.simulation; "
+            "print(time.perf_counter() - start, 'pyglet' in sys.modules)")
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPOSITORY_ROOT, capture_output=True, text=True, check=True)
+    import_time, pyglet_imported = output.stdout.split()
+    assert pyglet_imported == 'False', "The simulation core must not depend on pyglet"
+    assert float(import_time) < IMPORT_TIME_BUDGET, f"Import took {float(import_time):.3f} s"
+
+
+def test_step():
+    simulation = Simulation('inner')
+    start_date = simulation.current_date
+    assert simulation.step(3) == start_date + datetime.timedelta(days=3)
+
+
+def test_jump_to_uses_checkpoints():
+    simulation = Simulation('inner', checkpoint_interval=30)
+    start_date = simulation.current_date
+    initial_positions = simulation.get_state()[0]
+    simulation.jump_to(start_date + datetime.timedelta(days=100))
+    positions_after_100_days = simulation.get_state()[0]
+    assert len(simulation.checkpoints) == 1 + 100 // 30
+
+    # Jumping back to the start restores the initial snapshot instead of integrating backwards
+    simulation.jump_to(start_date)
+    np.testing.assert_array_equal(simulation.get_state()[0], initial_positions)
+
+    progress = []
+    simulation.jump_to(start_date + datetime.timedelta(days=100), progress=progress.append)
+    assert 0 < len(progress) < 30, "Expected to start from the last checkpoint before the target date"
+    assert np.all(np.diff(progress) > 0) and progress[-1] == pytest.approx(1)
+    np.testing.assert_allclose(simulation.get_state()[0], positions_after_100_days, rtol=1e-12)
+
+
+def test_jump_to_with_tolerance():
+    drift = {}
+    for tolerance in (None, 1e-6):
+        simulation = Simulation('inner', integrator='leapfrog', checkpoint_interval=30)
+        monitor = simulation.monitor_conservation()
+        simulation.jump_to(simulation.current_date + datetime.timedelta(days=200), t_step=8, tolerance=tolerance)
+        drift[tolerance] = monitor.update(*simulation.massive_state()[:2])
+    # The step is reduced until the drift of the jump is within the tolerance
+    assert drift[None] > 1e-6 >= drift[1e-6]
+
+
+def test_max_step_and_monitor():
+    simulation = Simulation('inner', max_step=0.25)
+    monitor = simulation.monitor_conservation(every=2)
+    start_date = simulation.current_date
+    assert simulation.step(4) == start_date + datetime.timedelta(days=4)
+    assert 0 < monitor.energy_drift < 1e-4
+    # Four substeps per day agree with a jump using steps of a quarter day
+    reference = Simulation('inner')
+    reference.jump_to(simulation.current_date, t_step=0.25)
+    np.testing.assert_allclose(simulation.get_state()[0], reference.get_state()[0], rtol=1e-12)
+
+
+def test_kepler_jump_to():
+    target_date = datetime.date(2025, 1, 1)
+    integrated = Simulation('inner', integrator='yoshida4')
+    integrated.jump_to(target_date)
+    preview = Simulation('inner', num_asteroids=10)
+    days = (target_date - preview.current_date).days
+    positions, velocities, masses = preview.massive_state()
+    barycenter = masses @ positions / masses.sum()
+    assert preview.kepler_jump_to(target_date) == target_date
+    # The planets are perturbed by each other, but only slightly within a year
+    difference = preview.massive_state()[0] - integrated.massive_state()[0]
+    assert np.abs(difference).max() < 1e-2
+    new_positions, new_velocities, _ = preview.massive_state()
+    new_barycenter = masses @ new_positions / masses.sum()
+    np.testing.assert_allclose(new_barycenter, barycenter + masses @ velocities / masses.sum() * days, atol=1e-12)
+    assert np.all(np.isfinite(preview.particles.positions))
@@ -0,0 +1,36 @@
+import datetime
+import numpy as np
+import pytest
+from ..src.trajectory import TrajectoryWriter, Trajectory, hermite_interpolate
+
+
+def test_hermite_interpolate_is_exact_for_cubics():
+    def position(t):
+        return np.stack((t**3 - 2 * t, 0.5 * t**2, np.ones_like(t)), axis=-1)[:, np.newaxis]
+
+    def velocity(t):
+        return np.stack((3 * t**2 - 2, t, np.zeros_like(t)), axis=-1)[:, np.newaxis]
+
+    times = np.array([0, 0.5, 2, 3])
+    at = np.array([0, 0.1, 0.5, 1.7, 2.5, 3])
+    for sign in (1, -1):  # increasing and decreasing times
+        positions, velocities = hermite_interpolate(sign * times, position(sign * times), velocity(sign * times),
+                                                    sign * at)
+        np.testing.assert_allclose(positions, position(sign * at), atol=1e-12)
+        np.testing.assert_allclose(velocities, velocity(sign * at), atol=1e-12)
+
+
+def test_trajectory_interpolate(tmp_path):
+    directory = str(tmp_path / 'trajectory')
+    times = np.arange(5.0)
+    positions = np.stack((np.cos(times), np.sin(times), np.zeros(5)), axis=-1)[:, np.newaxis]
+    velocities = np.stack((-np.sin(times), np.cos(times), np.zeros(5)), axis=-1)[:, np.newaxis]
+    with TrajectoryWriter(directory, 5, ['Moon'], [0], datetime.date(2024, 1, 1)) as writer:
+        writer.write(times, positions, velocities)
+    trajectory = Trajectory(directory)
+
+    interpolated_positions, _ = trajectory.interpolate([1, 2.5])
+    np.testing.assert_allclose(interpolated_positions[0], positions[1])
+    np.testing.assert_allclose(interpolated_positions[1, 0], [np.cos(2.5), np.sin(2.5), 0], atol=1 / 384)  # error bound h**4 / 384
+    with pytest.raises(ValueError):
+        trajectory.interpolate([4.5])